@@ -0,0 +1,94 @@
+"""Streaming ZIP archives of invoice PDFs.
+
+``stream_zip`` writes entries into a ``ZipFile`` backed by a non-seekable sink
+and yields the compressed bytes as soon as each chunk is written, so the
+archive is never held in memory or written to disk. Entries are read from
+files in chunks, or come as bytes when PDFs are rendered in memory.
+"""
+import io
+import logging
+import zipfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream that buffers bytes until drained.
+
+    ``ZipFile`` detects that it cannot seek and switches to data descriptors,
+    which is what makes single-pass streaming possible.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._offset += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        raise io.UnsupportedOperation("seek")
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def unique_name(name: str, used: set[str]) -> str:
+    candidate = name
+    stem, suffix = Path(name).stem, Path(name).suffix
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem}_{counter}{suffix}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def _blocks(source: Path | bytes) -> Iterator[bytes]:
+    if isinstance(source, bytes):
+        for offset in range(0, len(source), READ_CHUNK_SIZE):
+            yield source[offset : offset + READ_CHUNK_SIZE]
+        return
+    with source.open("rb") as src:
+        while True:
+            block = src.read(READ_CHUNK_SIZE)
+            if not block:
+                return
+            yield block
+
+
+def stream_zip(entries: Iterable[tuple[str, Path | bytes]]) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(archive_name, file_path or content)`` entries chunk by chunk."""
+    sink = _ChunkSink()
+    used: set[str] = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name, source in entries:
+            with archive.open(unique_name(name, used), mode="w") as dest:
+                for block in _blocks(source):
+                    dest.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
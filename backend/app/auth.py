@@ -1,7 +1,13 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from . import metrics
 from .settings import settings
 
 security = HTTPBearer()
@@ -18,44 +24,94 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+class TokenCache:
+    """Bounded LRU of verified tokens, keyed by SHA-256 digest of the token.
+
+    Entries expire after AUTH_CACHE_TTL_SECONDS and never outlive the token's own
+    ``exp``, so a cached token is rejected at the same moment ``jwt.decode``
+    would reject it. Only successful verifications are cached.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: bytes, username: str, token_exp: float | None) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[key] = (username, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+metrics.registry.describe(
+    "invoiceflow_auth_token_cache_total", "counter", "Verified-token cache lookups by result", ("result",)
+)
+
+def invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials"
+    )
+
+def decode_token(token: str) -> str:
+    """Return the username of a valid token, from the cache when it was verified recently."""
+    key = hashlib.sha256(token.encode()).digest()
+    username = token_cache.get(key)
+    if username is not None:
+        metrics.registry.inc("invoiceflow_auth_token_cache_total", ("hit",))
+        return username
+    metrics.registry.inc("invoiceflow_auth_token_cache_total", ("miss",))
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
-            )
-        return username
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
+        raise invalid_credentials()
+    username = payload.get("sub")
+    if username is None:
+        raise invalid_credentials()
+    exp = payload.get("exp")
+    token_cache.put(key, username, float(exp) if exp is not None else None)
+    return username
+
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return decode_token(credentials.credentials)
 
 def verify_token_optional(token: str | None = None, credentials: HTTPAuthorizationCredentials | None = Depends(optional_security)):
     provided = token or (credentials.credentials if credentials else None)
     if not provided:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    try:
-        payload = jwt.decode(provided, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
-            )
-        return username
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
+        raise invalid_credentials()
+    return decode_token(provided)
+
+def verify_cron_secret(request: Request):
+    """Scheduled jobs authenticate with ``Authorization: Bearer <CRON_SECRET>`` (what Vercel Cron sends)."""
+    if not settings.CRON_SECRET:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="CRON_SECRET is not configured")
+    provided = request.headers.get("authorization", "")
+    if not hmac.compare_digest(provided.encode(), f"Bearer {settings.CRON_SECRET}".encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid cron secret")
 
 def verify_credentials(username: str, password: str) -> bool:
     """Verify username and password against environment variables"""
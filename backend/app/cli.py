@@ -0,0 +1,421 @@
+"""Command-line entry point for batch maintenance: ``python -m app <command>``.
+
+Commands work on the models directly instead of going through HTTP, so bulk
+jobs are not bound by per-request limits:
+
+* ``rollover 2024-06``: copy each sheet's latest roster into a new month
+  (``main.rollover_month``);
+* ``close-month 2024-05``: build or refresh every invoice of the month from its
+  sheet rows, then render the PDFs that changed;
+* ``render``: re-render invoice PDFs (e.g. after a template change) across
+  ``--workers`` processes;
+* ``archive-month 2024-01`` / ``reopen-month 2024-01``: move a finished month
+  out of the hot tables and back (``partitions.archive_month``);
+* ``export invoices|lines|rows``: stream CSV or JSON lines to a file or stdout,
+  archived months included;
+* ``seed``: create the tables and insert a synthetic ``SeedConfig`` dataset;
+* ``migrate``: bring an existing database's tables, indexes, foreign keys and
+  views up to the models (``migrations.migrate``); safe to repeat, and
+  required before deploying a release that changes models to Vercel.
+
+Progress goes to stderr, and every command finishes with a throughput line.
+Run from ``backend/`` with the same ``DATABASE_URL`` the API uses.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select, update
+
+from . import events, migrations, models, partitions, queries
+from .db import SessionLocal, engine
+
+RENDER_CHUNK_SIZE = 200  # invoices loaded (with lines) per query while rendering
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+
+class Progress:
+    """Single-line progress and throughput report on stderr."""
+
+    def __init__(self, label: str, total: int | None = None, stream=sys.stderr):
+        self.label = label
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+
+    def advance(self, count: int = 1, failed: bool = False) -> None:
+        self.done += count
+        if failed:
+            self.failed += count
+        now = time.perf_counter()
+        if now - self._last_report >= PROGRESS_INTERVAL_SECONDS:
+            self._last_report = now
+            total = f"/{self.total}" if self.total is not None else ""
+            self.stream.write(f"\r{self.label}: {self.done}{total}  {self.rate():.1f}/s")
+            self.stream.flush()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def finish(self) -> str:
+        summary = f"{self.label}: {self.done} in {self.elapsed():.2f} s ({self.rate():.1f}/s), {self.failed} failed"
+        self.stream.write(f"\r{summary}\n")
+        self.stream.flush()
+        return summary
+
+
+def invoice_ids(db, month_key: str | None = None, missing_only: bool = False) -> list[int]:
+    query = db.query(models.CombinedInvoice.id)
+    if month_key:
+        query = query.filter(models.CombinedInvoice.month_key == month_key)
+    ids = []
+    for invoice_id, pdf_path in query.add_columns(models.CombinedInvoice.pdf_path).order_by(models.CombinedInvoice.id):
+        if not missing_only or not pdf_path or not Path(pdf_path).exists():
+            ids.append(invoice_id)
+    return ids
+
+
+def _render_jobs(ids: list[int]) -> Iterator[tuple[int, dict]]:
+    from .main import INVOICE_DIR, invoice_render_kwargs
+
+    for start in range(0, len(ids), RENDER_CHUNK_SIZE):
+        with SessionLocal() as db:
+            invoices = (
+                queries.invoices_query(db, with_lines=True)
+                .filter(models.CombinedInvoice.id.in_(ids[start : start + RENDER_CHUNK_SIZE]))
+                .order_by(models.CombinedInvoice.id)
+            )
+            for invoice in invoices:
+                kwargs = invoice_render_kwargs(invoice, invoice.pair_sheet, invoice.lines)
+                yield invoice.id, {"out_dir": INVOICE_DIR, **kwargs}
+
+
+def _save_paths(rendered: list[dict]) -> None:
+    if not rendered:
+        return
+    with SessionLocal() as db:
+        db.execute(update(models.CombinedInvoice), rendered)
+        events.emit_many(db, "invoice.rendered", [{"invoice_id": row["id"]} for row in rendered])
+        db.commit()
+    rendered.clear()
+
+
+def render_invoices(ids: list[int], workers: int) -> Progress:
+    """Render ``ids`` on ``workers`` processes (inline when 1) and store the new ``pdf_path`` values."""
+    from .invoice_pdf import generate_combined_invoice_pdf
+
+    progress = Progress("render", len(ids))
+    rendered: list[dict] = []
+
+    def record(invoice_id: int, pdf_path: Path | None) -> None:
+        if pdf_path is None:
+            progress.advance(failed=True)
+            return
+        rendered.append({"id": invoice_id, "pdf_path": str(pdf_path), "updated_at": datetime.utcnow()})
+        if len(rendered) >= RENDER_CHUNK_SIZE:
+            _save_paths(rendered)
+        progress.advance()
+
+    if workers <= 1:
+        for invoice_id, kwargs in _render_jobs(ids):
+            try:
+                record(invoice_id, generate_combined_invoice_pdf(**kwargs))
+            except Exception as exc:
+                print(f"\ninvoice {invoice_id}: {exc}", file=sys.stderr)
+                record(invoice_id, None)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending: dict = {}
+
+            def drain(block_until: int) -> None:
+                nonlocal pending
+                while len(pending) > block_until:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        invoice_id = pending.pop(future)
+                        try:
+                            record(invoice_id, future.result())
+                        except Exception as exc:
+                            print(f"\ninvoice {invoice_id}: {exc}", file=sys.stderr)
+                            record(invoice_id, None)
+
+            # keep a bounded number of renders in flight so memory stays flat on large runs
+            for invoice_id, kwargs in _render_jobs(ids):
+                pending[pool.submit(generate_combined_invoice_pdf, **kwargs)] = invoice_id
+                drain(workers * 4)
+            drain(0)
+    _save_paths(rendered)
+    return progress
+
+
+def close_month(month_key: str, workers: int, render: bool = True) -> list[str]:
+    from fastapi import HTTPException
+
+    from .main import build_invoice_from_sheet
+
+    summaries = []
+    with SessionLocal() as db:
+        partitions.ensure_open(db, month_key)
+        sheet_ids = [
+            sheet_id
+            for (sheet_id,) in db.query(models.SheetRow.pair_sheet_id)
+            .filter(models.SheetRow.month_key == month_key)
+            .distinct()
+            .order_by(models.SheetRow.pair_sheet_id)
+        ]
+        progress = Progress(f"invoices {month_key}", len(sheet_ids))
+        for sheet in queries.pair_sheets_query(db).filter(models.PairSheet.id.in_(sheet_ids)).order_by(models.PairSheet.id):
+            try:
+                build_invoice_from_sheet(db, sheet, month_key, render=False)
+                progress.advance()
+            except HTTPException as exc:
+                db.rollback()
+                print(f"\nsheet {sheet.id}: {exc.detail}", file=sys.stderr)
+                progress.advance(failed=True)
+        summaries.append(progress.finish())
+        ids = invoice_ids(db, month_key, missing_only=True) if render else []
+    if ids:
+        summaries.append(render_invoices(ids, workers).finish())
+    return summaries
+
+
+def _export_invoices():
+    invoice = partitions.union("invoices").c
+    return (
+        select(
+            invoice.id,
+            invoice.invoice_number,
+            invoice.month_key,
+            models.Vendor.name.label("vendor"),
+            models.Company.name.label("company"),
+            invoice.total_amount,
+            invoice.sent,
+            invoice.paid,
+            invoice.sent_at,
+            invoice.paid_at,
+        )
+        .join(models.PairSheet, models.PairSheet.id == invoice.pair_sheet_id)
+        .join(models.Vendor, models.Vendor.id == models.PairSheet.vendor_id)
+        .join(models.Company, models.Company.id == models.PairSheet.company_id)
+        .order_by(invoice.id)
+    )
+
+
+def _export_lines():
+    invoices = partitions.union("invoices")
+    invoice, line = invoices.c, partitions.union("invoice_lines").c
+    return (
+        select(
+            invoice.invoice_number,
+            invoice.month_key,
+            line.sort_order,
+            line.employee_name,
+            line.role,
+            line.hours,
+            line.rate,
+            line.amount,
+            line.notes,
+            line.comments,
+        )
+        .join(invoices, (invoice.id == line.combined_invoice_id) & (invoice.month_key == line.month_key))
+        .order_by(invoice.id, line.sort_order)
+    )
+
+
+def _export_rows():
+    row = partitions.union("sheet_rows").c
+    return (
+        select(
+            row.month_key,
+            models.Vendor.name.label("vendor"),
+            models.Company.name.label("company"),
+            models.Employee.name.label("employee"),
+            row.role,
+            row.hours,
+            row.rate,
+            (row.hours * row.rate).label("amount"),
+            row.notes,
+            row.comments,
+        )
+        .join(models.PairSheet, models.PairSheet.id == row.pair_sheet_id)
+        .join(models.Vendor, models.Vendor.id == models.PairSheet.vendor_id)
+        .join(models.Company, models.Company.id == models.PairSheet.company_id)
+        .join(models.Employee, models.Employee.id == row.employee_id)
+        .order_by(row.month_key, row.pair_sheet_id, row.sort_order)
+    )
+
+
+# archived months are exported too: each source is the hot and archive tables' UNION ALL
+EXPORTS = {"invoices": _export_invoices, "lines": _export_lines, "rows": _export_rows}
+
+
+def _month_column(statement):
+    for column in statement.selected_columns:
+        if column.key == "month_key":
+            return column
+    raise KeyError("month_key")
+
+
+def export(kind: str, out, fmt: str = "csv", month_key: str | None = None) -> Progress:
+    statement = EXPORTS[kind]()
+    if month_key:
+        statement = statement.where(_month_column(statement) == month_key)
+    progress = Progress(f"export {kind}")
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=1000).execute(statement)
+        columns = list(result.keys())
+        writer = csv.writer(out) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        for partition in result.partitions():
+            for row in partition:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(dict(zip(columns, row)), default=str) + "\n")
+            progress.advance(len(partition))
+    return progress
+
+
+def seed(config_values: dict) -> Progress:
+    from .seed import SeedConfig, generate_dataset
+
+    migrations.migrate(engine)
+    progress = Progress("seed")
+    with SessionLocal() as db:
+        counts = generate_dataset(db, SeedConfig(**config_values))
+    progress.advance(sum(counts.values()))
+    for table, count in counts.items():
+        print(f"  {table:20s} {count}", file=sys.stderr)
+    return progress
+
+
+def _add_seed_arguments(parser: argparse.ArgumentParser) -> None:
+    from .seed import SeedConfig
+
+    for field in fields(SeedConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", dest=field.name, type=type(field.default), default=field.default)
+
+
+def _open_output(path: str | None):
+    if path in (None, "-"):
+        return sys.stdout
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app", description="InvoiceFlow batch maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    default_workers = os.cpu_count() or 1
+
+    rollover = commands.add_parser("rollover", help="copy each sheet's roster into a new month")
+    rollover.add_argument("month_key", help="YYYY-MM")
+    rollover.add_argument("--from", dest="from_month_key", help="copy this YYYY-MM instead of each sheet's latest")
+    rollover.add_argument("--keep-hours", dest="zero_hours", action="store_false")
+
+    close = commands.add_parser("close-month", help="build every invoice of a month and render changed PDFs")
+    close.add_argument("month_key", help="YYYY-MM")
+    close.add_argument("--workers", type=int, default=default_workers)
+    close.add_argument("--no-render", dest="render", action="store_false", help="update invoices only")
+
+    archiver = commands.add_parser("archive-month", help="move a finished month to the archive tables")
+    archiver.add_argument("month_key", help="YYYY-MM")
+    archiver.add_argument("--force", action="store_true", help="archive even with unsent or unpaid invoices")
+
+    reopener = commands.add_parser("reopen-month", help="move an archived month back into the hot tables")
+    reopener.add_argument("month_key", help="YYYY-MM")
+
+    render = commands.add_parser("render", help="re-render invoice PDFs")
+    render.add_argument("--month", dest="month_key", help="only invoices of this YYYY-MM")
+    render.add_argument("--missing", action="store_true", help="only invoices without a PDF on disk")
+    render.add_argument("--workers", type=int, default=default_workers)
+
+    exporter = commands.add_parser("export", help="stream invoices, invoice lines or sheet rows")
+    exporter.add_argument("kind", choices=sorted(EXPORTS))
+    exporter.add_argument("--month", dest="month_key")
+    exporter.add_argument("--format", dest="fmt", choices=("csv", "jsonl"), default="csv")
+    exporter.add_argument("--output", "-o", help="file path (default: stdout)")
+
+    seeder = commands.add_parser("seed", help="insert a synthetic dataset (see app.seed.SeedConfig)")
+    _add_seed_arguments(seeder)
+
+    commands.add_parser("migrate", help="create missing tables, indexes and views and update foreign keys")
+    return parser
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    from fastapi import HTTPException
+
+    args = build_parser().parse_args(list(argv) if argv is not None else None)
+    try:
+        run(args)
+    except HTTPException as exc:
+        # the shared helpers report refusals (archived month, unpaid invoices) as HTTP errors
+        print(f"error: {exc.detail}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.command == "rollover":
+        from .main import rollover_month
+
+        progress = Progress(f"rollover {args.month_key}")
+        with SessionLocal() as db:
+            result = rollover_month(db, args.month_key, args.from_month_key, args.zero_hours)
+        progress.advance(result.rows)
+        progress.finish()
+        print(f"  {result.sheets} sheets opened", file=sys.stderr)
+    elif args.command == "close-month":
+        close_month(args.month_key, args.workers, args.render)
+    elif args.command in ("archive-month", "reopen-month"):
+        progress = Progress(f"{args.command} {args.month_key}")
+        with SessionLocal() as db:
+            if args.command == "archive-month":
+                result = partitions.archive_month(db, args.month_key, args.force)
+            else:
+                result = partitions.reopen_month(db, args.month_key)
+        progress.advance(result.sheet_rows + result.invoices + result.invoice_lines)
+        progress.finish()
+        print(
+            f"  {result.sheet_rows} sheet rows, {result.invoices} invoices, {result.invoice_lines} invoice lines moved",
+            file=sys.stderr,
+        )
+    elif args.command == "render":
+        with SessionLocal() as db:
+            ids = invoice_ids(db, args.month_key, args.missing)
+        render_invoices(ids, args.workers).finish()
+    elif args.command == "export":
+        out = _open_output(args.output)
+        try:
+            progress = export(args.kind, out, args.fmt, args.month_key)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        progress.finish()
+    elif args.command == "seed":
+        config = {key: value for key, value in vars(args).items() if key != "command"}
+        seed(config).finish()
+    elif args.command == "migrate":
+        progress = Progress("migrate")
+        changes = migrations.migrate(engine)
+        progress.advance(len(changes))
+        progress.finish()
+        for change in changes or ["schema already up to date"]:
+            print(f"  {change}", file=sys.stderr)
@@ -0,0 +1,134 @@
+"""Time-budgeted, resumable batch runner behind the ``/cron/run`` endpoint.
+
+Serverless invocations are killed after a fixed time, so each job walks its
+items in ascending id order in batches of ``CRON_BATCH_SIZE`` and stores the
+last processed id in ``cron_checkpoints`` after every item. A checkpoint row
+covers one job and run key: the month for once-a-month jobs such as reminders
+(``2024-05``), the month and day for daily sweeps (``2024-05@2024-05-31``). An invocation stops starting new
+items once the remaining ``CRON_TIME_BUDGET_SECONDS`` is shorter than the
+slowest item seen so far; the next invocation resumes after the checkpoint.
+Failed items are counted, logged and skipped so one bad record cannot stall
+the batch. A lease on the checkpoint keeps overlapping invocations from
+processing the same items twice.
+"""
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import metrics, models
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+metrics.registry.describe(
+    "invoiceflow_cron_items_total", "counter", "Cron batch items by job and result", ("job", "result")
+)
+
+
+@dataclass
+class CronJob:
+    name: str
+    # (db, month_key, after_id, limit) -> ids of the next items, ascending
+    batch: Callable[[Session, str, int, int], list[int]]
+    # (db, month_key, item_id) -> None; commits its own work
+    process: Callable[[Session, str, int], None]
+    daily: bool = False  # sweep again every day instead of once per month
+
+    def run_key(self, month_key: str) -> str:
+        return f"{month_key}@{datetime.utcnow().date().isoformat()}" if self.daily else month_key
+
+
+def _checkpoint(db: Session, job: str, run_key: str) -> models.CronCheckpoint:
+    checkpoint = db.query(models.CronCheckpoint).filter_by(job=job, run_key=run_key).first()
+    if checkpoint is None:
+        db.add(models.CronCheckpoint(job=job, run_key=run_key))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # created by an overlapping invocation
+        checkpoint = db.query(models.CronCheckpoint).filter_by(job=job, run_key=run_key).one()
+    return checkpoint
+
+
+def _acquire_lease(db: Session, checkpoint: models.CronCheckpoint, seconds: float) -> bool:
+    now = datetime.utcnow()
+    leased = db.execute(
+        update(models.CronCheckpoint)
+        .where(
+            models.CronCheckpoint.id == checkpoint.id,
+            or_(models.CronCheckpoint.leased_until.is_(None), models.CronCheckpoint.leased_until < now),
+        )
+        .values(leased_until=now + timedelta(seconds=seconds))
+    ).rowcount
+    db.commit()
+    db.refresh(checkpoint)
+    return bool(leased)
+
+
+def run_job(db: Session, job: CronJob, month_key: str, deadline: float) -> dict:
+    run_key = job.run_key(month_key)
+    checkpoint = _checkpoint(db, job.name, run_key)
+    result = {"job": job.name, "run_key": run_key, "status": "done", "processed": 0, "failed": 0}
+    if checkpoint.done:
+        result["cursor"] = checkpoint.cursor
+        return result
+    # the lease outlives this invocation's budget so a crashed run blocks the next one only briefly
+    if not _acquire_lease(db, checkpoint, settings.CRON_TIME_BUDGET_SECONDS * 2):
+        result.update(status="busy", cursor=checkpoint.cursor)
+        return result
+
+    slowest = 0.0
+    try:
+        while True:
+            ids = job.batch(db, month_key, checkpoint.cursor, settings.CRON_BATCH_SIZE)
+            if not ids:
+                checkpoint.done = True
+                checkpoint.finished_at = datetime.utcnow()
+                break
+            for item_id in ids:
+                if deadline - time.monotonic() <= slowest:
+                    result["status"] = "partial"
+                    return result
+                started = time.monotonic()
+                try:
+                    job.process(db, month_key, item_id)
+                    outcome = "processed"
+                except Exception as exc:
+                    db.rollback()
+                    logger.exception("Cron job %s (%s) failed on item %s", job.name, run_key, item_id)
+                    checkpoint.last_error = f"item {item_id}: {exc}"[:2000]
+                    outcome = "failed"
+                slowest = max(slowest, time.monotonic() - started)
+                metrics.registry.inc("invoiceflow_cron_items_total", (job.name, outcome))
+                result[outcome] += 1
+                setattr(checkpoint, outcome, getattr(checkpoint, outcome) + 1)
+                checkpoint.cursor = item_id
+                checkpoint.updated_at = datetime.utcnow()
+                db.commit()
+    finally:
+        checkpoint.leased_until = None
+        checkpoint.updated_at = datetime.utcnow()
+        db.commit()
+        result["cursor"] = checkpoint.cursor
+    return result
+
+
+def run(db: Session, jobs: list[CronJob], month_key: str, budget_seconds: float | None = None) -> list[dict]:
+    """Run ``jobs`` for ``month_key`` in order until they finish or the time budget runs out."""
+    budget = settings.CRON_TIME_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    deadline = time.monotonic() + budget
+    results = []
+    for job in jobs:
+        if time.monotonic() >= deadline:
+            results.append(
+                {"job": job.name, "run_key": job.run_key(month_key), "status": "pending", "processed": 0, "failed": 0}
+            )
+            continue
+        results.append(run_job(db, job, month_key, deadline))
+    return results
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import NullPool
 import os
@@ -28,6 +29,19 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def ensure_indexes(bind=None) -> None:
+    """Create indexes declared on the models that an existing database is missing.
+
+    ``create_all`` only creates indexes together with new tables, so indexes added
+    to models later would otherwise never reach databases created earlier.
+    """
+    # IF NOT EXISTS rather than checkfirst: SQLite cannot reflect expression indexes
+    with (bind or engine).begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 def get_db():
     db = SessionLocal()
     try:
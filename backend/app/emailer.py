@@ -1,5 +1,3 @@
-import smtplib
-from email.message import EmailMessage
 from pathlib import Path
 from typing import Iterable
 from .settings import settings
@@ -8,9 +6,13 @@ def send_email(
     subject: str,
     body: str,
     to_emails: str | Iterable[str],
-    attachments: list[Path] | None = None,
+    attachments: list[Path | tuple[str, bytes]] | None = None,
     cc_emails: Iterable[str] | None = None,
 ):
+    # smtplib/email are imported on first send to keep the API cold start lean
+    import smtplib
+    from email.message import EmailMessage
+
     if isinstance(to_emails, str):
         recipients = [to_emails]
     else:
@@ -28,21 +30,28 @@ def send_email(
         msg["Cc"] = ", ".join(cc)
     msg.set_content(body)
 
-    attachments = attachments or []
-    for p in attachments:
-        data = p.read_bytes()
-        msg.add_attachment(data, maintype="application", subtype="pdf", filename=p.name)
+    # PDFs attach from a file or straight from an in-memory render as (file name, bytes)
+    for attachment in attachments or []:
+        if isinstance(attachment, Path):
+            filename, data = attachment.name, attachment.read_bytes()
+        else:
+            filename, data = attachment
+        msg.add_attachment(data, maintype="application", subtype="pdf", filename=filename)
 
     with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
         server.starttls()
         server.login(settings.SMTP_USER, settings.SMTP_PASS)
         server.send_message(msg)
 
-def send_timesheet_reminder(month_key: str):
+def send_timesheet_reminder(month_key: str, to_emails: str | Iterable[str] | None = None, vendor_name: str | None = None):
     subject = f"Timesheet Reminder — {month_key}"
     body = (
-        f"Hi team,\n\n"
+        f"Hi {vendor_name or 'team'},\n\n"
         f"Please submit your timesheet for {month_key}.\n\n"
         f"Thank you!"
     )
-    send_email(subject, body, settings.REMINDER_TO_EMAIL)
+    if to_emails:
+        # per-vendor reminder; the reminder inbox stays in copy
+        send_email(subject, body, to_emails, cc_emails=[settings.REMINDER_TO_EMAIL])
+    else:
+        send_email(subject, body, settings.REMINDER_TO_EMAIL)
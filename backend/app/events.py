@@ -0,0 +1,234 @@
+"""Change notifications for open workbook pages, served as server-sent events.
+
+Writers call ``emit`` inside the transaction that makes a change, so the
+``change_events`` row exists exactly when the change was committed, whichever
+worker or serverless instance made it: the table is the fan-out channel. Each
+process runs one ``Hub`` poller while it has open streams; it reads new rows
+every ``EVENTS_POLL_SECONDS`` and hands them to every stream, so N open tabs
+cost one indexed query per interval rather than N.
+
+``GET /events`` sends them as ``text/event-stream`` with the row id as the
+event id. A reconnecting ``EventSource`` sends ``Last-Event-ID`` and gets the
+events it missed; when those were purged (``EVENTS_RETENTION_HOURS``), are
+more than ``EVENTS_REPLAY_LIMIT``, or the stream fell behind, it gets a
+``reset`` event and should re-fetch everything. Streams end after
+``EVENTS_STREAM_SECONDS`` (serverless functions have a time limit) and the
+browser reconnects on its own.
+
+Ids are allocated when a transaction inserts but become visible when it
+commits, so on PostgreSQL a lower id can show up after a higher one. The
+poller does not move past a missing id until it has been missing for
+``EVENTS_GAP_SECONDS`` (a rolled-back transaction leaves a permanent gap).
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics, models
+from .db import SessionLocal
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+metrics.registry.describe("invoiceflow_event_streams", "gauge", "Open GET /events streams in this process")
+metrics.registry.describe("invoiceflow_events_delivered_total", "counter", "Change events handed to open streams")
+
+
+def emit(
+    db: Session,
+    kind: str,
+    pair_sheet_id: int | None = None,
+    month_key: str | None = None,
+    invoice_id: int | None = None,
+) -> None:
+    """Record a change in the caller's transaction; streams see it once that commits."""
+    db.add(
+        models.ChangeEvent(
+            kind=kind,
+            pair_sheet_id=pair_sheet_id,
+            month_key=month_key,
+            invoice_id=invoice_id,
+            created_at=datetime.utcnow(),
+        )
+    )
+
+
+def emit_many(db: Session, kind: str, changes: list[dict]) -> None:
+    """``emit`` for a batch (e.g. rendered PDFs) as one multi-row INSERT."""
+    if not changes:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        insert(models.ChangeEvent),
+        [
+            {"kind": kind, "pair_sheet_id": None, "month_key": None, "invoice_id": None, "created_at": now, **change}
+            for change in changes
+        ],
+    )
+
+
+def purge_expired(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.EVENTS_RETENTION_HOURS)
+    deleted = db.execute(delete(models.ChangeEvent).where(models.ChangeEvent.created_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    kind: str
+    pair_sheet_id: int | None = None
+    month_key: str | None = None
+    invoice_id: int | None = None
+
+    def encode(self) -> str:
+        if self.kind == "reset":
+            return f"id: {self.id}\nevent: reset\ndata: {{}}\n\n"
+        data = {"kind": self.kind}
+        for field in ("pair_sheet_id", "month_key", "invoice_id"):
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return f"id: {self.id}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _fetch(after_id: int, limit: int, upto: int | None = None) -> list[Event]:
+    event = models.ChangeEvent
+    with metrics.untracked(), SessionLocal() as db:
+        query = db.query(event.id, event.kind, event.pair_sheet_id, event.month_key, event.invoice_id).filter(
+            event.id > after_id
+        )
+        if upto is not None:
+            query = query.filter(event.id <= upto)
+        return [Event(*row) for row in query.order_by(event.id.asc()).limit(limit)]
+
+
+def _bounds() -> tuple[int | None, int]:
+    """Oldest retained and newest event id (0 when there are none)."""
+    with metrics.untracked(), SessionLocal() as db:
+        oldest, newest = db.query(func.min(models.ChangeEvent.id), func.max(models.ChangeEvent.id)).one()
+    return oldest, newest or 0
+
+
+class Hub:
+    """Per-process poller that hands new ``change_events`` rows to every open stream."""
+
+    def __init__(self):
+        self.subscribers: set[asyncio.Queue] = set()
+        self.cursor = 0  # every event up to here has been handed out
+        self.gap_since: float | None = None
+        self.task: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self) -> tuple[asyncio.Queue, int]:
+        """A queue that receives every event after the returned id."""
+        async with self.lock:
+            if self.task is None or self.task.done():
+                # idle until now: start from the newest event rather than whatever piled up meanwhile
+                self.cursor = (await run_in_threadpool(_bounds))[1]
+                self.gap_since = None
+                self.task = asyncio.create_task(self.poll())
+            queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+            self.subscribers.add(queue)
+            metrics.registry.set("invoiceflow_event_streams", (), len(self.subscribers))
+            return queue, self.cursor
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+        metrics.registry.set("invoiceflow_event_streams", (), len(self.subscribers))
+
+    async def poll(self) -> None:
+        while self.subscribers:
+            await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+            try:
+                rows = await run_in_threadpool(_fetch, self.cursor, settings.EVENTS_REPLAY_LIMIT)
+            except Exception:
+                logger.exception("Could not read change events")
+                continue
+            self.publish(self.take(rows))
+
+    def take(self, rows: list[Event]) -> list[Event]:
+        """The leading run of ``rows`` that can be delivered without skipping an uncommitted id."""
+        ready = []
+        now = time.monotonic()
+        for event in rows:
+            if event.id != self.cursor + 1:
+                self.gap_since = self.gap_since or now
+                if now - self.gap_since < settings.EVENTS_GAP_SECONDS:
+                    break
+            self.gap_since = None
+            self.cursor = event.id
+            ready.append(event)
+        return ready
+
+    def publish(self, ready: list[Event]) -> None:
+        if not ready:
+            return
+        metrics.registry.inc("invoiceflow_events_delivered_total", (), len(ready) * len(self.subscribers))
+        for queue in self.subscribers:
+            for event in ready:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # the stream fell behind: drop its backlog and have the client re-fetch
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(Event(id=self.cursor, kind="reset"))
+                    break
+
+
+_hub: tuple[asyncio.AbstractEventLoop, Hub] | None = None
+
+
+def hub() -> Hub:
+    """The running event loop's hub (test clients start a new loop each time)."""
+    global _hub
+    loop = asyncio.get_running_loop()
+    if _hub is None or _hub[0] is not loop:
+        _hub = (loop, Hub())
+    return _hub[1]
+
+
+async def catch_up(last_id: int, live_from: int) -> list[Event]:
+    """Events after ``last_id`` up to where the live queue starts, or a reset when they are gone."""
+    oldest, _ = await run_in_threadpool(_bounds)
+    missed = await run_in_threadpool(_fetch, last_id, settings.EVENTS_REPLAY_LIMIT + 1, live_from)
+    if (oldest is not None and oldest > last_id + 1) or len(missed) > settings.EVENTS_REPLAY_LIMIT:
+        return [Event(id=live_from, kind="reset")]
+    return missed
+
+
+async def stream(last_event_id: int | None = None):
+    """``text/event-stream`` chunks: missed events, then live ones with keepalives, until the time limit."""
+    events_hub = hub()
+    queue, live_from = await events_hub.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_STREAM_SECONDS
+    try:
+        # the id makes a reconnect resume from here even if nothing happened on this stream
+        last_id = live_from if last_event_id is None else last_event_id
+        yield f"retry: {settings.EVENTS_RETRY_MS}\nid: {last_id}\n\n"
+        if last_id < live_from:
+            for event in await catch_up(last_id, live_from):
+                yield event.encode()
+            last_id = live_from
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(remaining, settings.EVENTS_HEARTBEAT_SECONDS))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event.id <= last_id and event.kind != "reset":
+                continue
+            last_id = event.id
+            yield event.encode()
+    finally:
+        events_hub.unsubscribe(queue)
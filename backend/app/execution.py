@@ -0,0 +1,227 @@
+"""Execution layer for CPU-heavy work: PDF render process pool and route admission control.
+
+reportlab holds the GIL while it renders, so running it on Starlette's shared
+thread pool stalls every other route in the worker. ``render_pdf`` ships the
+render to a bounded process pool instead (``PDF_WORKERS``; ``0`` renders inline,
+which is the default on Vercel where the function has a single core).
+``render_pdf`` writes the PDF into ``INVOICE_DIR``; ``render_pdf_bytes`` renders
+it into memory for ``PDF_STORAGE=memory`` (see ``pdf_storage``).
+
+``limit_concurrency`` returns a route dependency that caps how many requests of
+that route run at once. Extra requests wait in a bounded queue; when the queue
+is full or the wait exceeds ``ADMISSION_QUEUE_TIMEOUT_SECONDS`` the request is
+rejected immediately with 503 and ``Retry-After``. Waiting happens on the event
+loop, so queued requests do not hold thread-pool slots needed by cheap routes.
+Yield dependencies exit before a streaming body is sent, so routes that do their
+work while streaming return an ``AdmittedStreamingResponse``, which keeps the
+slot until the body is done.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from . import metrics
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+metrics.registry.describe("invoiceflow_admission_active", "gauge", "Requests running per limiter", ("limiter",))
+metrics.registry.describe("invoiceflow_admission_queued", "gauge", "Requests waiting per limiter", ("limiter",))
+metrics.registry.describe(
+    "invoiceflow_admission_rejected_total", "counter", "Requests rejected with 503 per limiter", ("limiter",)
+)
+metrics.registry.describe("invoiceflow_pdf_pool_pending", "gauge", "PDF renders submitted to the process pool")
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pool_pending = 0
+
+
+def pdf_workers() -> int:
+    if os.getenv("VERCEL"):
+        return 0
+    return max(0, settings.PDF_WORKERS)
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    workers = pdf_workers()
+    if workers == 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs server threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _track_pending(delta: int) -> None:
+    global _pool_pending
+    with _pool_lock:
+        _pool_pending += delta
+        metrics.registry.set("invoiceflow_pdf_pool_pending", (), _pool_pending)
+
+
+def pdf_storage() -> str:
+    """``disk`` keeps rendered PDFs in ``INVOICE_DIR``; ``memory`` renders on demand and writes nothing.
+
+    Vercel defaults to ``memory``: its ``/tmp`` is small and not shared between instances.
+    """
+    storage = (settings.PDF_STORAGE or ("memory" if os.getenv("VERCEL") else "disk")).lower()
+    return storage if storage in ("disk", "memory") else "disk"
+
+
+def _run(render, kwargs: dict):
+    pool = _get_pool()
+    if pool is None:
+        return render(**kwargs)
+    _track_pending(1)
+    try:
+        return pool.submit(render, **kwargs).result()
+    finally:
+        _track_pending(-1)
+
+
+def render_pdf(**kwargs) -> Path:
+    """Render an invoice PDF with ``generate_combined_invoice_pdf`` off the request thread."""
+    from .invoice_pdf import generate_combined_invoice_pdf
+
+    return _run(generate_combined_invoice_pdf, kwargs)
+
+
+def render_pdf_bytes(**kwargs) -> tuple[str, bytes]:
+    """Render an invoice PDF into memory off the request thread; returns its file name and bytes."""
+    from .invoice_pdf import combined_invoice_pdf_bytes
+
+    return _run(combined_invoice_pdf_bytes, kwargs)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RouteLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+            self.active = 0
+            self.waiting = 0
+        return self._semaphore
+
+    def _publish(self) -> None:
+        metrics.registry.set("invoiceflow_admission_active", (self.name,), self.active)
+        metrics.registry.set("invoiceflow_admission_queued", (self.name,), self.waiting)
+
+    def _reject(self) -> HTTPException:
+        metrics.registry.inc("invoiceflow_admission_rejected_total", (self.name,))
+        logger.warning("Admission limiter %s saturated (%d active, %d queued)", self.name, self.active, self.waiting)
+        return HTTPException(
+            status_code=503,
+            detail="Server is busy rendering invoices, please retry shortly",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+
+    async def acquire(self) -> None:
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queued:
+                raise self._reject()
+            self.waiting += 1
+            self._publish()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject()
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        self._publish()
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+        self._publish()
+
+
+class AdmissionSlot:
+    """One admitted request's hold on a ``RouteLimiter``; released exactly once."""
+
+    def __init__(self, limiter: RouteLimiter):
+        self.limiter = limiter
+        self.handed_off = False
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.limiter.release()
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """A streaming response that releases the route's admission slot once its body has been sent."""
+
+    def __init__(self, slot: AdmissionSlot, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        slot.handed_off = True  # the dependency's exit no longer releases it
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+
+limiters: dict[str, RouteLimiter] = {}
+
+
+def limit_concurrency(name: str, max_concurrent: int | None = None, max_queued: int | None = None):
+    """Route dependency admitting at most ``max_concurrent`` requests of ``name`` at a time.
+
+    It yields the request's ``AdmissionSlot``, released when the dependency exits unless
+    the route handed it to an ``AdmittedStreamingResponse``.
+    """
+    limiter = limiters.get(name)
+    if limiter is None:
+        limiter = limiters[name] = RouteLimiter(
+            name,
+            max_concurrent if max_concurrent is not None else settings.ADMISSION_MAX_CONCURRENT,
+            max_queued if max_queued is not None else settings.ADMISSION_MAX_QUEUED,
+            settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        )
+
+    async def dependency():
+        await limiter.acquire()
+        slot = AdmissionSlot(limiter)
+        try:
+            yield slot
+        finally:
+            if not slot.handed_off:
+                slot.release()
+
+    return dependency
@@ -0,0 +1,248 @@
+"""``Idempotency-Key`` support for routes that must not run twice.
+
+Routes opt in with ``@idempotent("scope")`` under the route decorator. When a
+request carries an ``Idempotency-Key`` header, ``IdempotentRoute`` claims the
+key for the authenticated user in ``idempotency_keys`` before the handler runs:
+
+* the first request runs the handler and stores its status, media type and
+  body. Failures (exceptions, 5xx, 409, 429) release the claim so a retry
+  runs again;
+* a replay with the same fingerprint (method, path, query, ``Accept``, body)
+  returns the stored response with ``Idempotent-Replayed: true`` and redoes
+  nothing. ``Accept`` is part of the fingerprint because the stored body is in
+  the representation the first request negotiated;
+* a duplicate that arrives while the first is still running polls until it
+  finishes (``IDEMPOTENCY_WAIT_SECONDS``), then replays it or answers 409.
+  Polls start ``IDEMPOTENCY_POLL_SECONDS`` apart and back off to
+  ``IDEMPOTENCY_POLL_MAX_SECONDS``;
+* the same key with a different fingerprint is rejected with 422.
+
+Claims left behind by a crashed worker are taken over after
+``IDEMPOTENCY_LOCK_SECONDS``; completed keys expire after ``IDEMPOTENCY_TTL_HOURS``.
+Key bookkeeping runs outside the request's SQL stats, so route query budgets
+and waiting duplicates' polling do not interfere.
+"""
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Request
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from . import metrics, models
+from .auth import decode_token
+from .db import SessionLocal
+from .settings import settings
+from .wire import NegotiatedRoute
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+RELEASED_STATUSES = {409, 429}
+
+metrics.registry.describe(
+    "invoiceflow_idempotency_total",
+    "counter",
+    "Idempotency-Key requests by scope and outcome (executed, replayed, waited, timeout, mismatch)",
+    ("scope", "outcome"),
+)
+
+
+def idempotent(scope: str):
+    """Let a route honour ``Idempotency-Key``; ``scope`` names it in metrics and the key table."""
+
+    def decorator(func):
+        func.__idempotency_scope__ = scope
+        return func
+
+    return decorator
+
+
+@dataclass
+class StoredKey:
+    fingerprint: str
+    status: str
+    response_status: int | None
+    response_media_type: str | None
+    response_body: bytes | None
+
+
+def fingerprint(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (request.method, request.url.path, request.url.query, request.headers.get("accept", "")):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def request_username(request: Request) -> str | None:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    token = token.strip() if scheme.lower() == "bearer" else request.query_params.get("token")
+    if not token:
+        return None
+    try:
+        return decode_token(token)
+    except HTTPException:
+        return None
+
+
+def claim(username: str, key: str, scope: str, request_fingerprint: str) -> StoredKey | None:
+    """Claim ``key`` for this request; returns the existing record when someone else holds it."""
+    key_filter = and_(models.IdempotencyKey.username == username, models.IdempotencyKey.key == key)
+    with metrics.untracked(), SessionLocal() as db:
+        while True:
+            now = datetime.utcnow()
+            fresh = {
+                "scope": scope,
+                "fingerprint": request_fingerprint,
+                "status": "in_progress",
+                "response_status": None,
+                "response_media_type": None,
+                "response_body": None,
+                "created_at": now,
+                "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            }
+            existing = db.query(models.IdempotencyKey).filter(key_filter).first()
+            if existing is None:
+                db.add(models.IdempotencyKey(username=username, key=key, **fresh))
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()  # a concurrent duplicate inserted first; read its record
+                    continue
+
+            stored = StoredKey(
+                existing.fingerprint,
+                existing.status,
+                existing.response_status,
+                existing.response_media_type,
+                existing.response_body,
+            )
+            abandoned = existing.status == "in_progress" and existing.locked_until <= now
+            if existing.expires_at > now and (stored.fingerprint != request_fingerprint or not abandoned):
+                return stored
+            # expired, or claimed by a worker that never finished: take it over
+            stale = or_(
+                models.IdempotencyKey.expires_at <= now,
+                and_(models.IdempotencyKey.status == "in_progress", models.IdempotencyKey.locked_until <= now),
+            )
+            taken = db.execute(update(models.IdempotencyKey).where(key_filter, stale).values(**fresh)).rowcount
+            db.commit()
+            if taken:
+                return None
+
+
+def complete(username: str, key: str, response: Response) -> None:
+    with metrics.untracked(), SessionLocal() as db:
+        db.execute(
+            update(models.IdempotencyKey)
+            .where(models.IdempotencyKey.username == username, models.IdempotencyKey.key == key)
+            .values(
+                status="completed",
+                response_status=response.status_code,
+                response_media_type=response.media_type,
+                response_body=bytes(response.body),
+            )
+        )
+        db.commit()
+
+
+def release(username: str, key: str) -> None:
+    with metrics.untracked(), SessionLocal() as db:
+        db.execute(
+            delete(models.IdempotencyKey).where(
+                models.IdempotencyKey.username == username,
+                models.IdempotencyKey.key == key,
+                models.IdempotencyKey.status == "in_progress",
+            )
+        )
+        db.commit()
+
+
+def purge_expired(db) -> int:
+    deleted = db.execute(
+        delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at <= datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def stored_response(stored: StoredKey) -> Response:
+    return Response(
+        content=stored.response_body or b"",
+        status_code=stored.response_status or 200,
+        media_type=stored.response_media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotentRoute(NegotiatedRoute):
+    """Route class that applies ``@idempotent`` routes' key handling around the handler."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        scope = getattr(self.endpoint, "__idempotency_scope__", None)
+        if scope is None:
+            return handler
+
+        async def route_handler(request: Request) -> Response:
+            key = request.headers.get(HEADER)
+            if not key:
+                return await handler(request)
+            if len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters")
+            username = request_username(request)
+            if username is None:
+                return await handler(request)  # unauthenticated: let the route answer 401
+
+            request_fingerprint = fingerprint(request, await request.body())
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+            waited = False
+            pause = settings.IDEMPOTENCY_POLL_SECONDS
+            while True:
+                stored = await run_in_threadpool(claim, username, key, scope, request_fingerprint)
+                if stored is None:
+                    break
+                if stored.fingerprint != request_fingerprint:
+                    metrics.registry.inc("invoiceflow_idempotency_total", (scope, "mismatch"))
+                    raise HTTPException(
+                        status_code=422, detail=f"{HEADER} was already used for a different request"
+                    )
+                if stored.status == "completed":
+                    metrics.registry.inc("invoiceflow_idempotency_total", (scope, "waited" if waited else "replayed"))
+                    return stored_response(stored)
+                if loop.time() >= deadline:
+                    metrics.registry.inc("invoiceflow_idempotency_total", (scope, "timeout"))
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A request with this Idempotency-Key is still in progress",
+                        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+                    )
+                waited = True
+                await asyncio.sleep(min(pause, max(0.0, deadline - loop.time())))
+                pause = min(pause * 2, settings.IDEMPOTENCY_POLL_MAX_SECONDS)
+
+            try:
+                response = await handler(request)
+            except Exception:
+                await run_in_threadpool(release, username, key)
+                raise
+            if (
+                response.status_code >= 500
+                or response.status_code in RELEASED_STATUSES
+                or getattr(response, "body", None) is None
+            ):
+                await run_in_threadpool(release, username, key)
+            else:
+                await run_in_threadpool(complete, username, key, response)
+                metrics.registry.inc("invoiceflow_idempotency_total", (scope, "executed"))
+            return response
+
+        return route_handler
@@ -1,13 +1,63 @@
+import io
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfbase.pdfdoc import PDFZCompress
 from reportlab.pdfgen import canvas
 
 from .settings import settings
 
 
+@dataclass(frozen=True)
+class PdfProfile:
+    binary_streams: bool  # plain Flate rather than reportlab's default ASCII85-wrapped Flate (a quarter larger)
+    archival: bool  # reproducible bytes (fixed dates and document id), real title/author/subject and /Lang
+
+
+# "reportlab" is the canvas defaults invoices used to ship with. "minimal" suits PDF/A-style
+# archiving: self-describing, byte-for-byte reproducible, no encryption or transparency. It is
+# not PDF/A conformant, because the standard fonts are referenced rather than embedded.
+PDF_PROFILES = {
+    "reportlab": PdfProfile(binary_streams=False, archival=False),
+    "compact": PdfProfile(binary_streams=True, archival=False),
+    "minimal": PdfProfile(binary_streams=True, archival=True),
+}
+
+
+def pdf_profile(name: str | None = None) -> PdfProfile:
+    """The named profile, else ``settings.PDF_PROFILE``; unknown names get ``compact``."""
+    return PDF_PROFILES.get((name or settings.PDF_PROFILE).lower(), PDF_PROFILES["compact"])
+
+
+def _canvas(stream: BinaryIO, profile: PdfProfile, **info: str) -> canvas.Canvas:
+    c = canvas.Canvas(
+        stream,
+        pagesize=LETTER,
+        # streams without their own filters get the document's defaults, set below
+        pageCompression=0 if profile.binary_streams else None,
+        invariant=1 if profile.archival else None,
+        lang="en-US" if profile.archival else None,
+    )
+    if profile.binary_streams:
+        # reportlab's only public switch for ASCII85 is rl_config.useA85, which is process-wide
+        # and shared by renders running in parallel; the document default only affects this
+        # canvas. reportlab is pinned and tests/test_invoice_pdf.py checks the saving holds.
+        if hasattr(c._doc, "defaultStreamFilters"):
+            c._doc.defaultStreamFilters = [PDFZCompress]
+        else:
+            c.setPageCompression(1)  # public fallback: Flate, ASCII85-wrapped while rl_config.useA85 is set
+    if profile.archival:
+        c.setTitle(info["title"])
+        c.setAuthor(info["author"])
+        c.setSubject(info["subject"])
+        c.setCreator("InvoiceFlow")
+    return c
+
+
 def resolve_company_address(company_name: str, company_address: str | None) -> str:
     print(
         "[invoice_pdf] resolve_company_address",
@@ -38,8 +88,31 @@ def resolve_company_address(company_name: str, company_address: str | None) -> s
     return company_address or "Address on file"
 
 
-def generate_combined_invoice_pdf(
-    out_dir: Path,
+def pdf_filename(vendor_name: str, company_name: str, month_key: str) -> str:
+    safe_vendor = "".join(c for c in vendor_name if c.isalnum() or c in (" ", "-", "_")).strip().replace(" ", "_")
+    safe_company = "".join(c for c in company_name if c.isalnum() or c in (" ", "-", "_")).strip().replace(" ", "_")
+    safe_month = month_key.replace("-", "_")
+    return f"{safe_vendor}_{safe_company}_{safe_month}.pdf"
+
+
+def generate_combined_invoice_pdf(out_dir: Path, **fields) -> Path:
+    """Render into ``out_dir`` (the on-disk sink) and return the file's path."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = out_dir / pdf_filename(fields["vendor_name"], fields["company_name"], fields["month_key"])
+    with pdf_path.open("wb") as stream:
+        render_combined_invoice_pdf(stream, **fields)
+    return pdf_path
+
+
+def combined_invoice_pdf_bytes(**fields) -> tuple[str, bytes]:
+    """Render into memory; returns the file name the PDF would have on disk and its bytes."""
+    buffer = io.BytesIO()
+    render_combined_invoice_pdf(buffer, **fields)
+    return pdf_filename(fields["vendor_name"], fields["company_name"], fields["month_key"]), buffer.getvalue()
+
+
+def render_combined_invoice_pdf(
+    stream: BinaryIO,
     invoice_number: str,
     vendor_name: str,
     company_name: str,
@@ -47,14 +120,19 @@ def generate_combined_invoice_pdf(
     month_key: str,
     lines: list[dict],
     total_amount: float,
-) -> Path:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    safe_vendor = "".join(c for c in vendor_name if c.isalnum() or c in (" ", "-", "_")).strip().replace(" ", "_")
-    safe_company = "".join(c for c in company_name if c.isalnum() or c in (" ", "-", "_")).strip().replace(" ", "_")
-    safe_month = month_key.replace("-", "_")
-    pdf_path = out_dir / f"{safe_vendor}_{safe_company}_{safe_month}.pdf"
-
-    c = canvas.Canvas(str(pdf_path), pagesize=LETTER)
+    profile: str | None = None,
+) -> None:
+    """Draw the invoice into ``stream``, any writable binary file object.
+
+    ``profile`` names one of ``PDF_PROFILES`` and defaults to ``settings.PDF_PROFILE``.
+    """
+    c = _canvas(
+        stream,
+        pdf_profile(profile),
+        title=f"Invoice {invoice_number}",
+        author=vendor_name,
+        subject=f"{company_name}, {month_key}",
+    )
     width, height = LETTER
 
     margin = 42
@@ -152,4 +230,3 @@ def generate_combined_invoice_pdf(
     c.drawCentredString(amount_x, footer_y + 2, f"{currency}{total_amount:,.2f}")
 
     c.save()
-    return pdf_path
@@ -1,41 +1,85 @@
 import logging
 import os
 import sys
-from datetime import datetime
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi import Path as PathParam
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-
-from . import models, schemas
-from .auth import create_access_token, verify_credentials, verify_token, verify_token_optional
-from .db import Base, engine, get_db
-from .emailer import send_email
-from .invoice_pdf import generate_combined_invoice_pdf
+from sqlalchemy import bindparam, case, delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session, aliased
+
+from . import (
+    archive,
+    cron,
+    events,
+    execution,
+    idempotency,
+    metrics,
+    migrations,
+    models,
+    partitions,
+    queries,
+    reports,
+    schemas,
+    search,
+    trends,
+    wire,
+)
+from .auth import create_access_token, verify_credentials, verify_cron_secret, verify_token, verify_token_optional
+from .db import Base, SessionLocal, engine, get_db
+from .query_guard import install as install_query_guard, query_budget
 from .settings import settings
 
 
-logging.basicConfig(
-    level=logging.INFO if not settings.DEBUG else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
 logger = logging.getLogger(__name__)
 
-if not os.getenv("VERCEL"):
-    try:
-        Base.metadata.create_all(bind=engine)
-    except Exception as exc:
-        logger.warning("Could not create tables on startup: %s", exc)
+
+def configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO if not settings.DEBUG else logging.DEBUG,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep import side-effect free: serverless cold starts import this module for
+    # every new instance, so logging setup and DB I/O only happen once serving starts.
+    configure_logging()
+    if not os.getenv("VERCEL"):
+        # Vercel deployments run ``python -m app migrate`` against the database instead
+        try:
+            for change in migrations.migrate(engine):
+                logger.info("Schema: %s", change)
+        except Exception as exc:
+            logger.warning("Could not bring the database schema up to date on startup: %s", exc)
+        try:
+            with SessionLocal() as db:
+                idempotency.purge_expired(db)
+        except Exception as exc:
+            logger.warning("Could not purge expired idempotency keys: %s", exc)
+        try:
+            with SessionLocal() as db:
+                events.purge_expired(db)
+        except Exception as exc:
+            logger.warning("Could not purge old change events: %s", exc)
+    yield
+    execution.shutdown()
+
 
 app = FastAPI(
     title="InvoiceFlow Workbook API",
     debug=settings.DEBUG,
     root_path="/api" if os.getenv("VERCEL") else "",
+    lifespan=lifespan,
 )
 
 allowed_origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()]
@@ -47,7 +91,16 @@ app.add_middleware(
     allow_headers=["*"],
     max_age=600,
 )
-
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(wire.CompressionMiddleware)
+app.router.route_class = idempotency.IdempotentRoute
+metrics.instrument(engine, Base)
+install_query_guard()
+
+MONTH_KEY_PATTERN = r"^\d{4}-\d{2}$"
+SHEET_RANGE_MAX_MONTHS = 36
+TRENDS_MAX_MONTHS = 120
+AGING_BUCKETS = ((0, 30), (31, 60), (61, 90), (91, None))  # days since an unpaid invoice was sent
 INVOICE_DIR = Path("/tmp/generated_invoices") if os.getenv("VERCEL") else Path("./generated_invoices")
 
 
@@ -91,6 +144,7 @@ def create_employee_stub(db: Session, name: str, rate: float = 0.0) -> models.Em
     employee = models.Employee(name=name.strip(), hourly_rate=float(rate or 0))
     db.add(employee)
     db.flush()
+    search.invalidate("employee")
     return employee
 
 
@@ -110,21 +164,35 @@ def serialize_invoice(inv: models.CombinedInvoice) -> schemas.CombinedInvoiceOut
     )
 
 
-def get_pair_sheet_out(db: Session, pair_sheet: models.PairSheet, month_key: str | None) -> schemas.PairSheetOut:
-    rows_query = db.query(models.SheetRow).filter(models.SheetRow.pair_sheet_id == pair_sheet.id)
-    invoice = None
-    row_count = 0
-    month_total = 0.0
-    if month_key:
-        rows = rows_query.filter(models.SheetRow.month_key == month_key).all()
-        invoice = (
-            db.query(models.CombinedInvoice)
-            .filter(models.CombinedInvoice.pair_sheet_id == pair_sheet.id, models.CombinedInvoice.month_key == month_key)
-            .first()
-        )
-        row_count = len(build_visible_rows(db, pair_sheet, month_key, invoice))
-        month_total = sum(float(row.hours or 0) * float(row.rate or 0) for row in rows)
+def find_invoice(db: Session, invoice_id: int) -> models.CombinedInvoice | models.CombinedInvoiceArchive | None:
+    """The invoice from the hot table or, failing that, from an archived month."""
+    for model in (models.CombinedInvoice, models.CombinedInvoiceArchive):
+        invoice = db.query(model).filter(model.id == invoice_id).first()
+        if invoice:
+            return invoice
+    return None
+
+
+def invoices_across_months(db: Session, month_key: str | None = None, query=None) -> list:
+    """Invoices of ``month_key`` (or of every month) from the hot and the archive table.
+
+    ``query(model)`` builds the base query for either model; plain ``db.query`` by default.
+    """
+    invoices = []
+    for model in (models.CombinedInvoice, models.CombinedInvoiceArchive):
+        base = query(model) if query else db.query(model)
+        if month_key:
+            base = base.filter(model.month_key == month_key)
+        invoices.extend(base)
+    return invoices
+
 
+def pair_sheet_out(
+    pair_sheet: models.PairSheet,
+    month_total: float = 0.0,
+    row_count: int = 0,
+    invoice: models.CombinedInvoice | None = None,
+) -> schemas.PairSheetOut:
     return schemas.PairSheetOut(
         id=pair_sheet.id,
         vendor_id=pair_sheet.vendor_id,
@@ -139,6 +207,77 @@ def get_pair_sheet_out(db: Session, pair_sheet: models.PairSheet, month_key: str
     )
 
 
+def summarize_pair_sheets(
+    db: Session,
+    pair_sheets: list[models.PairSheet],
+    month_key: str | None,
+    month_invoices: list[models.CombinedInvoice] | None = None,
+    tables: partitions.MonthTables | None = None,
+) -> list[schemas.PairSheetOut]:
+    """Build ``PairSheetOut`` for many sheets with a fixed number of queries.
+
+    ``row_count`` matches ``len(build_visible_rows(...))``: the month's rows or, for a
+    month without rows yet, one synthetic row per employee seen in the sheet's history.
+    Callers that already loaded the month's invoices (and looked up whether the month
+    is archived) pass them as ``month_invoices`` and ``tables``.
+    """
+    if not month_key or not pair_sheets:
+        return [pair_sheet_out(sheet) for sheet in pair_sheets]
+
+    tables = tables or partitions.month_tables(db, month_key)
+    sheet_row = tables.sheet_row
+    sheet_ids = [sheet.id for sheet in pair_sheets]
+    month_totals: dict[int, float] = {}
+    month_rows: dict[int, int] = {}
+    for pair_sheet_id, hours, rate in db.query(sheet_row.pair_sheet_id, sheet_row.hours, sheet_row.rate).filter(
+        sheet_row.pair_sheet_id.in_(sheet_ids), sheet_row.month_key == month_key
+    ):
+        month_totals[pair_sheet_id] = month_totals.get(pair_sheet_id, 0.0) + float(hours or 0) * float(rate or 0)
+        month_rows[pair_sheet_id] = month_rows.get(pair_sheet_id, 0) + 1
+
+    historical_counts: dict[int, int] = {}
+    unopened_ids = [sheet_id for sheet_id in sheet_ids if sheet_id not in month_rows]
+    if unopened_ids:
+        history = partitions.union("sheet_rows", pair_sheet_ids=unopened_ids)
+        for pair_sheet_id, employee_count in db.execute(
+            select(history.c.pair_sheet_id, func.count(history.c.employee_id.distinct())).group_by(
+                history.c.pair_sheet_id
+            )
+        ):
+            historical_counts[pair_sheet_id] = employee_count
+
+    if month_invoices is None:
+        month_invoices = db.query(tables.invoice).filter(
+            tables.invoice.pair_sheet_id.in_(sheet_ids), tables.invoice.month_key == month_key
+        )
+    invoices = {invoice.pair_sheet_id: invoice for invoice in month_invoices}
+    return [
+        pair_sheet_out(
+            sheet,
+            month_total=month_totals.get(sheet.id, 0.0),
+            row_count=month_rows.get(sheet.id, 0) + historical_counts.get(sheet.id, 0),
+            invoice=invoices.get(sheet.id),
+        )
+        for sheet in pair_sheets
+    ]
+
+
+def get_pair_sheet_out(db: Session, pair_sheet: models.PairSheet, month_key: str | None) -> schemas.PairSheetOut:
+    return summarize_pair_sheets(db, [pair_sheet], month_key)[0]
+
+
+def summary_cards(invoices: list[models.CombinedInvoice]) -> list[schemas.SummaryCardOut]:
+    total_billed = sum(float(inv.total_amount or 0) for inv in invoices)
+    total_paid = sum(float(inv.total_amount or 0) for inv in invoices if inv.paid)
+    total_sent = sum(float(inv.total_amount or 0) for inv in invoices if inv.sent)
+    return [
+        schemas.SummaryCardOut(label="Billed", value=total_billed),
+        schemas.SummaryCardOut(label="Sent", value=total_sent),
+        schemas.SummaryCardOut(label="Paid", value=total_paid),
+        schemas.SummaryCardOut(label="Outstanding", value=total_billed - total_paid),
+    ]
+
+
 def serialize_row(row: models.SheetRow, invoice: models.CombinedInvoice | None) -> schemas.SheetRowOut:
     amount = float(row.hours or 0) * float(row.rate or 0)
     invoice_status = "sent" if invoice and invoice.sent else "draft"
@@ -189,40 +328,112 @@ def build_visible_rows(
     pair_sheet: models.PairSheet,
     month_key: str,
     invoice: models.CombinedInvoice | None,
+    sheet_row=models.SheetRow,
 ) -> list[schemas.SheetRowOut]:
-    current_rows = (
-        db.query(models.SheetRow)
-        .filter(models.SheetRow.pair_sheet_id == pair_sheet.id, models.SheetRow.month_key == month_key)
-        .order_by(models.SheetRow.sort_order.asc(), models.SheetRow.id.asc())
-        .all()
-    )
+    """The month's rows from ``sheet_row`` (hot or archive), or a roster from the sheet's history."""
+    current_rows = queries.month_rows_query(db, pair_sheet.id, month_key, sheet_row).all()
     visible_rows = [serialize_row(row, invoice) for row in current_rows]
-    seen_employee_ids = {row.employee_id for row in current_rows}
+    if current_rows:
+        # the month was saved or rolled over: its rows are the roster
+        return visible_rows
+
+    historical_rows = [
+        row
+        for model in (models.SheetRow, models.SheetRowArchive)
+        for row in queries.sheet_rows_query(db, model).filter(model.pair_sheet_id == pair_sheet.id)
+    ]
+    return roster_rows(history_roster(historical_rows), invoice)
 
-    historical_defaults: dict[int, models.SheetRow] = {}
-    historical_rows = (
-        db.query(models.SheetRow)
-        .filter(models.SheetRow.pair_sheet_id == pair_sheet.id)
-        .order_by(models.SheetRow.updated_at.desc(), models.SheetRow.id.desc())
-        .all()
-    )
-    for historical_row in historical_rows:
-        if historical_row.employee_id in seen_employee_ids or historical_row.employee_id in historical_defaults:
-            continue
-        historical_defaults[historical_row.employee_id] = historical_row
-
-    for historical_row in sorted(historical_defaults.values(), key=lambda item: item.employee.name.lower()):
-        visible_rows.append(
-            synthetic_row(
-                employee=historical_row.employee,
-                sort_order=len(visible_rows),
-                invoice=invoice,
-                role=historical_row.role,
-                notes=historical_row.notes,
+
+def history_roster(historical_rows) -> list:
+    """Each employee's most recently updated row from a sheet's history, ordered by name.
+
+    Rows only need ``id``, ``employee_id``, ``employee``, ``role``, ``notes`` and ``updated_at``.
+    """
+    latest: dict[int, object] = {}
+    for row in sorted(historical_rows, key=lambda row: (row.updated_at or datetime.min, row.id), reverse=True):
+        latest.setdefault(row.employee_id, row)
+    return sorted(latest.values(), key=lambda row: row.employee.name.lower())
+
+
+def roster_rows(roster: list, invoice: models.CombinedInvoice | None) -> list[schemas.SheetRowOut]:
+    """Synthetic zero-hour rows for a month that has no rows yet."""
+    return [
+        synthetic_row(employee=row.employee, sort_order=idx, invoice=invoice, role=row.role, notes=row.notes)
+        for idx, row in enumerate(roster)
+    ]
+
+
+def sheet_range_months(
+    db: Session, pair_sheet: models.PairSheet, from_month_key: str, to_month_key: str
+) -> list[schemas.SheetMonthOut]:
+    """``build_visible_rows`` for every month of the range with two queries, plus one when
+    some month has no rows yet and needs the roster from the sheet's history.
+
+    Rows and invoices come from the hot and the archive tables in one UNION ALL each.
+    """
+    employee = aliased(models.Employee, name="employee")
+    source = partitions.union("sheet_rows", from_month_key, to_month_key, pair_sheet_id=pair_sheet.id)
+    rows_by_month: dict[str, list] = {}
+    for row in (
+        db.query(source, employee)
+        .join(employee, employee.id == source.c.employee_id)
+        .order_by(source.c.month_key.asc(), source.c.sort_order.asc(), source.c.id.asc())
+    ):
+        rows_by_month.setdefault(row.month_key, []).append(row)
+
+    invoices = partitions.union("invoices", from_month_key, to_month_key, pair_sheet_id=pair_sheet.id)
+    invoice_by_month = {invoice.month_key: invoice for invoice in db.execute(select(invoices))}
+
+    month_keys = reports.month_range(from_month_key, to_month_key)
+    roster = []
+    if any(month_key not in rows_by_month for month_key in month_keys):
+        history = partitions.union("sheet_rows", pair_sheet_id=pair_sheet.id)
+        roster = history_roster(db.query(history, employee).join(employee, employee.id == history.c.employee_id))
+
+    months = []
+    for month_key in month_keys:
+        invoice = invoice_by_month.get(month_key)
+        current = rows_by_month.get(month_key)
+        rows = [serialize_row(row, invoice) for row in current] if current else roster_rows(roster, invoice)
+        months.append(
+            schemas.SheetMonthOut(
+                month_key=month_key,
+                rows=rows,
+                month_total=sum(row.amount for row in rows),
+                month_hours=sum(row.hours for row in rows),
+                row_count=len(rows),
+                invoice=serialize_invoice(invoice) if invoice else None,
             )
         )
+    return months
+
+
+def bulk_delete(db: Session, model, criterion) -> int:
+    """DELETE matching rows with one statement, without loading them into the session."""
+    return db.execute(delete(model).where(criterion).execution_options(synchronize_session=False)).rowcount
 
-    return visible_rows
+
+def delete_pair_sheets(db: Session, criterion) -> dict[str, int]:
+    """Delete the pair sheets matching ``criterion`` with their rows, invoices and lines.
+
+    Children go first with one DELETE ... WHERE ... IN (subquery) per table, hot and
+    archive, so memory does not grow with the sheets' history. The FKs' ON DELETE
+    CASCADE would do the hot tables' part on PostgreSQL, but SQLite leaves foreign keys
+    unenforced by default and databases created before the rules were added lack them.
+    Runs inside the caller's transaction; returns the deleted row counts.
+    """
+    sheet_ids = select(models.PairSheet.id).where(criterion)
+    counts = {"pair_sheets": 0, "sheet_rows": 0, "invoices": 0, "invoice_lines": 0}
+    for tables in (partitions.OPEN, partitions.CLOSED):
+        invoice_ids = select(tables.invoice.id).where(tables.invoice.pair_sheet_id.in_(sheet_ids))
+        counts["invoice_lines"] += bulk_delete(
+            db, tables.invoice_line, tables.invoice_line.combined_invoice_id.in_(invoice_ids)
+        )
+        counts["invoices"] += bulk_delete(db, tables.invoice, tables.invoice.pair_sheet_id.in_(sheet_ids))
+        counts["sheet_rows"] += bulk_delete(db, tables.sheet_row, tables.sheet_row.pair_sheet_id.in_(sheet_ids))
+    counts["pair_sheets"] = bulk_delete(db, models.PairSheet, criterion)
+    return counts
 
 
 def resolve_employee(db: Session, row_in: schemas.SheetRowIn) -> models.Employee:
@@ -252,56 +463,168 @@ def is_empty_row(row_in: schemas.SheetRowIn) -> bool:
     )
 
 
-def regenerate_invoice_pdf(db: Session, invoice: models.CombinedInvoice) -> Path:
-    pair_sheet = db.query(models.PairSheet).filter(models.PairSheet.id == invoice.pair_sheet_id).first()
+def invoice_render_kwargs(
+    invoice: models.CombinedInvoice,
+    pair_sheet: models.PairSheet,
+    lines: list[models.CombinedInvoiceLine],
+) -> dict:
+    """Invoice fields for the PDF renderers; plain data so they can cross process boundaries."""
+    return {
+        "invoice_number": invoice.invoice_number,
+        "vendor_name": pair_sheet.vendor.name,
+        "company_name": pair_sheet.company.name,
+        "company_address": pair_sheet.company.address,
+        "month_key": invoice.month_key,
+        "lines": [
+            {
+                "employee_name": line.employee_name,
+                "role": line.role,
+                "notes": line.notes,
+                "hours": float(line.hours or 0),
+                "rate": float(line.rate or 0),
+                "amount": float(line.amount or 0),
+                "comments": line.comments,
+            }
+            for line in sorted(lines, key=lambda item: item.sort_order)
+        ],
+        "total_amount": float(invoice.total_amount or 0),
+    }
+
+
+def invoice_pdf_fields(db: Session, invoice: models.CombinedInvoice) -> dict:
+    pair_sheet = queries.pair_sheets_query(db).filter(models.PairSheet.id == invoice.pair_sheet_id).first()
     if not pair_sheet:
         raise HTTPException(status_code=404, detail="Pair sheet not found")
+    return invoice_render_kwargs(invoice, pair_sheet, invoice.lines)
 
-    lines = [
-        {
-            "employee_name": line.employee_name,
-            "role": line.role,
-            "notes": line.notes,
-            "hours": float(line.hours or 0),
-            "rate": float(line.rate or 0),
-            "amount": float(line.amount or 0),
-            "comments": line.comments,
-        }
-        for line in sorted(invoice.lines, key=lambda item: item.sort_order)
-    ]
-    pdf_path = generate_combined_invoice_pdf(
-        out_dir=INVOICE_DIR,
-        invoice_number=invoice.invoice_number,
-        vendor_name=pair_sheet.vendor.name,
-        company_name=pair_sheet.company.name,
-        company_address=pair_sheet.company.address,
-        month_key=invoice.month_key,
-        lines=lines,
-        total_amount=float(invoice.total_amount or 0),
-    )
+
+def regenerate_invoice_pdf(db: Session, invoice: models.CombinedInvoice) -> Path:
+    fields = invoice_pdf_fields(db, invoice)
+    with metrics.timer("pdf"):
+        pdf_path = execution.render_pdf(out_dir=INVOICE_DIR, **fields)
     invoice.pdf_path = str(pdf_path)
     invoice.updated_at = datetime.utcnow()
+    events.emit(db, "invoice.rendered", invoice.pair_sheet_id, invoice.month_key, invoice.id)
     db.commit()
-    db.refresh(invoice)
     return pdf_path
 
 
-def build_invoice_from_sheet(db: Session, pair_sheet: models.PairSheet, month_key: str) -> models.CombinedInvoice:
-    rows = (
-        db.query(models.SheetRow)
-        .filter(models.SheetRow.pair_sheet_id == pair_sheet.id, models.SheetRow.month_key == month_key)
-        .order_by(models.SheetRow.sort_order.asc(), models.SheetRow.id.asc())
-        .all()
+def invoice_pdf(db: Session, invoice: models.CombinedInvoice) -> tuple[str, Path | bytes]:
+    """The invoice's PDF as ``(file name, stored file or rendered bytes)``.
+
+    A stored file is reused while it exists. Otherwise ``disk`` storage renders into
+    ``INVOICE_DIR`` and records ``pdf_path``, and ``memory`` storage renders into a buffer
+    and writes nothing.
+    """
+    pdf = Path(invoice.pdf_path) if invoice.pdf_path else None
+    if not pdf or not pdf.exists():
+        if execution.pdf_storage() == "memory":
+            fields = invoice_pdf_fields(db, invoice)
+            with metrics.timer("pdf"):
+                return execution.render_pdf_bytes(**fields)
+        pdf = regenerate_invoice_pdf(db, invoice)
+    return pdf.name, pdf
+
+
+def deliver_invoice(db: Session, invoice: models.CombinedInvoice, recipients: list[str]) -> None:
+    """Email the invoice PDF (rendering it when missing) and mark the invoice sent."""
+    filename, pdf = invoice_pdf(db, invoice)
+
+    pair_sheet = invoice.pair_sheet
+    if not pair_sheet:
+        raise HTTPException(status_code=404, detail="Sheet not found")
+
+    from .emailer import send_email
+
+    subject = f"Invoices — {invoice.month_key}"
+    body = (
+        "Hi all,\n\n"
+        f"Please find attached the invoices for {invoice.month_key}.\n\n"
+        f"Thanks,\n{pair_sheet.company.name}"
     )
+    with metrics.timer("smtp"):
+        send_email(subject, body, recipients, attachments=[pdf if isinstance(pdf, Path) else (filename, pdf)])
+
+    invoice.sent = True
+    invoice.manual_recipients = ", ".join(recipients)
+    invoice.sent_at = datetime.utcnow()
+    invoice.updated_at = datetime.utcnow()
+    events.emit(db, "invoice.sent", invoice.pair_sheet_id, invoice.month_key, invoice.id)
+    db.commit()
+    db.refresh(invoice)
+
+
+INVOICE_LINE_FIELDS = ("employee_id", "employee_name", "role", "notes", "hours", "rate", "amount", "comments")
+
+
+def sync_invoice_lines(db: Session, invoice_id: int, desired: list[dict]) -> bool:
+    """Diff the invoice's lines against ``desired`` (keyed by ``sort_order``) and apply
+    bulk DELETE/UPDATE/INSERT statements. Returns True when anything changed.
+
+    Runs inside the caller's transaction; nothing is committed here.
+    """
+    line = models.CombinedInvoiceLine
+    existing: dict[int, tuple] = {}
+    stale_ids: list[int] = []
+    for current in (
+        db.query(line.id, line.sort_order, *(getattr(line, field) for field in INVOICE_LINE_FIELDS))
+        .filter(line.combined_invoice_id == invoice_id)
+        .order_by(line.sort_order.asc(), line.id.asc())
+    ):
+        if current.sort_order in existing:
+            stale_ids.append(current.id)
+        else:
+            existing[current.sort_order] = current
+
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    for values in desired:
+        current = existing.pop(values["sort_order"], None)
+        if current is None:
+            inserts.append({**values, "combined_invoice_id": invoice_id})
+        elif any(getattr(current, field) != values[field] for field in INVOICE_LINE_FIELDS):
+            updates.append({**values, "id": current.id})
+    stale_ids.extend(current.id for current in existing.values())
+
+    if stale_ids:
+        db.execute(delete(line).where(line.id.in_(stale_ids)))
+    if updates:
+        db.execute(update(line), updates)
+    if inserts:
+        db.execute(insert(line), inserts)
+    return bool(stale_ids or updates or inserts)
+
+
+def build_invoice_from_sheet(
+    db: Session, pair_sheet: models.PairSheet, month_key: str, render: bool = True
+) -> models.CombinedInvoice:
+    """Create or update the month's invoice from the sheet rows; ``render=False`` leaves a changed
+    invoice with ``pdf_path`` unset for a batch renderer to pick up. With ``PDF_STORAGE=memory``
+    nothing is rendered here; the PDF is rendered when it is downloaded or sent."""
+    rows = queries.month_rows_query(db, pair_sheet.id, month_key).all()
     if not rows:
         raise HTTPException(status_code=400, detail="This sheet has no rows for the selected month")
 
-    total_amount = sum(float(row.hours or 0) * float(row.rate or 0) for row in rows)
-    invoice = (
-        db.query(models.CombinedInvoice)
-        .filter(models.CombinedInvoice.pair_sheet_id == pair_sheet.id, models.CombinedInvoice.month_key == month_key)
-        .first()
-    )
+    desired_lines = [
+        {
+            "employee_id": row.employee_id,
+            "employee_name": row.employee.name,
+            "role": row.role,
+            "notes": row.notes,
+            "hours": row.hours,
+            "rate": row.rate,
+            "amount": float(row.hours or 0) * float(row.rate or 0),
+            "comments": row.comments,
+            "sort_order": idx,
+        }
+        for idx, row in enumerate(rows)
+    ]
+    total_amount = sum(line["amount"] for line in desired_lines)
+
+    # Materialize the invoice and its lines in a single transaction so a failure
+    # never leaves an invoice without lines.
+    invoice = queries.month_invoice(db, pair_sheet.id, month_key)
+    changed = invoice is None
     if not invoice:
         invoice = models.CombinedInvoice(
             pair_sheet_id=pair_sheet.id,
@@ -310,40 +633,176 @@ def build_invoice_from_sheet(db: Session, pair_sheet: models.PairSheet, month_ke
             total_amount=total_amount,
         )
         db.add(invoice)
-        db.commit()
-        db.refresh(invoice)
-    else:
+        db.flush()
+    changed = sync_invoice_lines(db, invoice.id, desired_lines) or changed
+    if changed or float(invoice.total_amount or 0) != total_amount:
+        changed = True
         invoice.total_amount = total_amount
         invoice.updated_at = datetime.utcnow()
-        for line in list(invoice.lines):
-            db.delete(line)
-        db.flush()
+        invoice.pdf_path = None
+        events.emit(db, "invoice.generated", pair_sheet.id, month_key, invoice.id)
+    db.commit()
 
-    for idx, row in enumerate(rows):
-        amount = float(row.hours or 0) * float(row.rate or 0)
-        db.add(
-            models.CombinedInvoiceLine(
-                combined_invoice_id=invoice.id,
-                employee_id=row.employee_id,
-                employee_name=row.employee.name,
-                role=row.role,
-                notes=row.notes,
-                hours=row.hours,
-                rate=row.rate,
-                amount=amount,
-                comments=row.comments,
-                sort_order=idx,
-            )
-        )
+    pdf = Path(invoice.pdf_path) if invoice.pdf_path else None
+    if render and execution.pdf_storage() == "disk" and (changed or not pdf or not pdf.exists()):
+        regenerate_invoice_pdf(db, invoice)
+    return invoice
 
+
+def rollover_month(
+    db: Session, month_key: str, from_month_key: str | None = None, zero_hours: bool = True
+) -> schemas.MonthRolloverOut:
+    """Materialize ``month_key`` for every pair sheet that has no rows in it yet.
+
+    Each sheet's roster (employee, role, notes, rate, sort order) is copied from
+    ``from_month_key`` or, by default, from its latest earlier month with rows (archived
+    or not), in a single INSERT ... SELECT. Sheets that already have rows in
+    ``month_key`` are left alone, so running it again inserts nothing. The result
+    lists the months rows were actually copied from in ``source_month_keys``.
+    """
+    partitions.ensure_open(db, month_key)
+    if from_month_key:
+        source = partitions.union("sheet_rows", from_month_key, from_month_key, name="source").c
+        source_month = source.month_key == from_month_key
+    else:
+        source = partitions.union("sheet_rows", end=month_key, name="source").c
+        latest = partitions.union("sheet_rows", end=month_key, name="latest").c
+        source_month = source.month_key == (
+            select(func.max(latest.month_key))
+            .where(latest.pair_sheet_id == source.pair_sheet_id, latest.month_key < month_key)
+            .scalar_subquery()
+        )
+    target = aliased(models.SheetRow)
+    unopened = ~(
+        select(target.id).where(target.pair_sheet_id == source.pair_sheet_id, target.month_key == month_key).exists()
+    )
+    if from_month_key:
+        source_month_keys = [from_month_key]
+    else:
+        # read before the INSERT, which makes every copied sheet opened
+        source_month_keys = list(
+            db.scalars(select(source.month_key).where(source_month, unopened).distinct().order_by(source.month_key))
+        )
+    now = datetime.utcnow()
+    rows = select(
+        source.pair_sheet_id,
+        literal(month_key),
+        source.employee_id,
+        source.role,
+        source.notes,
+        literal(0.0) if zero_hours else source.hours,
+        source.rate,
+        source.sort_order,
+        literal(now),
+        literal(now),
+    ).where(source_month, unopened)
+    sheet_row = models.SheetRow
+    inserted = db.execute(
+        insert(sheet_row)
+        .from_select(
+            [
+                sheet_row.pair_sheet_id,
+                sheet_row.month_key,
+                sheet_row.employee_id,
+                sheet_row.role,
+                sheet_row.notes,
+                sheet_row.hours,
+                sheet_row.rate,
+                sheet_row.sort_order,
+                sheet_row.created_at,
+                sheet_row.updated_at,
+            ],
+            rows,
+        )
+        .returning(sheet_row.pair_sheet_id)
+    ).scalars().all()
+    if inserted:
+        events.emit(db, "month.rolled_over", month_key=month_key)
     db.commit()
-    db.refresh(invoice)
-    pdf_path = regenerate_invoice_pdf(db, invoice)
-    invoice.pdf_path = str(pdf_path)
-    invoice.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(invoice)
-    return invoice
+    return schemas.MonthRolloverOut(
+        month_key=month_key,
+        from_month_key=from_month_key,
+        source_month_keys=source_month_keys if inserted else [],
+        sheets=len(set(inserted)),
+        rows=len(inserted),
+    )
+
+
+def stream_invoice_archive(
+    existing: list[tuple[int, Path]], pending: list[tuple[int, dict]], model=models.CombinedInvoice
+):
+    """Yield ZIP bytes for existing PDFs first, then for renders as they complete.
+
+    With ``disk`` storage new PDF paths are saved on ``model``, the hot or the archive
+    invoice table; ``memory`` renders go straight into the archive.
+    """
+    rendered: dict[int, str] = {}
+    month_keys = {invoice_id: kwargs["month_key"] for invoice_id, kwargs in pending}
+    to_disk = execution.pdf_storage() == "disk"
+
+    def render(kwargs: dict) -> tuple[str, Path | bytes]:
+        if to_disk:
+            pdf = execution.render_pdf(out_dir=INVOICE_DIR, **kwargs)
+            return pdf.name, pdf
+        return execution.render_pdf_bytes(**kwargs)
+
+    def entries():
+        for _, pdf in existing:
+            yield pdf.name, pdf
+        if not pending:
+            return
+        # at most ARCHIVE_RENDER_CONCURRENCY renders are queued or running; the next one is
+        # submitted as each finished PDF goes into the archive
+        limit = max(1, settings.ARCHIVE_RENDER_CONCURRENCY)
+        queue = iter(pending)
+        in_flight: dict[Future, int] = {}
+        pool = ThreadPoolExecutor(max_workers=limit)
+
+        def submit_next() -> None:
+            for invoice_id, kwargs in queue:
+                in_flight[pool.submit(render, kwargs)] = invoice_id
+                return
+
+        try:
+            for _ in range(limit):
+                submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    invoice_id = in_flight.pop(future)
+                    name, pdf = future.result()
+                    if to_disk:
+                        rendered[invoice_id] = str(pdf)
+                    submit_next()
+                    yield name, pdf
+        finally:
+            # a disconnected client or a failed render: drop the renders that have not started
+            pool.shutdown(cancel_futures=True)
+
+    items = entries()
+    try:
+        yield from archive.stream_zip(items)
+    except Exception:
+        logger.exception("Invoice archive stream failed")
+        raise
+    finally:
+        items.close()
+        if rendered:
+            with SessionLocal() as db:
+                table = model.__table__
+                db.execute(
+                    update(table).where(table.c.id == bindparam("invoice_id")).values(pdf_path=bindparam("rendered_path")),
+                    [
+                        {"invoice_id": invoice_id, "rendered_path": pdf_path}
+                        for invoice_id, pdf_path in rendered.items()
+                    ],
+                )
+                events.emit_many(
+                    db,
+                    "invoice.rendered",
+                    [{"invoice_id": invoice_id, "month_key": month_keys[invoice_id]} for invoice_id in rendered],
+                )
+                db.commit()
 
 
 class LoginRequest(BaseModel):
@@ -352,11 +811,21 @@ class LoginRequest(BaseModel):
 
 
 @app.get("/health")
+@query_budget(0)
 def health():
     return {"ok": True, "env": os.getenv("VERCEL", "local")}
 
 
+@app.get("/metrics", include_in_schema=False)
+@query_budget(0)
+def metrics_endpoint(request: Request):
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/auth/login")
+@query_budget(0)
 def login(credentials: LoginRequest):
     if verify_credentials(credentials.username, credentials.password):
         access_token = create_access_token(data={"sub": credentials.username})
@@ -365,11 +834,13 @@ def login(credentials: LoginRequest):
 
 
 @app.get("/vendors", response_model=list[schemas.VendorOut])
+@query_budget(1)
 def list_vendors(db: Session = Depends(get_db), username: str = Depends(verify_token)):
     return db.query(models.Vendor).order_by(models.Vendor.name.asc()).all()
 
 
 @app.post("/vendors", response_model=schemas.VendorOut)
+@query_budget(3)
 def create_vendor(payload: schemas.VendorCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     name = require_name(payload.name, "Vendor")
     existing = find_vendor_by_name(db, name)
@@ -379,10 +850,12 @@ def create_vendor(payload: schemas.VendorCreate, db: Session = Depends(get_db),
     db.add(vendor)
     db.commit()
     db.refresh(vendor)
+    search.invalidate("vendor")
     return vendor
 
 
 @app.put("/vendors/{vendor_id}", response_model=schemas.VendorOut)
+@query_budget(4)
 def update_vendor(vendor_id: int, payload: schemas.VendorCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     vendor = db.query(models.Vendor).filter(models.Vendor.id == vendor_id).first()
     if not vendor:
@@ -395,25 +868,30 @@ def update_vendor(vendor_id: int, payload: schemas.VendorCreate, db: Session = D
     vendor.email = payload.email
     db.commit()
     db.refresh(vendor)
+    search.invalidate("vendor")
     return vendor
 
 
-@app.delete("/vendors/{vendor_id}")
+@app.delete("/vendors/{vendor_id}", response_model=schemas.DeleteOut)
+@query_budget(8)
 def delete_vendor(vendor_id: int, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    vendor = db.query(models.Vendor).filter(models.Vendor.id == vendor_id).first()
-    if not vendor:
+    counts = delete_pair_sheets(db, models.PairSheet.vendor_id == vendor_id)
+    if not bulk_delete(db, models.Vendor, models.Vendor.id == vendor_id):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Vendor not found")
-    db.delete(vendor)
     db.commit()
-    return {"deleted": vendor_id}
+    search.invalidate("vendor")
+    return schemas.DeleteOut(deleted=vendor_id, **counts)
 
 
 @app.get("/companies", response_model=list[schemas.CompanyOut])
+@query_budget(1)
 def list_companies(db: Session = Depends(get_db), username: str = Depends(verify_token)):
     return db.query(models.Company).order_by(models.Company.name.asc()).all()
 
 
 @app.post("/companies", response_model=schemas.CompanyOut)
+@query_budget(3)
 def create_company(payload: schemas.CompanyCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     name = require_name(payload.name, "Company")
     existing = find_company_by_name(db, name)
@@ -423,10 +901,12 @@ def create_company(payload: schemas.CompanyCreate, db: Session = Depends(get_db)
     db.add(company)
     db.commit()
     db.refresh(company)
+    search.invalidate("company")
     return company
 
 
 @app.put("/companies/{company_id}", response_model=schemas.CompanyOut)
+@query_budget(4)
 def update_company(company_id: int, payload: schemas.CompanyCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     company = db.query(models.Company).filter(models.Company.id == company_id).first()
     if not company:
@@ -439,25 +919,30 @@ def update_company(company_id: int, payload: schemas.CompanyCreate, db: Session
     company.address = payload.address
     db.commit()
     db.refresh(company)
+    search.invalidate("company")
     return company
 
 
-@app.delete("/companies/{company_id}")
+@app.delete("/companies/{company_id}", response_model=schemas.DeleteOut)
+@query_budget(8)
 def delete_company(company_id: int, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
-    if not company:
+    counts = delete_pair_sheets(db, models.PairSheet.company_id == company_id)
+    if not bulk_delete(db, models.Company, models.Company.id == company_id):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Company not found")
-    db.delete(company)
     db.commit()
-    return {"deleted": company_id}
+    search.invalidate("company")
+    return schemas.DeleteOut(deleted=company_id, **counts)
 
 
-@app.get("/employees", response_model=list[schemas.EmployeeOut])
+@app.get("/employees", response_model=list[schemas.EmployeeOut], response_class=wire.NegotiatedResponse)
+@query_budget(1)
 def list_employees(db: Session = Depends(get_db), username: str = Depends(verify_token)):
     return db.query(models.Employee).order_by(models.Employee.name.asc()).all()
 
 
 @app.post("/employees", response_model=schemas.EmployeeOut)
+@query_budget(3)
 def create_employee(payload: schemas.EmployeeCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     name = require_name(payload.name, "Employee")
     existing = find_employee_by_name(db, name)
@@ -473,10 +958,12 @@ def create_employee(payload: schemas.EmployeeCreate, db: Session = Depends(get_d
     db.add(employee)
     db.commit()
     db.refresh(employee)
+    search.invalidate("employee")
     return employee
 
 
 @app.put("/employees/{employee_id}", response_model=schemas.EmployeeOut)
+@query_budget(4)
 def update_employee(employee_id: int, payload: schemas.EmployeeCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
     if not employee:
@@ -492,20 +979,54 @@ def update_employee(employee_id: int, payload: schemas.EmployeeCreate, db: Sessi
     employee.notes = payload.notes
     db.commit()
     db.refresh(employee)
+    search.invalidate("employee")
     return employee
 
 
-@app.delete("/employees/{employee_id}")
+@app.delete("/employees/{employee_id}", response_model=schemas.DeleteOut)
+@query_budget(4)
 def delete_employee(employee_id: int, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
-    if not employee:
+    # sheet rows need their employee for names and rates, so an employee on any sheet stays
+    in_sheets = db.execute(
+        select(
+            select(models.SheetRow.id).where(models.SheetRow.employee_id == employee_id).exists(),
+            select(models.SheetRowArchive.id).where(models.SheetRowArchive.employee_id == employee_id).exists(),
+        )
+    ).one()
+    if any(in_sheets):
+        raise HTTPException(status_code=409, detail="Employee has sheet rows; remove them from the sheets first")
+    # invoice lines keep the employee's name and only lose the link
+    unlinked = sum(
+        db.execute(
+            update(line)
+            .where(line.employee_id == employee_id)
+            .values(employee_id=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        for line in (models.CombinedInvoiceLine, models.CombinedInvoiceLineArchive)
+    )
+    if not bulk_delete(db, models.Employee, models.Employee.id == employee_id):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Employee not found")
-    db.delete(employee)
     db.commit()
-    return {"deleted": employee_id}
+    search.invalidate("employee")
+    return schemas.DeleteOut(deleted=employee_id, invoice_lines=unlinked)
 
 
-@app.get("/workbook/sheets", response_model=list[schemas.PairSheetOut])
+@app.get("/search", response_model=list[schemas.SearchResultOut])
+@query_budget(3)
+def search_names(
+    q: str,
+    kinds: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    return search.search(db, q, search.parse_kinds(kinds), limit)
+
+
+@app.get("/workbook/sheets", response_model=list[schemas.PairSheetOut], response_class=wire.NegotiatedResponse)
+@query_budget(6)
 def list_pair_sheets(
     month_key: str | None = None,
     vendor_id: int | None = None,
@@ -513,16 +1034,47 @@ def list_pair_sheets(
     db: Session = Depends(get_db),
     username: str = Depends(verify_token),
 ):
-    query = db.query(models.PairSheet)
+    query = queries.pair_sheets_query(db)
     if vendor_id:
         query = query.filter(models.PairSheet.vendor_id == vendor_id)
     if company_id:
         query = query.filter(models.PairSheet.company_id == company_id)
     sheets = query.order_by(models.PairSheet.id.asc()).all()
-    return [get_pair_sheet_out(db, sheet, month_key) for sheet in sheets]
+    return summarize_pair_sheets(db, sheets, month_key)
+
+
+@app.get("/workbook/bootstrap", response_model=schemas.WorkbookBootstrapOut, response_class=wire.NegotiatedResponse)
+@query_budget(8)
+def workbook_bootstrap(
+    month_key: str,
+    include_employees: bool = False,
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Everything the workbook page needs for a month in one request and one session.
+
+    Replaces ``/vendors``, ``/companies``, ``/workbook/sheets`` and ``/analytics/summary``
+    (plus ``/employees`` when ``include_employees`` is set); the month's invoices are
+    loaded once and shared by the sheet summaries and the summary cards.
+    """
+    vendors = db.query(models.Vendor).order_by(models.Vendor.name.asc()).all()
+    companies = db.query(models.Company).order_by(models.Company.name.asc()).all()
+    employees = db.query(models.Employee).order_by(models.Employee.name.asc()).all() if include_employees else None
+    pair_sheets = queries.pair_sheets_query(db).order_by(models.PairSheet.id.asc()).all()
+    tables = partitions.month_tables(db, month_key)
+    month_invoices = db.query(tables.invoice).filter(tables.invoice.month_key == month_key).all()
+    return schemas.WorkbookBootstrapOut(
+        month_key=month_key,
+        vendors=vendors,
+        companies=companies,
+        employees=employees,
+        sheets=summarize_pair_sheets(db, pair_sheets, month_key, month_invoices, tables),
+        summary=summary_cards(month_invoices),
+    )
 
 
 @app.post("/workbook/sheets", response_model=schemas.PairSheetOut)
+@query_budget(7)
 def create_pair_sheet(payload: schemas.PairSheetCreate, db: Session = Depends(get_db), username: str = Depends(verify_token)):
     existing = (
         db.query(models.PairSheet)
@@ -533,35 +1085,74 @@ def create_pair_sheet(payload: schemas.PairSheetCreate, db: Session = Depends(ge
         return get_pair_sheet_out(db, existing, None)
     sheet = models.PairSheet(vendor_id=payload.vendor_id, company_id=payload.company_id)
     db.add(sheet)
+    db.flush()
+    events.emit(db, "sheet.created", sheet.id)
     db.commit()
     db.refresh(sheet)
     return get_pair_sheet_out(db, sheet, None)
 
 
-@app.get("/workbook/sheets/{sheet_id}", response_model=schemas.WorkbookSheetDetailOut)
+@app.get("/workbook/sheets/{sheet_id}", response_model=schemas.WorkbookSheetDetailOut, response_class=wire.NegotiatedResponse)
+@query_budget(8)
 def get_pair_sheet(
     sheet_id: int,
     month_key: str,
     db: Session = Depends(get_db),
     username: str = Depends(verify_token),
 ):
-    sheet = db.query(models.PairSheet).filter(models.PairSheet.id == sheet_id).first()
+    sheet = queries.pair_sheets_query(db).filter(models.PairSheet.id == sheet_id).first()
     if not sheet:
         raise HTTPException(status_code=404, detail="Sheet not found")
-    invoice = (
-        db.query(models.CombinedInvoice)
-        .filter(models.CombinedInvoice.pair_sheet_id == sheet_id, models.CombinedInvoice.month_key == month_key)
-        .first()
-    )
+    tables = partitions.month_tables(db, month_key)
+    invoice = queries.month_invoice(db, sheet_id, month_key, tables.invoice)
+    rows = build_visible_rows(db, sheet, month_key, invoice, tables.sheet_row)
     return schemas.WorkbookSheetDetailOut(
-        sheet=get_pair_sheet_out(db, sheet, month_key),
+        sheet=pair_sheet_out(
+            sheet,
+            month_total=sum(row.amount for row in rows if row.id is not None),
+            row_count=len(rows),
+            invoice=invoice,
+        ),
         month_key=month_key,
-        rows=build_visible_rows(db, sheet, month_key, invoice),
+        rows=rows,
         invoice=serialize_invoice(invoice) if invoice else None,
     )
 
 
-@app.put("/workbook/sheets/{sheet_id}", response_model=schemas.WorkbookSheetDetailOut)
+@app.get(
+    "/workbook/sheets/{sheet_id}/range",
+    response_model=schemas.WorkbookSheetRangeOut,
+    response_class=wire.NegotiatedResponse,
+)
+@query_budget(4)
+def get_pair_sheet_range(
+    sheet_id: int,
+    from_month_key: str = Query(alias="from", pattern=MONTH_KEY_PATTERN),
+    to_month_key: str = Query(alias="to", pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """The sheet's rows, totals and invoice for every month from ``from`` to ``to``."""
+    if from_month_key > to_month_key:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if len(reports.month_range(from_month_key, to_month_key)) > SHEET_RANGE_MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"A range covers at most {SHEET_RANGE_MAX_MONTHS} months")
+    sheet = queries.pair_sheets_query(db).filter(models.PairSheet.id == sheet_id).first()
+    if not sheet:
+        raise HTTPException(status_code=404, detail="Sheet not found")
+    months = sheet_range_months(db, sheet, from_month_key, to_month_key)
+    return schemas.WorkbookSheetRangeOut(
+        sheet=pair_sheet_out(sheet),
+        from_month_key=from_month_key,
+        to_month_key=to_month_key,
+        months=months,
+        total_amount=sum(month.month_total for month in months),
+        total_hours=sum(month.month_hours for month in months),
+    )
+
+
+@app.put("/workbook/sheets/{sheet_id}", response_model=schemas.WorkbookSheetDetailOut, response_class=wire.NegotiatedResponse)
+@query_budget(None)
 def save_pair_sheet(
     sheet_id: int,
     month_key: str,
@@ -572,6 +1163,7 @@ def save_pair_sheet(
     sheet = db.query(models.PairSheet).filter(models.PairSheet.id == sheet_id).first()
     if not sheet:
         raise HTTPException(status_code=404, detail="Sheet not found")
+    partitions.ensure_open(db, month_key)
 
     existing_rows = (
         db.query(models.SheetRow)
@@ -580,38 +1172,45 @@ def save_pair_sheet(
     )
     existing_map = {row.id: row for row in existing_rows}
     keep_ids: set[int] = set()
+    changed = False
     now = datetime.utcnow()
 
+    # diff against the stored rows: unchanged rows are not written at all
     for idx, row_in in enumerate(payload.rows):
         if is_empty_row(row_in):
             continue
         employee = resolve_employee(db, row_in)
+        values = {
+            "employee_id": employee.id,
+            "role": row_in.role,
+            "notes": row_in.notes,
+            "hours": float(row_in.hours or 0),
+            "rate": float(row_in.rate or employee.hourly_rate or 0),
+            "comments": row_in.comments,
+            "sort_order": idx,
+        }
         row = existing_map.get(row_in.id) if row_in.id else None
-        if not row:
+        if row and row.id not in keep_ids:
+            keep_ids.add(row.id)
+            if all(getattr(row, field) == value for field, value in values.items()):
+                continue
+        else:
             row = models.SheetRow(pair_sheet_id=sheet_id, month_key=month_key, created_at=now)
             db.add(row)
-        row.employee_id = employee.id
-        row.role = row_in.role
-        row.notes = row_in.notes
-        row.hours = float(row_in.hours or 0)
-        row.rate = float(row_in.rate or employee.hourly_rate or 0)
-        row.comments = row_in.comments
-        row.sort_order = idx
+        for field, value in values.items():
+            setattr(row, field, value)
         row.updated_at = now
-        db.flush()
-        keep_ids.add(row.id)
-
-    for row in existing_rows:
-        if row.id not in keep_ids:
-            db.delete(row)
-
+        changed = True
+
+    removed_ids = [row.id for row in existing_rows if row.id not in keep_ids]
+    if removed_ids:
+        bulk_delete(db, models.SheetRow, models.SheetRow.id.in_(removed_ids))
+        changed = True
+    if not changed:
+        return get_pair_sheet(sheet_id=sheet_id, month_key=month_key, db=db, username=username)
     db.flush()
 
-    invoice = (
-        db.query(models.CombinedInvoice)
-        .filter(models.CombinedInvoice.pair_sheet_id == sheet_id, models.CombinedInvoice.month_key == month_key)
-        .first()
-    )
+    invoice = queries.month_invoice(db, sheet_id, month_key)
     if invoice:
         remaining_total = sum(
             float(row.hours or 0) * float(row.rate or 0)
@@ -627,123 +1226,230 @@ def save_pair_sheet(
         invoice.total_amount = remaining_total
         invoice.pdf_path = None
         invoice.updated_at = now
-        for line in list(invoice.lines):
-            db.delete(line)
+        db.execute(
+            delete(models.CombinedInvoiceLine).where(models.CombinedInvoiceLine.combined_invoice_id == invoice.id)
+        )
 
+    events.emit(db, "sheet.saved", sheet_id, month_key, invoice.id if invoice else None)
     db.commit()
     return get_pair_sheet(sheet_id=sheet_id, month_key=month_key, db=db, username=username)
 
 
-@app.post("/workbook/sheets/{sheet_id}/invoice/generate", response_model=schemas.CombinedInvoiceOut)
+@app.post("/workbook/months/{month_key}/rollover", response_model=schemas.MonthRolloverOut)
+@query_budget(4)
+def rollover_workbook_month(
+    payload: schemas.MonthRolloverIn | None = None,
+    month_key: str = PathParam(pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Open ``month_key`` for all pair sheets at once; safe to repeat."""
+    payload = payload or schemas.MonthRolloverIn()
+    if payload.from_month_key and payload.from_month_key >= month_key:
+        raise HTTPException(status_code=400, detail="from_month_key must be before the month being opened")
+    return rollover_month(db, month_key, payload.from_month_key, payload.zero_hours)
+
+
+@app.post("/workbook/months/{month_key}/archive", response_model=schemas.MonthArchiveOut)
+@query_budget(13)
+def archive_workbook_month(
+    payload: schemas.MonthArchiveIn | None = None,
+    month_key: str = PathParam(pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Move a finished month's rows and invoices out of the hot tables; it stays readable."""
+    payload = payload or schemas.MonthArchiveIn()
+    return partitions.archive_month(db, month_key, payload.force)
+
+
+@app.post("/workbook/months/{month_key}/reopen", response_model=schemas.MonthArchiveOut)
+@query_budget(9)
+def reopen_workbook_month(
+    month_key: str = PathParam(pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Move an archived month back into the hot tables so it can be edited again."""
+    return partitions.reopen_month(db, month_key)
+
+
+@app.post(
+    "/workbook/sheets/{sheet_id}/invoice/generate",
+    response_model=schemas.CombinedInvoiceOut,
+    dependencies=[Depends(execution.limit_concurrency("invoice-generate"))],
+)
+@query_budget(15)
+@idempotency.idempotent("invoice-generate")
 def generate_sheet_invoice(
     sheet_id: int,
     month_key: str,
     db: Session = Depends(get_db),
     username: str = Depends(verify_token),
 ):
-    sheet = db.query(models.PairSheet).filter(models.PairSheet.id == sheet_id).first()
+    sheet = queries.pair_sheets_query(db).filter(models.PairSheet.id == sheet_id).first()
     if not sheet:
         raise HTTPException(status_code=404, detail="Sheet not found")
+    partitions.ensure_open(db, month_key)
     invoice = build_invoice_from_sheet(db, sheet, month_key)
     return serialize_invoice(invoice)
 
 
-@app.post("/combined-invoices/{invoice_id}/send", response_model=schemas.CombinedInvoiceOut)
+@app.post(
+    "/combined-invoices/{invoice_id}/send",
+    response_model=schemas.CombinedInvoiceOut,
+    dependencies=[Depends(execution.limit_concurrency("invoice-send"))],
+)
+@query_budget(12)
+@idempotency.idempotent("invoice-send")
 def send_combined_invoice(
     invoice_id: int,
     payload: schemas.CombinedInvoiceSendIn,
     db: Session = Depends(get_db),
     username: str = Depends(verify_token),
 ):
-    invoice = db.query(models.CombinedInvoice).filter(models.CombinedInvoice.id == invoice_id).first()
+    invoice = queries.invoices_query(db, with_vendor=False).filter(models.CombinedInvoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     recipients = parse_recipients(payload.recipients)
     if not recipients:
         raise HTTPException(status_code=400, detail="At least one recipient is required")
 
-    pdf = Path(invoice.pdf_path) if invoice.pdf_path else None
-    if not pdf or not pdf.exists():
-        pdf = regenerate_invoice_pdf(db, invoice)
-
-    pair_sheet = db.query(models.PairSheet).filter(models.PairSheet.id == invoice.pair_sheet_id).first()
-    if not pair_sheet:
-        raise HTTPException(status_code=404, detail="Sheet not found")
-
-    subject = f"Invoices — {invoice.month_key}"
-    body = (
-        "Hi all,\n\n"
-        f"Please find attached the invoices for {invoice.month_key}.\n\n"
-        f"Thanks,\n{pair_sheet.company.name}"
-    )
-    send_email(subject, body, recipients, attachments=[pdf])
-
-    invoice.sent = True
-    invoice.manual_recipients = ", ".join(recipients)
-    invoice.sent_at = datetime.utcnow()
-    invoice.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(invoice)
+    deliver_invoice(db, invoice, recipients)
     return serialize_invoice(invoice)
 
 
 @app.post("/combined-invoices/{invoice_id}/paid", response_model=schemas.CombinedInvoiceOut)
+@query_budget(5)
 def toggle_invoice_paid(
     invoice_id: int,
     payload: schemas.PaidToggleIn,
     db: Session = Depends(get_db),
     username: str = Depends(verify_token),
 ):
-    invoice = db.query(models.CombinedInvoice).filter(models.CombinedInvoice.id == invoice_id).first()
+    # payments can still arrive for a month archived with ``force``
+    invoice = find_invoice(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     invoice.paid = payload.paid
     invoice.paid_at = datetime.utcnow() if payload.paid else None
     invoice.updated_at = datetime.utcnow()
+    kind = "invoice.paid" if payload.paid else "invoice.unpaid"
+    events.emit(db, kind, invoice.pair_sheet_id, invoice.month_key, invoice.id)
     db.commit()
     db.refresh(invoice)
     return serialize_invoice(invoice)
 
 
-@app.get("/combined-invoices/{invoice_id}/pdf")
+@app.get("/combined-invoices/archive")
+@query_budget(5)
+def download_invoice_archive(
+    month_key: str,
+    token: str | None = None,
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token_optional),
+    # the PDFs render while the body streams, so the response holds the slot until it is sent
+    slot: execution.AdmissionSlot = Depends(execution.limit_concurrency("invoice-archive")),
+):
+    tables = partitions.month_tables(db, month_key)
+    invoices = (
+        queries.invoices_query(db, model=tables.invoice)
+        .filter(tables.invoice.month_key == month_key)
+        .order_by(tables.invoice.invoice_number.asc())
+        .all()
+    )
+    if not invoices:
+        raise HTTPException(status_code=404, detail="No invoices for this month")
+
+    existing: list[tuple[int, Path]] = []
+    missing: list[models.CombinedInvoice] = []
+    for invoice in invoices:
+        pdf = Path(invoice.pdf_path) if invoice.pdf_path else None
+        if pdf and pdf.exists():
+            existing.append((invoice.id, pdf))
+        else:
+            missing.append(invoice)
+
+    lines_by_invoice: dict[int, list[models.CombinedInvoiceLine]] = {}
+    if missing:
+        for line in db.query(tables.invoice_line).filter(
+            tables.invoice_line.combined_invoice_id.in_([invoice.id for invoice in missing])
+        ):
+            lines_by_invoice.setdefault(line.combined_invoice_id, []).append(line)
+    pending = [
+        (invoice.id, invoice_render_kwargs(invoice, invoice.pair_sheet, lines_by_invoice.get(invoice.id, [])))
+        for invoice in missing
+    ]
+
+    safe_month = month_key.replace("-", "_")
+    return execution.AdmittedStreamingResponse(
+        slot,
+        stream_invoice_archive(existing, pending, tables.invoice),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="invoices_{safe_month}.zip"'},
+    )
+
+
+@app.get(
+    "/combined-invoices/{invoice_id}/pdf",
+    dependencies=[Depends(execution.limit_concurrency("invoice-pdf"))],
+)
+@query_budget(10)
 def get_combined_invoice_pdf(
     invoice_id: int,
     token: str | None = None,
     db: Session = Depends(get_db),
     username: str = Depends(verify_token_optional),
 ):
-    invoice = db.query(models.CombinedInvoice).filter(models.CombinedInvoice.id == invoice_id).first()
+    invoice = find_invoice(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    pdf = Path(invoice.pdf_path) if invoice.pdf_path else None
-    if not pdf or not pdf.exists():
-        pdf = regenerate_invoice_pdf(db, invoice)
-    return FileResponse(path=pdf, media_type="application/pdf", filename=pdf.name)
+    filename, pdf = invoice_pdf(db, invoice)
+    if isinstance(pdf, Path):
+        return FileResponse(path=pdf, media_type="application/pdf", filename=filename)
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/events", response_class=StreamingResponse)
+@query_budget(0)
+async def change_events(
+    request: Request,
+    token: str | None = None,
+    last_event_id: int | None = Query(default=None, ge=0),
+    username: str = Depends(verify_token_optional),
+):
+    """Server-sent change events (``sheet.saved``, ``invoice.sent``, ...) so open pages re-fetch only what changed.
+
+    ``EventSource`` cannot set headers, so the token comes as ``?token=``; reconnects resume
+    from the ``Last-Event-ID`` header (or ``?last_event_id=``).
+    """
+    header = request.headers.get("last-event-id", "")
+    if header.isdigit():
+        last_event_id = int(header)
+    metrics.mark_long_lived()
+    return StreamingResponse(
+        events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/analytics/summary", response_model=list[schemas.SummaryCardOut])
+@query_budget(2)
 def analytics_summary(month_key: str | None = None, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    query = db.query(models.CombinedInvoice)
-    if month_key:
-        query = query.filter(models.CombinedInvoice.month_key == month_key)
-    invoices = query.all()
-    total_billed = sum(float(inv.total_amount or 0) for inv in invoices)
-    total_paid = sum(float(inv.total_amount or 0) for inv in invoices if inv.paid)
-    total_sent = sum(float(inv.total_amount or 0) for inv in invoices if inv.sent)
-    return [
-        schemas.SummaryCardOut(label="Billed", value=total_billed),
-        schemas.SummaryCardOut(label="Sent", value=total_sent),
-        schemas.SummaryCardOut(label="Paid", value=total_paid),
-        schemas.SummaryCardOut(label="Outstanding", value=total_billed - total_paid),
-    ]
+    return summary_cards(invoices_across_months(db, month_key))
 
 
-@app.get("/analytics/company-balances", response_model=list[schemas.CompanyBalanceOut])
+@app.get("/analytics/company-balances", response_model=list[schemas.CompanyBalanceOut], response_class=wire.NegotiatedResponse)
+@query_budget(2)
 def company_balances(month_key: str | None = None, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    query = db.query(models.CombinedInvoice)
-    if month_key:
-        query = query.filter(models.CombinedInvoice.month_key == month_key)
-    invoices = query.all()
+    invoices = invoices_across_months(
+        db, month_key, lambda model: queries.invoices_query(db, with_vendor=False, model=model)
+    )
     grouped: dict[str, schemas.CompanyBalanceOut] = {}
     for invoice in invoices:
         pair_sheet = invoice.pair_sheet
@@ -765,12 +1471,12 @@ def company_balances(month_key: str | None = None, db: Session = Depends(get_db)
     return list(sorted(grouped.values(), key=lambda item: item.company.lower()))
 
 
-@app.get("/analytics/vendor-balances", response_model=list[schemas.VendorBalanceOut])
+@app.get("/analytics/vendor-balances", response_model=list[schemas.VendorBalanceOut], response_class=wire.NegotiatedResponse)
+@query_budget(2)
 def vendor_balances(month_key: str | None = None, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    query = db.query(models.CombinedInvoice)
-    if month_key:
-        query = query.filter(models.CombinedInvoice.month_key == month_key)
-    invoices = query.all()
+    invoices = invoices_across_months(
+        db, month_key, lambda model: queries.invoices_query(db, with_company=False, model=model)
+    )
     grouped: dict[str, schemas.VendorBalanceOut] = {}
     for invoice in invoices:
         vendor_name = invoice.pair_sheet.vendor.name
@@ -785,12 +1491,11 @@ def vendor_balances(month_key: str | None = None, db: Session = Depends(get_db),
     return list(sorted(grouped.values(), key=lambda item: item.vendor.lower()))
 
 
-@app.get("/analytics/pair-balances", response_model=list[schemas.PairBalanceOut])
+@app.get("/analytics/pair-balances", response_model=list[schemas.PairBalanceOut], response_class=wire.NegotiatedResponse)
+@query_budget(2)
 def pair_balances(month_key: str | None = None, db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    query = db.query(models.CombinedInvoice)
-    if month_key:
-        query = query.filter(models.CombinedInvoice.month_key == month_key)
-    invoices = query.order_by(models.CombinedInvoice.month_key.desc(), models.CombinedInvoice.created_at.desc()).all()
+    invoices = invoices_across_months(db, month_key, lambda model: queries.invoices_query(db, model=model))
+    invoices.sort(key=lambda invoice: (invoice.month_key, invoice.created_at or datetime.min), reverse=True)
     return [
         schemas.PairBalanceOut(
             invoice_id=invoice.id,
@@ -806,9 +1511,10 @@ def pair_balances(month_key: str | None = None, db: Session = Depends(get_db), u
     ]
 
 
-@app.get("/analytics/earnings", response_model=list[schemas.EarningsPoint])
+@app.get("/analytics/earnings", response_model=list[schemas.EarningsPoint], response_class=wire.NegotiatedResponse)
+@query_budget(2)
 def earnings(db: Session = Depends(get_db), username: str = Depends(verify_token)):
-    invoices = db.query(models.CombinedInvoice).all()
+    invoices = invoices_across_months(db)
     grouped: dict[str, float] = {}
     for invoice in invoices:
         grouped[invoice.month_key] = grouped.get(invoice.month_key, 0.0) + float(invoice.total_amount or 0)
@@ -816,3 +1522,249 @@ def earnings(db: Session = Depends(get_db), username: str = Depends(verify_token
         schemas.EarningsPoint(month_key=month_key, total_amount=grouped[month_key])
         for month_key in sorted(grouped.keys())
     ]
+
+
+@app.get("/analytics/trends", response_model=schemas.TrendsReportOut, response_class=wire.NegotiatedResponse)
+@query_budget(1)
+def invoice_trends(
+    by: str = "total",
+    start: str | None = Query(None, pattern=MONTH_KEY_PATTERN),
+    end: str | None = Query(None, pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Monthly invoice totals with rolling 3/12-month sums and year-over-year change.
+
+    ``by`` is ``total``, ``company`` or ``vendor``; the range defaults to the last 12 months.
+    """
+    if by not in trends.SERIES:
+        raise HTTPException(status_code=400, detail=f"by must be one of {', '.join(trends.SERIES)}")
+    end = end or partitions.current_month_key()
+    start = start or trends.shift_month(end, -11)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if len(reports.month_range(start, end)) > TRENDS_MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"A range covers at most {TRENDS_MAX_MONTHS} months")
+    return trends.trends_report(db, by, start, end)
+
+
+def aging_totals(db: Session, model, now: datetime) -> list:
+    """Outstanding amount and count per (company, vendor, aging bucket) of ``model``'s sent, unpaid invoices.
+
+    The bucket boundaries are fixed ``sent_at`` cutoffs computed from ``now``, so the
+    database does the grouping. A NULL ``paid`` counts as unpaid, as it does everywhere else.
+    """
+    bucket = case(
+        *(
+            (model.sent_at > now - timedelta(days=max_days + 1), idx)
+            for idx, (_, max_days) in enumerate(AGING_BUCKETS[:-1])
+        ),
+        else_=len(AGING_BUCKETS) - 1,
+    )
+    return (
+        db.query(
+            models.Company.id,
+            models.Company.name,
+            models.Vendor.id,
+            models.Vendor.name,
+            bucket,
+            func.sum(func.coalesce(model.total_amount, 0.0)),
+            func.count(),
+        )
+        .select_from(model)
+        .join(models.PairSheet, models.PairSheet.id == model.pair_sheet_id)
+        .join(models.Company, models.Company.id == models.PairSheet.company_id)
+        .join(models.Vendor, models.Vendor.id == models.PairSheet.vendor_id)
+        .filter(model.paid.is_not(True), model.sent_at.is_not(None))
+        .group_by(models.Company.id, models.Company.name, models.Vendor.id, models.Vendor.name, bucket)
+        .all()
+    )
+
+
+@app.get("/analytics/aging", response_model=schemas.AgingReportOut, response_class=wire.NegotiatedResponse)
+@query_budget(2)
+def receivables_aging(db: Session = Depends(get_db), username: str = Depends(verify_token)):
+    """Sent, unpaid invoices by days outstanding (0-30, 31-60, 61-90, 90+), per company and per vendor."""
+    now = datetime.utcnow()
+    size = len(AGING_BUCKETS)
+    companies: dict[int, schemas.AgingRowOut] = {}
+    vendors: dict[int, schemas.AgingRowOut] = {}
+    amounts = [0.0] * size
+    for model in (models.CombinedInvoice, models.CombinedInvoiceArchive):
+        for company_id, company_name, vendor_id, vendor_name, bucket, amount, count in aging_totals(db, model, now):
+            amounts[bucket] += amount
+            for grouped, key, name in ((companies, company_id, company_name), (vendors, vendor_id, vendor_name)):
+                row = grouped.get(key)
+                if row is None:
+                    row = grouped[key] = schemas.AgingRowOut(
+                        id=key, name=name, amounts=[0.0] * size, invoice_counts=[0] * size, total_amount=0.0, invoice_count=0
+                    )
+                row.amounts[bucket] += amount
+                row.invoice_counts[bucket] += count
+                row.total_amount += amount
+                row.invoice_count += count
+
+    def ordered(grouped: dict[int, schemas.AgingRowOut]) -> list[schemas.AgingRowOut]:
+        for row in grouped.values():
+            row.amounts = [round(value, 2) for value in row.amounts]
+            row.total_amount = round(row.total_amount, 2)
+        return sorted(grouped.values(), key=lambda row: row.name.lower())
+
+    return schemas.AgingReportOut(
+        as_of=now.isoformat(),
+        buckets=[
+            schemas.AgingBucketOut(
+                label=f"{min_days}-{max_days}" if max_days is not None else f"{min_days - 1}+",
+                min_days=min_days,
+                max_days=max_days,
+            )
+            for min_days, max_days in AGING_BUCKETS
+        ],
+        companies=ordered(companies),
+        vendors=ordered(vendors),
+        amounts=[round(value, 2) for value in amounts],
+        total_amount=round(sum(amounts), 2),
+        invoice_count=sum(row.invoice_count for row in companies.values()),
+    )
+
+
+@app.get("/reports/pivot", response_model=schemas.PivotReportOut, response_class=wire.NegotiatedResponse)
+@query_budget(4)
+def pivot_report(
+    rows: str = "employee",
+    columns: str = "month",
+    source: str = "sheets",
+    start: str | None = Query(None, pattern=MONTH_KEY_PATTERN),
+    end: str | None = Query(None, pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+    username: str = Depends(verify_token),
+):
+    """Hours and amounts pivoted by ``rows`` x ``columns`` (employee, company, vendor or month)
+    from sheet rows or invoice lines, with month-over-month deltas for month columns."""
+    if rows not in reports.DIMENSIONS or columns not in reports.DIMENSIONS or rows == columns:
+        raise HTTPException(
+            status_code=400, detail=f"rows and columns must be two different of: {', '.join(reports.DIMENSIONS)}"
+        )
+    if source not in reports.SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of: {', '.join(reports.SOURCES)}")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return reports.pivot_report(db, source, rows, columns, start, end)
+
+
+def reminder_vendor_ids(db: Session, month_key: str, after_id: int, limit: int) -> list[int]:
+    rows = (
+        db.query(models.Vendor.id)
+        .filter(models.Vendor.id > after_id, models.Vendor.email != "", models.Vendor.pair_sheets.any())
+        .order_by(models.Vendor.id.asc())
+        .limit(limit)
+    )
+    return [vendor_id for (vendor_id,) in rows]
+
+
+def send_vendor_reminder(db: Session, month_key: str, vendor_id: int) -> None:
+    vendor = db.get(models.Vendor, vendor_id)
+    recipients = parse_recipients([vendor.email]) if vendor else []
+    if not recipients:
+        return
+    from .emailer import send_timesheet_reminder
+
+    with metrics.timer("smtp"):
+        send_timesheet_reminder(month_key, recipients, vendor.name)
+
+
+def missing_pdf_invoice_ids(db: Session, month_key: str, after_id: int, limit: int) -> list[int]:
+    if execution.pdf_storage() == "memory":
+        return []  # nothing is stored, so nothing is missing
+    rows = (
+        db.query(models.CombinedInvoice.id)
+        .filter(
+            models.CombinedInvoice.month_key == month_key,
+            models.CombinedInvoice.id > after_id,
+            models.CombinedInvoice.pdf_path.is_(None),
+        )
+        .order_by(models.CombinedInvoice.id.asc())
+        .limit(limit)
+    )
+    return [invoice_id for (invoice_id,) in rows]
+
+
+def render_missing_pdf(db: Session, month_key: str, invoice_id: int) -> None:
+    invoice = (
+        queries.invoices_query(db, with_vendor=False, with_lines=True)
+        .filter(models.CombinedInvoice.id == invoice_id)
+        .first()
+    )
+    if invoice and not invoice.pdf_path:
+        regenerate_invoice_pdf(db, invoice)
+
+
+def unsent_invoice_ids(db: Session, month_key: str, after_id: int, limit: int) -> list[int]:
+    rows = (
+        db.query(models.CombinedInvoice.id)
+        .filter(
+            models.CombinedInvoice.month_key == month_key,
+            models.CombinedInvoice.id > after_id,
+            models.CombinedInvoice.sent.is_not(True),
+        )
+        .order_by(models.CombinedInvoice.id.asc())
+        .limit(limit)
+    )
+    return [invoice_id for (invoice_id,) in rows]
+
+
+def send_pending_invoice(db: Session, month_key: str, invoice_id: int) -> None:
+    invoice = (
+        queries.invoices_query(db, with_vendor=False, with_lines=True)
+        .filter(models.CombinedInvoice.id == invoice_id)
+        .first()
+    )
+    if not invoice or invoice.sent:
+        return  # sent by hand since the batch was loaded
+    recipients = parse_recipients([invoice.manual_recipients or settings.INVOICE_TO_EMAIL])
+    if not recipients:
+        raise ValueError("No recipients: set manual recipients or INVOICE_TO_EMAIL")
+    deliver_invoice(db, invoice, recipients)
+
+
+CRON_JOBS = {
+    job.name: job
+    for job in (
+        cron.CronJob("reminders", reminder_vendor_ids, send_vendor_reminder),
+        cron.CronJob("invoice-pdfs", missing_pdf_invoice_ids, render_missing_pdf, daily=True),
+        # opt-in (?jobs=invoice-send or CRON_JOBS): emails every unsent invoice of the month
+        cron.CronJob("invoice-send", unsent_invoice_ids, send_pending_invoice, daily=True),
+    )
+}
+
+
+@app.get("/cron/run", response_model=schemas.CronRunOut, dependencies=[Depends(verify_cron_secret)])
+@query_budget(None)
+def run_cron(
+    jobs: str | None = None,
+    month_key: str | None = Query(None, pattern=MONTH_KEY_PATTERN),
+    db: Session = Depends(get_db),
+):
+    """Run scheduled jobs within ``CRON_TIME_BUDGET_SECONDS``; call again until ``complete`` is true."""
+    started = time.perf_counter()
+    names = [name.strip() for name in (jobs or settings.CRON_JOBS).split(",") if name.strip()]
+    unknown = [name for name in names if name not in CRON_JOBS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown cron jobs: {', '.join(unknown)}")
+    today = datetime.utcnow()
+    scheduled = month_key is None
+    month_key = month_key or today.strftime("%Y-%m")
+
+    selected, skipped = [], []
+    for name in names:
+        # scheduled reminders wait for the end of the month; an explicit month_key sends them now
+        if name == "reminders" and scheduled and today.day < settings.CRON_REMINDER_DAY:
+            skipped.append(schemas.CronJobOut(job=name, run_key=month_key, status="skipped"))
+        else:
+            selected.append(CRON_JOBS[name])
+    results = [schemas.CronJobOut(**result) for result in cron.run(db, selected, month_key)] + skipped
+    return schemas.CronRunOut(
+        complete=all(result.status in ("done", "skipped") for result in results),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        jobs=results,
+    )
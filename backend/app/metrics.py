@@ -0,0 +1,289 @@
+"""Per-request SQL and latency instrumentation with a Prometheus text exporter.
+
+``MetricsMiddleware`` opens a ``RequestStats`` for every HTTP request and keeps
+it in a context variable. SQLAlchemy engine/ORM event hooks and the ``timer``
+helper add to whichever request is current, so the route handlers stay
+unchanged. Aggregates live in the process-wide ``registry`` and are rendered by
+``render_prometheus`` for the ``/metrics`` endpoint. Each worker process keeps
+its own registry.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+MAX_CAPTURED_STATEMENTS = 200
+
+
+@dataclass
+class RequestStats:
+    method: str
+    path: str
+    route: str = "unmatched"
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    rows: int = 0
+    timers: dict[str, float] = field(default_factory=dict)
+    statements: list[tuple[float, str]] = field(default_factory=list)
+    lazy_loads: dict[str, int] = field(default_factory=dict)
+    long_lived: bool = False  # streams that stay open by design (server-sent events)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# callables (stats, endpoint) run after every request, e.g. the query budget guard
+after_request_hooks: list = []
+
+
+def current_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def mark_long_lived() -> None:
+    """Keep the current request out of latency histograms and slow-request logs."""
+    stats = _current.get()
+    if stats is not None:
+        stats.long_lived = True
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.total += 1
+        self.sum += value
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+
+
+class Registry:
+    """Thread-safe store of labelled counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.gauges: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, Histogram]] = {}
+        self.help: dict[str, tuple[str, str]] = {}
+        self.labels: dict[str, tuple[str, ...]] = {}
+
+    def describe(self, name: str, kind: str, text: str, labels: tuple[str, ...] = ()) -> None:
+        self.help[name] = (kind, text)
+        self.labels[name] = labels
+
+    def label_names(self, name: str, size: int) -> tuple[str, ...]:
+        names = self.labels.get(name)
+        if names and len(names) == size:
+            return names
+        return tuple(f"label{idx}" for idx in range(size))
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1.0) -> None:
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def set(self, name: str, labels: tuple = (), value: float = 0.0) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[labels] = value
+
+    def observe(self, name: str, labels: tuple, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+registry.describe(
+    "invoiceflow_requests_total", "counter", "HTTP requests by route, method and status", ("route", "method", "status")
+)
+registry.describe("invoiceflow_request_duration_seconds", "histogram", "HTTP request latency", ("route", "method"))
+registry.describe(
+    "invoiceflow_request_sql_statements", "histogram", "SQL statements issued per request", ("route", "method")
+)
+registry.describe("invoiceflow_sql_duration_seconds_total", "counter", "Time spent executing SQL", ("route",))
+registry.describe("invoiceflow_orm_rows_loaded_total", "counter", "ORM rows loaded from result sets", ("route",))
+registry.describe(
+    "invoiceflow_operation_duration_seconds",
+    "histogram",
+    "Timed operations such as PDF render and SMTP send",
+    ("operation",),
+)
+registry.describe("invoiceflow_slow_requests_total", "counter", "Requests slower than SLOW_REQUEST_MS", ("route",))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render_prometheus(source: Registry = registry) -> str:
+    lines: list[str] = []
+    with source._lock:
+        for kind, store in (("counter", source.counters), ("gauge", source.gauges)):
+            for name in sorted(store):
+                _, text = source.help.get(name, (kind, name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(store[name].items()):
+                    lines.append(f"{name}{_format_labels(source.label_names(name, len(labels)), labels)} {value:g}")
+        for name in sorted(source.histograms):
+            _, text = source.help.get(name, ("histogram", name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(source.histograms[name].items()):
+                names = source.label_names(name, len(labels))
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    bucket_labels = _format_labels(names + ("le",), labels + (f"{bound:g}",))
+                    lines.append(f"{name}_bucket{bucket_labels} {count}")
+                lines.append(f"{name}_bucket{_format_labels(names + ('le',), labels + ('+Inf',))} {histogram.total}")
+                lines.append(f"{name}_sum{_format_labels(names, labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(names, labels)} {histogram.total}")
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def timer(operation: str):
+    """Time a block (e.g. ``pdf`` or ``smtp``) and attribute it to the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("invoiceflow_operation_duration_seconds", (operation,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.timers[operation] = stats.timers.get(operation, 0.0) + elapsed
+
+
+@contextmanager
+def untracked():
+    """Keep a block's SQL out of the current request's stats (infrastructure bookkeeping)."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_stack = conn.info.get("query_started")
+    if not started_stack:
+        return
+    elapsed = time.perf_counter() - started_stack.pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.sql_count += 1
+    stats.sql_seconds += elapsed
+    if len(stats.statements) < MAX_CAPTURED_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+
+def _on_load(target, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def instrument(engine, base) -> None:
+    """Attach the SQL hooks to ``engine`` and the ORM load hook to all models of ``base``."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(base, "load", _on_load):
+        event.listen(base, "load", _on_load, propagate=True)
+
+
+def record_request(stats: RequestStats, status: int, elapsed: float) -> None:
+    route, method = stats.route, stats.method
+    registry.inc("invoiceflow_requests_total", (route, method, str(status)))
+    registry.observe("invoiceflow_request_sql_statements", (route, method), stats.sql_count, COUNT_BUCKETS)
+    registry.inc("invoiceflow_sql_duration_seconds_total", (route,), stats.sql_seconds)
+    registry.inc("invoiceflow_orm_rows_loaded_total", (route,), stats.rows)
+    if stats.long_lived:
+        return
+    registry.observe("invoiceflow_request_duration_seconds", (route, method), elapsed)
+
+    if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+        registry.inc("invoiceflow_slow_requests_total", (route,))
+        slowest = sorted(stats.statements, key=lambda item: item[0], reverse=True)[:5]
+        logger.warning(
+            "Slow request %s %s: %.1f ms, %d SQL statements (%.1f ms), %d rows, timers=%s\n%s",
+            method,
+            stats.path,
+            elapsed * 1000,
+            stats.sql_count,
+            stats.sql_seconds * 1000,
+            stats.rows,
+            {name: round(value * 1000, 1) for name, value in stats.timers.items()},
+            "\n".join(f"  {duration * 1000:8.1f} ms  {' '.join(sql.split())[:500]}" for duration, sql in slowest),
+        )
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming responses and contextvars behave normally."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(method=scope["method"], path=scope["path"])
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                stats.route = route.path
+            try:
+                record_request(stats, status, time.perf_counter() - started)
+                for hook in after_request_hooks:
+                    hook(stats, getattr(route, "endpoint", None))
+            finally:
+                _current.reset(token)
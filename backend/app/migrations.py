@@ -0,0 +1,73 @@
+"""Idempotent schema upgrade for existing databases: ``python -m app migrate``.
+
+``create_all`` only adds missing tables, so a database created before a model
+change keeps its old shape. ``migrate`` brings it up to the models:
+
+1. missing tables (closed months and the archive tables, change events,
+   idempotency keys, cron checkpoints);
+2. missing indexes (``db.ensure_indexes``);
+3. foreign keys whose ON DELETE rule differs from the model, on PostgreSQL
+   (SQLite cannot alter constraints; recreate a local database instead);
+4. the ``*_all`` union views over hot and archived rows;
+5. the trigram search indexes, on PostgreSQL.
+
+Every step checks before it changes anything, so it is safe to repeat. Local
+servers run it at startup. Vercel functions never touch the schema, so run it
+against the production database before deploying a release that changes the
+models.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from . import models, partitions, search  # noqa: F401  (models registers every table on Base)
+from .db import Base, ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_tables(bind) -> list[str]:
+    existing = set(inspect(bind).get_table_names())
+    Base.metadata.create_all(bind=bind)
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+
+def ensure_foreign_keys(bind) -> list[str]:
+    """Re-create foreign keys whose ON DELETE rule differs from the model (PostgreSQL only)."""
+    if bind.dialect.name != "postgresql":
+        return []
+    changed = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            current = {tuple(fk["constrained_columns"]): fk for fk in inspector.get_foreign_keys(table.name)}
+            for constraint in table.foreign_key_constraints:
+                columns = [column.name for column in constraint.columns]
+                existing = current.get(tuple(columns))
+                rule = (constraint.ondelete or "NO ACTION").upper()
+                if existing is None or (existing["options"].get("ondelete") or "NO ACTION").upper() == rule:
+                    continue
+                referred = [element.column.name for element in constraint.elements]
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} DROP CONSTRAINT {existing['name']}, "
+                        f"ADD CONSTRAINT {existing['name']} FOREIGN KEY ({', '.join(columns)}) "
+                        f"REFERENCES {constraint.referred_table.name} ({', '.join(referred)}) ON DELETE {rule}"
+                    )
+                )
+                changed.append(f"{table.name}.{', '.join(columns)} ON DELETE {rule}")
+    return changed
+
+
+def migrate(bind) -> list[str]:
+    """Apply every step and describe what changed."""
+    applied = [f"created table {name}" for name in ensure_tables(bind)]
+    ensure_indexes(bind)
+    applied += [f"foreign key {change}" for change in ensure_foreign_keys(bind)]
+    partitions.ensure_partition_views(bind)
+    try:
+        search.ensure_search_indexes(bind)
+    except Exception as exc:
+        # optional: search falls back to in-memory matching without pg_trgm
+        logger.warning("Trigram search indexes unavailable, using in-memory search: %s", exc)
+    return applied
@@ -1,6 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from .db import Base
@@ -14,7 +27,10 @@ class Vendor(Base):
     email = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    pair_sheets = relationship("PairSheet", back_populates="vendor", cascade="all, delete-orphan")
+    # dependents are removed by ON DELETE rules and ``main.delete_pair_sheets``, never loaded to be deleted
+    pair_sheets = relationship("PairSheet", back_populates="vendor", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (Index("ix_vendors_name_lower", func.lower(name)),)
 
 
 class Company(Base):
@@ -25,7 +41,9 @@ class Company(Base):
     address = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    pair_sheets = relationship("PairSheet", back_populates="company", cascade="all, delete-orphan")
+    pair_sheets = relationship("PairSheet", back_populates="company", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (Index("ix_companies_name_lower", func.lower(name)),)
 
 
 class Employee(Base):
@@ -39,21 +57,25 @@ class Employee(Base):
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    sheet_rows = relationship("SheetRow", back_populates="employee")
+    sheet_rows = relationship("SheetRow", back_populates="employee", passive_deletes="all")
+
+    __table_args__ = (Index("ix_employees_name_lower", func.lower(name)),)
 
 
 class PairSheet(Base):
     __tablename__ = "pair_sheets"
 
     id = Column(Integer, primary_key=True, index=True)
-    vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    vendor_id = Column(Integer, ForeignKey("vendors.id", ondelete="CASCADE"), nullable=False)
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     vendor = relationship("Vendor", back_populates="pair_sheets")
     company = relationship("Company", back_populates="pair_sheets")
-    rows = relationship("SheetRow", back_populates="pair_sheet", cascade="all, delete-orphan")
-    invoices = relationship("CombinedInvoice", back_populates="pair_sheet", cascade="all, delete-orphan")
+    rows = relationship("SheetRow", back_populates="pair_sheet", cascade="all, delete-orphan", passive_deletes=True)
+    invoices = relationship(
+        "CombinedInvoice", back_populates="pair_sheet", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     __table_args__ = (UniqueConstraint("vendor_id", "company_id", name="uq_pair_sheet_vendor_company"),)
 
@@ -62,9 +84,9 @@ class SheetRow(Base):
     __tablename__ = "sheet_rows"
 
     id = Column(Integer, primary_key=True, index=True)
-    pair_sheet_id = Column(Integer, ForeignKey("pair_sheets.id"), nullable=False)
+    pair_sheet_id = Column(Integer, ForeignKey("pair_sheets.id", ondelete="CASCADE"), nullable=False)
     month_key = Column(String, nullable=False)
-    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="RESTRICT"), nullable=False)
     role = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
     hours = Column(Float, nullable=False, default=0.0)
@@ -77,12 +99,18 @@ class SheetRow(Base):
     pair_sheet = relationship("PairSheet", back_populates="rows")
     employee = relationship("Employee", back_populates="sheet_rows")
 
+    # ids must never be reused: archived rows keep theirs (see partitions.py)
+    __table_args__ = (
+        Index("ix_sheet_rows_sheet_month", pair_sheet_id, month_key, sort_order),
+        {"sqlite_autoincrement": True},
+    )
+
 
 class CombinedInvoice(Base):
     __tablename__ = "combined_invoices"
 
     id = Column(Integer, primary_key=True, index=True)
-    pair_sheet_id = Column(Integer, ForeignKey("pair_sheets.id"), nullable=False)
+    pair_sheet_id = Column(Integer, ForeignKey("pair_sheets.id", ondelete="CASCADE"), nullable=False)
     month_key = Column(String, nullable=False)
     invoice_number = Column(String, unique=True, nullable=False)
     pdf_path = Column(String, nullable=True)
@@ -96,17 +124,21 @@ class CombinedInvoice(Base):
     paid_at = Column(DateTime, nullable=True)
 
     pair_sheet = relationship("PairSheet", back_populates="invoices")
-    lines = relationship("CombinedInvoiceLine", back_populates="invoice", cascade="all, delete-orphan")
+    lines = relationship("CombinedInvoiceLine", back_populates="invoice", cascade="all, delete-orphan", passive_deletes=True)
 
-    __table_args__ = (UniqueConstraint("pair_sheet_id", "month_key", name="uq_combined_invoice_pair_month"),)
+    __table_args__ = (
+        UniqueConstraint("pair_sheet_id", "month_key", name="uq_combined_invoice_pair_month"),
+        Index("ix_combined_invoices_paid_sent_at", paid, sent_at),  # receivables aging
+        {"sqlite_autoincrement": True},
+    )
 
 
 class CombinedInvoiceLine(Base):
     __tablename__ = "combined_invoice_lines"
 
     id = Column(Integer, primary_key=True, index=True)
-    combined_invoice_id = Column(Integer, ForeignKey("combined_invoices.id"), nullable=False)
-    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
+    combined_invoice_id = Column(Integer, ForeignKey("combined_invoices.id", ondelete="CASCADE"), nullable=False)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="SET NULL"), nullable=True)  # name is kept
     employee_name = Column(String, nullable=False)
     role = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
@@ -117,3 +149,163 @@ class CombinedInvoiceLine(Base):
     sort_order = Column(Integer, nullable=False, default=0)
 
     invoice = relationship("CombinedInvoice", back_populates="lines")
+
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+
+# Archived months (see ``partitions.py``). The archive tables mirror the hot tables'
+# columns and relationship names so serializers and query builders accept either.
+# They carry no foreign keys and key on (id, month_key): PostgreSQL requires the
+# partition key in every unique constraint of a partitioned table.
+ARCHIVE_PARTITIONING = {"postgresql_partition_by": "RANGE (month_key)"}
+
+
+class ClosedMonth(Base):
+    __tablename__ = "closed_months"
+
+    month_key = Column(String, primary_key=True)
+    sheet_rows = Column(Integer, nullable=False, default=0)
+    invoices = Column(Integer, nullable=False, default=0)
+    invoice_lines = Column(Integer, nullable=False, default=0)
+    closed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SheetRowArchive(Base):
+    __tablename__ = "sheet_rows_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    month_key = Column(String, primary_key=True)
+    pair_sheet_id = Column(Integer, nullable=False)
+    employee_id = Column(Integer, nullable=False)
+    role = Column(String, nullable=True)
+    notes = Column(Text, nullable=True)
+    hours = Column(Float, nullable=False, default=0.0)
+    rate = Column(Float, nullable=False, default=0.0)
+    comments = Column(Text, nullable=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    pair_sheet = relationship(
+        "PairSheet", primaryjoin="foreign(SheetRowArchive.pair_sheet_id) == PairSheet.id", viewonly=True
+    )
+    employee = relationship(
+        "Employee", primaryjoin="foreign(SheetRowArchive.employee_id) == Employee.id", viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_sheet_rows_archive_sheet_month", pair_sheet_id, month_key, sort_order),
+        ARCHIVE_PARTITIONING,
+    )
+
+
+class CombinedInvoiceArchive(Base):
+    __tablename__ = "combined_invoices_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    month_key = Column(String, primary_key=True)
+    pair_sheet_id = Column(Integer, nullable=False)
+    invoice_number = Column(String, nullable=False)
+    pdf_path = Column(String, nullable=True)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    sent = Column(Boolean, default=False)
+    paid = Column(Boolean, default=False)
+    manual_recipients = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    paid_at = Column(DateTime, nullable=True)
+
+    pair_sheet = relationship(
+        "PairSheet", primaryjoin="foreign(CombinedInvoiceArchive.pair_sheet_id) == PairSheet.id", viewonly=True
+    )
+    lines = relationship(
+        "CombinedInvoiceLineArchive",
+        primaryjoin=(
+            "and_(foreign(CombinedInvoiceLineArchive.combined_invoice_id) == CombinedInvoiceArchive.id, "
+            "foreign(CombinedInvoiceLineArchive.month_key) == CombinedInvoiceArchive.month_key)"
+        ),
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        Index("ix_combined_invoices_archive_sheet_month", pair_sheet_id, month_key),
+        Index("ix_combined_invoices_archive_paid_sent_at", paid, sent_at),
+        ARCHIVE_PARTITIONING,
+    )
+
+
+class CombinedInvoiceLineArchive(Base):
+    __tablename__ = "combined_invoice_lines_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    month_key = Column(String, primary_key=True)  # the invoice's month, denormalized as the partition key
+    combined_invoice_id = Column(Integer, nullable=False)
+    employee_id = Column(Integer, nullable=True)
+    employee_name = Column(String, nullable=False)
+    role = Column(String, nullable=True)
+    notes = Column(Text, nullable=True)
+    hours = Column(Float, nullable=False, default=0.0)
+    rate = Column(Float, nullable=False, default=0.0)
+    amount = Column(Float, nullable=False, default=0.0)
+    comments = Column(Text, nullable=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_combined_invoice_lines_archive_invoice", combined_invoice_id, month_key),
+        ARCHIVE_PARTITIONING,
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String, nullable=False, default="in_progress")  # in_progress | completed
+    response_status = Column(Integer, nullable=True)
+    response_media_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (UniqueConstraint("username", "key", name="uq_idempotency_user_key"),)
+
+
+class CronCheckpoint(Base):
+    __tablename__ = "cron_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job = Column(String, nullable=False)
+    run_key = Column(String, nullable=False)
+    cursor = Column(Integer, nullable=False, default=0)  # last processed item id
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    done = Column(Boolean, nullable=False, default=False)
+    last_error = Column(Text, nullable=True)
+    leased_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (UniqueConstraint("job", "run_key", name="uq_cron_checkpoint_job_run"),)
+
+
+class ChangeEvent(Base):
+    """A committed change pushed to ``GET /events`` subscribers (see ``events``)."""
+
+    __tablename__ = "change_events"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # e.g. sheet.saved, invoice.sent, invoice.rendered, month.archived
+    pair_sheet_id = Column(Integer, nullable=True)  # no foreign keys: events outlive what they describe
+    month_key = Column(String(7), nullable=True)
+    invoice_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # ids are the stream's Last-Event-ID, so they must never be reused after a purge
+    __table_args__ = ({"sqlite_autoincrement": True},)
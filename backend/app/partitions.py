@@ -0,0 +1,239 @@
+"""Hot/cold split of the month-keyed workbook tables.
+
+``sheet_rows``, ``combined_invoices`` and ``combined_invoice_lines`` only hold
+open months. ``archive_month`` moves a finished month into the ``*_archive``
+tables in one transaction and records it in ``closed_months``;
+``reopen_month`` moves it back. On PostgreSQL the archive tables are
+declaratively partitioned by ``RANGE (month_key)`` with one partition per
+year, created when the first month of that year is archived, so a month
+filter only touches one partition. Elsewhere they are plain tables with the
+same ``(pair_sheet_id, month_key)`` indexes.
+
+The hot tables stay unpartitioned: ``invoice_number`` is unique across all
+months and invoice lines reference invoices by id, and PostgreSQL allows
+neither on a partitioned table without adding ``month_key`` to both keys.
+
+Single-month reads pick their tables with ``month_tables`` (one primary key
+lookup). Reads across months use ``union``, the same UNION ALL of hot and
+archive rows that backs the ``sheet_rows_all``, ``combined_invoices_all``
+and ``combined_invoice_lines_all`` views for ad-hoc SQL, or run ``branches``
+one at a time where a join over the union would be slow (SQLite materializes
+compound subqueries).
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, text, union_all
+from sqlalchemy.orm import Session
+
+from . import events, models, schemas
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MonthTables:
+    closed: bool
+    sheet_row: type
+    invoice: type
+    invoice_line: type
+
+
+OPEN = MonthTables(False, models.SheetRow, models.CombinedInvoice, models.CombinedInvoiceLine)
+CLOSED = MonthTables(True, models.SheetRowArchive, models.CombinedInvoiceArchive, models.CombinedInvoiceLineArchive)
+VIEWS = {
+    "sheet_rows": "sheet_rows_all",
+    "invoices": "combined_invoices_all",
+    "invoice_lines": "combined_invoice_lines_all",
+}
+
+
+def current_month_key() -> str:
+    return datetime.utcnow().strftime("%Y-%m")
+
+
+def month_tables(db: Session, month_key: str) -> MonthTables:
+    closed = db.query(models.ClosedMonth.month_key).filter(models.ClosedMonth.month_key == month_key).first()
+    return CLOSED if closed else OPEN
+
+
+def ensure_open(db: Session, month_key: str) -> None:
+    if month_tables(db, month_key).closed:
+        raise HTTPException(status_code=409, detail=f"{month_key} is archived; reopen it before making changes")
+
+
+def _selects(kind: str) -> list:
+    """The hot and the archive SELECT of ``kind`` with matching columns."""
+    if kind == "sheet_rows":
+        names = [column.name for column in models.SheetRow.__table__.columns]
+        return [
+            select(*(table.c[name] for name in names))
+            for table in (models.SheetRow.__table__, models.SheetRowArchive.__table__)
+        ]
+    if kind == "invoices":
+        names = [column.name for column in models.CombinedInvoice.__table__.columns]
+        return [
+            select(*(table.c[name] for name in names))
+            for table in (models.CombinedInvoice.__table__, models.CombinedInvoiceArchive.__table__)
+        ]
+    # invoice lines carry their invoice's month and pair sheet so reports need no second join
+    line, invoice = models.CombinedInvoiceLine.__table__, models.CombinedInvoice.__table__
+    line_archive, invoice_archive = models.CombinedInvoiceLineArchive.__table__, models.CombinedInvoiceArchive.__table__
+    names = [column.name for column in line.columns]
+    hot = select(*(line.c[name] for name in names), invoice.c.month_key, invoice.c.pair_sheet_id).join_from(
+        line, invoice, line.c.combined_invoice_id == invoice.c.id
+    )
+    cold = select(
+        *(line_archive.c[name] for name in names), line_archive.c.month_key, invoice_archive.c.pair_sheet_id
+    ).join_from(
+        line_archive,
+        invoice_archive,
+        (line_archive.c.combined_invoice_id == invoice_archive.c.id)
+        & (line_archive.c.month_key == invoice_archive.c.month_key),
+    )
+    return [hot, cold]
+
+
+def branches(
+    kind: str,
+    start: str | None = None,
+    end: str | None = None,
+    pair_sheet_id: int | None = None,
+    pair_sheet_ids: list[int] | None = None,
+) -> list:
+    """The hot and the archive SELECT of ``kind`` limited to the month range (and pair sheets)."""
+    selects = []
+    for statement in _selects(kind):
+        columns = statement.selected_columns
+        if start:
+            statement = statement.where(columns.month_key >= start)
+        if end:
+            statement = statement.where(columns.month_key <= end)
+        if pair_sheet_id is not None:
+            statement = statement.where(columns.pair_sheet_id == pair_sheet_id)
+        if pair_sheet_ids is not None:
+            statement = statement.where(columns.pair_sheet_id.in_(pair_sheet_ids))
+        selects.append(statement)
+    return selects
+
+
+def union(
+    kind: str,
+    start: str | None = None,
+    end: str | None = None,
+    name: str | None = None,
+    pair_sheet_id: int | None = None,
+    pair_sheet_ids: list[int] | None = None,
+):
+    """Hot and archived rows of ``kind`` (sheet_rows, invoices, invoice_lines) as one subquery.
+
+    The filters are applied inside each branch so indexes and partition pruning apply.
+    Pass ``name`` when a statement uses more than one union of the same kind.
+    """
+    return union_all(*branches(kind, start, end, pair_sheet_id, pair_sheet_ids)).subquery(name or VIEWS[kind])
+
+
+def ensure_partition_views(bind) -> None:
+    """Create or refresh the ``*_all`` views over hot and archived rows."""
+    create = "CREATE OR REPLACE VIEW" if bind.dialect.name == "postgresql" else "CREATE VIEW IF NOT EXISTS"
+    with bind.begin() as conn:
+        for kind, view in VIEWS.items():
+            body = union_all(*_selects(kind)).compile(dialect=bind.dialect)
+            conn.execute(text(f"{create} {view} AS {body}"))
+
+
+def ensure_year_partitions(db: Session, month_key: str) -> None:
+    """On PostgreSQL, create the archive tables' partitions for ``month_key``'s year."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    year = int(month_key[:4])
+    for model in (models.SheetRowArchive, models.CombinedInvoiceArchive, models.CombinedInvoiceLineArchive):
+        table = model.__tablename__
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {table}_{year:04d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year:04d}-01') TO ('{year + 1:04d}-01')"
+            )
+        )
+
+
+def _move(db: Session, source, target, where, **extra) -> int:
+    """DELETE ... RETURNING from ``source`` and insert exactly those rows into ``target``.
+
+    Moving what the DELETE returned (rather than copying with INSERT ... SELECT first)
+    cannot drop rows written between the two statements.
+    """
+    source, target = source.__table__, target.__table__
+    columns = [column for column in source.columns if column.name in target.columns]
+    rows = db.execute(delete(source).where(where).returning(*columns)).all()
+    if rows:
+        db.execute(insert(target), [{**row._asdict(), **extra} for row in rows])
+    return len(rows)
+
+
+def archive_month(db: Session, month_key: str, force: bool = False) -> schemas.MonthArchiveOut:
+    """Move ``month_key``'s sheet rows, invoices and lines to the archive tables; safe to repeat."""
+    if month_key >= current_month_key():
+        raise HTTPException(status_code=400, detail="Only months before the current one can be archived")
+    if month_tables(db, month_key).closed:
+        return schemas.MonthArchiveOut(month_key=month_key, archived=True, sheet_rows=0, invoices=0, invoice_lines=0)
+
+    invoice = models.CombinedInvoice
+    if not force:
+        unsettled = (
+            db.query(func.count(invoice.id))
+            .filter(invoice.month_key == month_key, ~(invoice.sent.is_(True) & invoice.paid.is_(True)))
+            .scalar()
+        )
+        if unsettled:
+            raise HTTPException(
+                status_code=409,
+                detail=f"{unsettled} invoice(s) for {month_key} are not sent and paid yet; use force to archive anyway",
+            )
+
+    ensure_year_partitions(db, month_key)
+    month_invoice_ids = select(invoice.id).where(invoice.month_key == month_key).scalar_subquery()
+    counts = {
+        "invoice_lines": _move(
+            db,
+            models.CombinedInvoiceLine,
+            models.CombinedInvoiceLineArchive,
+            models.CombinedInvoiceLine.combined_invoice_id.in_(month_invoice_ids),
+            month_key=month_key,
+        ),
+        "invoices": _move(db, invoice, models.CombinedInvoiceArchive, invoice.month_key == month_key),
+        "sheet_rows": _move(db, models.SheetRow, models.SheetRowArchive, models.SheetRow.month_key == month_key),
+    }
+    db.add(models.ClosedMonth(month_key=month_key, **counts))
+    events.emit(db, "month.archived", month_key=month_key)
+    db.commit()
+    logger.info("Archived %s: %s", month_key, counts)
+    return schemas.MonthArchiveOut(month_key=month_key, archived=True, **counts)
+
+
+def reopen_month(db: Session, month_key: str) -> schemas.MonthArchiveOut:
+    """Move an archived month back into the hot tables; a month that is not archived is left alone."""
+    if not month_tables(db, month_key).closed:
+        return schemas.MonthArchiveOut(month_key=month_key, archived=False, sheet_rows=0, invoices=0, invoice_lines=0)
+    counts = {
+        # invoices before their lines: the hot lines reference them
+        "invoices": _move(
+            db, models.CombinedInvoiceArchive, models.CombinedInvoice, models.CombinedInvoiceArchive.month_key == month_key
+        ),
+        "invoice_lines": _move(
+            db,
+            models.CombinedInvoiceLineArchive,
+            models.CombinedInvoiceLine,
+            models.CombinedInvoiceLineArchive.month_key == month_key,
+        ),
+        "sheet_rows": _move(
+            db, models.SheetRowArchive, models.SheetRow, models.SheetRowArchive.month_key == month_key
+        ),
+    }
+    db.execute(delete(models.ClosedMonth).where(models.ClosedMonth.month_key == month_key))
+    events.emit(db, "month.reopened", month_key=month_key)
+    db.commit()
+    logger.info("Reopened %s: %s", month_key, counts)
+    return schemas.MonthArchiveOut(month_key=month_key, archived=False, **counts)
@@ -0,0 +1,59 @@
+"""Query builders that load exactly the object graph each hot path walks.
+
+Many-to-one hops (``PairSheet.vendor/company``, ``SheetRow.employee``,
+``CombinedInvoice.pair_sheet``) are joined into the parent query; the
+one-to-many ``CombinedInvoice.lines`` collection uses selectin loading so it
+costs one extra statement per query instead of one per invoice.
+
+Builders that take a ``model`` accept the archive classes too (see
+``partitions.month_tables``); they share the hot classes' attribute names.
+"""
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+
+from . import models
+
+
+def pair_sheets_query(db: Session) -> Query:
+    """Pair sheets with vendor and company joined in."""
+    return db.query(models.PairSheet).options(
+        joinedload(models.PairSheet.vendor),
+        joinedload(models.PairSheet.company),
+    )
+
+
+def sheet_rows_query(db: Session, model=models.SheetRow) -> Query:
+    """Sheet rows with their employee joined in (``serialize_row`` reads ``row.employee.name``)."""
+    return db.query(model).options(joinedload(model.employee))
+
+
+def month_rows_query(db: Session, pair_sheet_id: int, month_key: str, model=models.SheetRow) -> Query:
+    return (
+        sheet_rows_query(db, model)
+        .filter(model.pair_sheet_id == pair_sheet_id, model.month_key == month_key)
+        .order_by(model.sort_order.asc(), model.id.asc())
+    )
+
+
+def invoices_query(
+    db: Session,
+    with_vendor: bool = True,
+    with_company: bool = True,
+    with_lines: bool = False,
+    model=models.CombinedInvoice,
+) -> Query:
+    """Invoices with their pair sheet and, on request, vendor, company and lines."""
+    pair_sheet = joinedload(model.pair_sheet)
+    options = [pair_sheet]
+    if with_vendor:
+        options.append(pair_sheet.joinedload(models.PairSheet.vendor))
+    if with_company:
+        options.append(pair_sheet.joinedload(models.PairSheet.company))
+    if with_lines:
+        options.append(selectinload(model.lines))
+    return db.query(model).options(*options)
+
+
+def month_invoice(
+    db: Session, pair_sheet_id: int, month_key: str, model=models.CombinedInvoice
+) -> models.CombinedInvoice | None:
+    return db.query(model).filter(model.pair_sheet_id == pair_sheet_id, model.month_key == month_key).first()
@@ -0,0 +1,95 @@
+"""N+1 detection and per-route SQL budgets for debug and test runs.
+
+Enabled with ``QUERY_GUARD=log`` or ``QUERY_GUARD=raise`` (``DEBUG`` implies
+``log``). Within one request the guard counts lazy relationship loads by shape
+(owner class, relationship, target class); once the same shape repeats
+``QUERY_GUARD_REPEAT_LIMIT`` times it is reported as an N+1 fan-out. Routes
+declare their statement budget with ``@query_budget(n)`` directly under the
+route decorator, and requests that issue more statements than that are
+reported the same way.
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryGuardError(RuntimeError):
+    pass
+
+
+def guard_mode() -> str:
+    mode = (settings.QUERY_GUARD or ("log" if settings.DEBUG else "off")).lower()
+    return mode if mode in ("log", "raise") else "off"
+
+
+def query_budget(max_statements: int | None):
+    """Declare the most SQL statements a route may issue per request.
+
+    ``None`` marks routes whose statement count scales with the request payload
+    (e.g. saving N rows); only lazy-load fan-out is checked for those.
+    """
+
+    def decorator(func):
+        func.__query_budget__ = max_statements
+        return func
+
+    return decorator
+
+
+def report(message: str) -> None:
+    if guard_mode() == "raise":
+        raise QueryGuardError(message)
+    logger.warning(message)
+
+
+def _lazy_load_shape(orm_execute_state) -> str | None:
+    if not orm_execute_state.is_relationship_load:
+        return None
+    state = orm_execute_state.lazy_loaded_from
+    if state is None:
+        return None
+    owner = state.class_.__name__
+    path = orm_execute_state.loader_strategy_path
+    relationship = path[-1].key if path is not None and len(path) else "?"
+    target = orm_execute_state.bind_mapper.class_.__name__ if orm_execute_state.bind_mapper else "?"
+    return f"{owner}.{relationship} -> {target}"
+
+
+def _on_orm_execute(orm_execute_state) -> None:
+    stats = metrics.current_stats()
+    if stats is None or guard_mode() == "off":
+        return
+    shape = _lazy_load_shape(orm_execute_state)
+    if shape is None:
+        return
+    count = stats.lazy_loads.get(shape, 0) + 1
+    stats.lazy_loads[shape] = count
+    if count == settings.QUERY_GUARD_REPEAT_LIMIT:
+        report(
+            f"N+1 query pattern in {stats.method} {stats.path}: lazy load {shape} "
+            f"repeated {count} times; add an eager-loading option to the query"
+        )
+
+
+def check_budget(stats: metrics.RequestStats, endpoint) -> None:
+    if guard_mode() == "off" or endpoint is None:
+        return
+    budget = getattr(endpoint, "__query_budget__", None)
+    if budget is not None and stats.sql_count > budget:
+        report(
+            f"{stats.method} {stats.route} issued {stats.sql_count} SQL statements, "
+            f"over its budget of {budget}"
+        )
+
+
+def install() -> None:
+    if not event.contains(Session, "do_orm_execute", _on_orm_execute):
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
+    if check_budget not in metrics.after_request_hooks:
+        metrics.after_request_hooks.append(check_budget)
@@ -0,0 +1,248 @@
+"""Hours and amount pivot reports across all pair sheets.
+
+``load_columns`` pulls one row per sheet row (or invoice line) for the month
+range, with one query for the hot table and one for the archive, and
+transposes the result into column arrays.
+``pivot`` then groups them by a row and a column dimension (employee,
+company, vendor or month). With NumPy the grouping is vectorized:
+``np.unique`` turns keys into dense codes, and one ``np.bincount`` per measure
+fills the whole matrix. Without NumPy, ``pivot_python`` does the same work
+with dicts and gives identical results.
+"""
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models, partitions
+
+DIMENSIONS = ("employee", "company", "vendor", "month")
+SOURCES = ("sheets", "invoices")
+LABEL_IN_LIMIT = 1000  # above this many keys, load every name instead of a long IN list
+
+_numpy: Any = None
+
+
+def numpy_module():
+    """NumPy when installed (imported on first report to keep the API cold start lean), else None."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def month_range(start: str, end: str) -> list[str]:
+    year, month = (int(part) for part in start.split("-"))
+    keys = []
+    while f"{year:04d}-{month:02d}" <= end:
+        keys.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return keys
+
+
+@dataclass
+class Pivot:
+    """Grouped matrices (rows x columns) and their totals, rounded to cents."""
+
+    row_keys: list
+    col_keys: list
+    hours: list[list[float]]
+    amount: list[list[float]]
+    row_hours: list[float]
+    row_amount: list[float]
+    col_hours: list[float]
+    col_amount: list[float]
+    hours_delta: list[list[float | None]] | None = None  # per row, vs the previous column
+    amount_delta: list[list[float | None]] | None = None
+
+
+def _dimension_columns(source_rows, source: str):
+    row = source_rows.c
+    dimensions = {
+        # invoice lines keep the employee's name even after the employee is deleted
+        "employee": row.employee_id if source == "sheets" else row.employee_name,
+        "company": models.PairSheet.company_id,
+        "vendor": models.PairSheet.vendor_id,
+        "month": row.month_key,
+    }
+    if source == "sheets":
+        return dimensions, row.hours, row.hours * row.rate
+    return dimensions, row.hours, row.amount
+
+
+def load_columns(
+    db: Session, source: str, rows_by: str, columns_by: str, start: str | None, end: str | None
+) -> tuple[tuple, tuple, tuple, tuple]:
+    """Row keys, column keys, hours and amounts for every source row in the range, as parallel tuples.
+
+    Hot and archived months are read with one statement each rather than one over their
+    UNION ALL, which SQLite would materialize before the join.
+    """
+    rows = []
+    kind = "sheet_rows" if source == "sheets" else "invoice_lines"
+    for branch in partitions.branches(kind, start, end):
+        source_rows = branch.subquery()
+        dimensions, hours, amount = _dimension_columns(source_rows, source)
+        statement = (
+            select(dimensions[rows_by], dimensions[columns_by], hours, amount)
+            .select_from(source_rows)
+            .join(models.PairSheet, models.PairSheet.id == source_rows.c.pair_sheet_id)
+        )
+        # plain ids, strings and floats need no result processing, so read the driver's tuples
+        # directly: building ORM/Core Row objects costs more than the fetch itself on large ranges
+        result = db.connection().execute(statement)
+        try:
+            rows.extend(result.cursor.fetchall())
+        finally:
+            result.close()
+    if not rows:
+        return (), (), (), ()
+    return tuple(zip(*rows))
+
+
+def factorize(values, keys: list | None = None) -> tuple[list, Any]:
+    """Sorted distinct keys (or the given ``keys``) and each value's index into them, as an array."""
+    np = numpy_module()
+    if keys is None and values and not isinstance(values[0], str):
+        unique, codes = np.unique(np.fromiter(values, dtype=np.int64, count=len(values)), return_inverse=True)
+        return unique.tolist(), codes.reshape(-1)
+    # strings (months, invoice employee names) are few distinct values: a dict lookup per value
+    # is several times faster than sorting a fixed-width unicode array
+    keys = sorted(set(values)) if keys is None else keys
+    positions = {key: idx for idx, key in enumerate(keys)}
+    return keys, np.fromiter(map(positions.__getitem__, values), dtype=np.intp, count=len(values))
+
+
+def pivot_numpy(row_values, col_values, hours, amount, col_spine: list | None = None) -> Pivot:
+    np = numpy_module()
+    row_keys, row_codes = factorize(row_values)
+    col_keys, col_codes = factorize(col_values, col_spine)
+    shape = (len(row_keys), len(col_keys))
+    flat = row_codes * shape[1] + col_codes
+    size = shape[0] * shape[1]
+    hours_matrix = np.bincount(flat, weights=np.fromiter(hours, dtype=float, count=len(hours)), minlength=size)
+    amount_matrix = np.bincount(flat, weights=np.fromiter(amount, dtype=float, count=len(amount)), minlength=size)
+    hours_matrix, amount_matrix = hours_matrix.reshape(shape), amount_matrix.reshape(shape)
+
+    def cents(values):
+        return np.round(values, 2).tolist()
+
+    return Pivot(
+        row_keys=row_keys,
+        col_keys=list(col_keys),
+        hours=cents(hours_matrix),
+        amount=cents(amount_matrix),
+        row_hours=cents(hours_matrix.sum(axis=1)),
+        row_amount=cents(amount_matrix.sum(axis=1)),
+        col_hours=cents(hours_matrix.sum(axis=0)),
+        col_amount=cents(amount_matrix.sum(axis=0)),
+        hours_delta=[[None, *row] for row in cents(np.diff(hours_matrix, axis=1))],
+        amount_delta=[[None, *row] for row in cents(np.diff(amount_matrix, axis=1))],
+    )
+
+
+def pivot_python(row_values, col_values, hours, amount, col_spine: list | None = None) -> Pivot:
+    cells: dict[tuple, list[float]] = {}
+    for row_key, col_key, row_hours, row_amount in zip(row_values, col_values, hours, amount):
+        cell = cells.get((row_key, col_key))
+        if cell is None:
+            cells[(row_key, col_key)] = [float(row_hours), float(row_amount)]
+        else:
+            cell[0] += row_hours
+            cell[1] += row_amount
+    row_keys = sorted({key[0] for key in cells})
+    col_keys = col_spine if col_spine is not None else sorted({key[1] for key in cells})
+    hours_matrix = [[cells.get((row, col), (0.0, 0.0))[0] for col in col_keys] for row in row_keys]
+    amount_matrix = [[cells.get((row, col), (0.0, 0.0))[1] for col in col_keys] for row in row_keys]
+
+    def cents(values):
+        return [round(value, 2) for value in values]
+
+    def deltas(matrix):
+        return [[None, *cents(row[idx] - row[idx - 1] for idx in range(1, len(row)))] for row in matrix]
+
+    def column_sums(matrix):
+        return cents(sum(column) for column in zip(*matrix)) if row_keys else [0.0] * len(col_keys)
+
+    return Pivot(
+        row_keys=row_keys,
+        col_keys=list(col_keys),
+        hours=[cents(row) for row in hours_matrix],
+        amount=[cents(row) for row in amount_matrix],
+        row_hours=cents(sum(row) for row in hours_matrix),
+        row_amount=cents(sum(row) for row in amount_matrix),
+        col_hours=column_sums(hours_matrix),
+        col_amount=column_sums(amount_matrix),
+        hours_delta=deltas(hours_matrix),
+        amount_delta=deltas(amount_matrix),
+    )
+
+
+def pivot(row_values, col_values, hours, amount, col_spine: list | None = None) -> tuple[Pivot, str]:
+    if numpy_module() is not None and len(row_values):
+        return pivot_numpy(row_values, col_values, hours, amount, col_spine), "numpy"
+    return pivot_python(row_values, col_values, hours, amount, col_spine), "python"
+
+
+def _labels(db: Session, source: str, dimension: str, keys: list) -> dict:
+    if dimension == "month" or (dimension == "employee" and source == "invoices"):
+        return {key: key for key in keys}
+    model = {"employee": models.Employee, "company": models.Company, "vendor": models.Vendor}[dimension]
+    query = db.query(model.id, model.name)
+    if len(keys) <= LABEL_IN_LIMIT:
+        query = query.filter(model.id.in_(keys))
+    return dict(query)
+
+
+def pivot_report(
+    db: Session, source: str, rows_by: str, columns_by: str, start: str | None = None, end: str | None = None
+) -> dict:
+    row_values, col_values, hours, amount = load_columns(db, source, rows_by, columns_by, start, end)
+    col_spine = month_range(start, end) if columns_by == "month" and start and end else None
+    result, engine = pivot(row_values, col_values, hours, amount, col_spine)
+    row_labels = _labels(db, source, rows_by, result.row_keys)
+    col_labels = _labels(db, source, columns_by, result.col_keys)
+    by_month = columns_by == "month"
+
+    rows = [
+        {
+            "key": str(key),
+            "label": row_labels.get(key, str(key)),
+            "hours": result.hours[idx],
+            "amount": result.amount[idx],
+            "total_hours": result.row_hours[idx],
+            "total_amount": result.row_amount[idx],
+            "hours_delta": result.hours_delta[idx] if by_month else None,
+            "amount_delta": result.amount_delta[idx] if by_month else None,
+        }
+        for idx, key in enumerate(result.row_keys)
+    ]
+    rows.sort(key=lambda row: row["label"].lower())
+    column_amount = result.col_amount
+    return {
+        "source": source,
+        "rows_by": rows_by,
+        "columns_by": columns_by,
+        "start": start,
+        "end": end,
+        "engine": engine,
+        "source_rows": len(row_values),
+        "columns": [{"key": str(key), "label": col_labels.get(key, str(key))} for key in result.col_keys],
+        "rows": rows,
+        "column_hours": result.col_hours,
+        "column_amount": column_amount,
+        "column_amount_delta": (
+            [None if idx == 0 else round(value - column_amount[idx - 1], 2) for idx, value in enumerate(column_amount)]
+            if by_month
+            else None
+        ),
+        "total_hours": round(sum(result.col_hours), 2),
+        "total_amount": round(sum(result.col_amount), 2),
+    }
@@ -51,6 +51,15 @@ class EmployeeOut(BaseModel):
         from_attributes = True
 
 
+class SearchResultOut(BaseModel):
+    kind: str
+    id: int
+    name: str
+    score: float
+    match: str
+    hourly_rate: Optional[float] = None
+
+
 class PairSheetCreate(BaseModel):
     vendor_id: int
     company_id: int
@@ -137,6 +146,24 @@ class WorkbookSheetDetailOut(BaseModel):
     invoice: Optional[CombinedInvoiceOut] = None
 
 
+class SheetMonthOut(BaseModel):
+    month_key: str
+    rows: List[SheetRowOut]
+    month_total: float
+    month_hours: float
+    row_count: int
+    invoice: Optional[CombinedInvoiceOut] = None
+
+
+class WorkbookSheetRangeOut(BaseModel):
+    sheet: PairSheetOut
+    from_month_key: str
+    to_month_key: str
+    months: List[SheetMonthOut]  # every month of the range, oldest first
+    total_amount: float
+    total_hours: float
+
+
 class CombinedInvoiceSendIn(BaseModel):
     recipients: List[str]
 
@@ -150,6 +177,15 @@ class SummaryCardOut(BaseModel):
     value: float
 
 
+class WorkbookBootstrapOut(BaseModel):
+    month_key: str
+    vendors: List[VendorOut]
+    companies: List[CompanyOut]
+    employees: Optional[List[EmployeeOut]] = None
+    sheets: List[PairSheetOut]
+    summary: List[SummaryCardOut]
+
+
 class CompanyBalanceOut(BaseModel):
     company: str
     total_amount: float
@@ -177,3 +213,131 @@ class PairBalanceOut(BaseModel):
 class EarningsPoint(BaseModel):
     month_key: str
     total_amount: float
+
+
+class TrendSeriesOut(BaseModel):
+    key: str
+    label: str
+    # one value per month of ``TrendsReportOut.months``
+    amount: List[float]
+    invoice_count: List[int]
+    rolling_3: List[float]  # this month and the two before
+    rolling_12: List[float]
+    previous_year: List[float]  # the same month a year earlier
+    yoy_change: List[float]
+    yoy_change_pct: List[Optional[float]]  # None when there was nothing a year earlier
+
+
+class TrendsReportOut(BaseModel):
+    by: str
+    start: str
+    end: str
+    engine: str
+    months: List[str]
+    series: List[TrendSeriesOut]
+
+
+class AgingBucketOut(BaseModel):
+    label: str
+    min_days: int
+    max_days: int | None  # None: open-ended oldest bucket
+
+
+class AgingRowOut(BaseModel):
+    id: int
+    name: str
+    amounts: list[float]  # outstanding amount per bucket, in ``AgingReportOut.buckets`` order
+    invoice_counts: list[int]
+    total_amount: float
+    invoice_count: int
+
+
+class AgingReportOut(BaseModel):
+    as_of: str
+    buckets: list[AgingBucketOut]
+    companies: list[AgingRowOut]
+    vendors: list[AgingRowOut]
+    amounts: list[float]
+    total_amount: float
+    invoice_count: int
+
+
+class CronJobOut(BaseModel):
+    job: str
+    run_key: str
+    status: str  # done | partial | busy | pending | skipped
+    processed: int = 0
+    failed: int = 0
+    cursor: Optional[int] = None
+
+
+class CronRunOut(BaseModel):
+    complete: bool
+    elapsed_ms: float
+    jobs: List[CronJobOut]
+
+
+class PivotColumnOut(BaseModel):
+    key: str
+    label: str
+
+
+class PivotRowOut(BaseModel):
+    key: str
+    label: str
+    hours: List[float]
+    amount: List[float]
+    total_hours: float
+    total_amount: float
+    hours_delta: Optional[List[Optional[float]]] = None  # vs the previous month; month columns only
+    amount_delta: Optional[List[Optional[float]]] = None
+
+
+class PivotReportOut(BaseModel):
+    source: str
+    rows_by: str
+    columns_by: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+    engine: str
+    source_rows: int
+    columns: List[PivotColumnOut]
+    rows: List[PivotRowOut]
+    column_hours: List[float]
+    column_amount: List[float]
+    column_amount_delta: Optional[List[Optional[float]]] = None
+    total_hours: float
+    total_amount: float
+
+
+class MonthRolloverIn(BaseModel):
+    from_month_key: Optional[str] = Field(default=None, pattern=r"^\d{4}-\d{2}$")  # default: each sheet's latest earlier month
+    zero_hours: bool = True
+
+
+class MonthRolloverOut(BaseModel):
+    month_key: str
+    from_month_key: Optional[str] = None  # as requested; null: each sheet copied its own latest earlier month
+    source_month_keys: List[str] = Field(default_factory=list)  # months rows were copied from; empty if none were
+    sheets: int
+    rows: int
+
+
+class MonthArchiveIn(BaseModel):
+    force: bool = False  # archive even if some invoices are not sent and paid yet
+
+
+class MonthArchiveOut(BaseModel):
+    month_key: str
+    archived: bool
+    sheet_rows: int  # rows moved by this call; 0 when the month was already in place
+    invoices: int
+    invoice_lines: int
+
+
+class DeleteOut(BaseModel):
+    deleted: int
+    pair_sheets: int = 0  # dependents removed with it, hot and archived months together
+    sheet_rows: int = 0
+    invoices: int = 0
+    invoice_lines: int = 0  # for an employee: lines that keep the name but drop the link
@@ -0,0 +1,329 @@
+"""Ranked typeahead search over employee, vendor and company names.
+
+On Postgres with ``pg_trgm`` the candidates come from trigram GIN indexes on
+``lower(name)``; elsewhere (SQLite, or Postgres without the extension) an
+in-memory n-gram index per kind is built from the table and cached. Both
+paths rank candidates with the same ``score`` function, so results do not
+depend on the backend: exact > prefix > word prefix > substring > fuzzy.
+"""
+import bisect
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session
+
+from . import models
+from .settings import settings
+
+KINDS = {
+    "employee": models.Employee,
+    "vendor": models.Vendor,
+    "company": models.Company,
+}
+KIND_ALIASES = {"employees": "employee", "vendors": "vendor", "companies": "company"}
+FUZZY_THRESHOLD = 0.3
+WORD_SEPARATORS = " -_.,"
+
+
+def parse_kinds(kinds: str | None) -> list[str]:
+    if not kinds:
+        return list(KINDS)
+    parsed: list[str] = []
+    for item in kinds.split(","):
+        kind = KIND_ALIASES.get(item.strip().lower(), item.strip().lower())
+        if kind in KINDS and kind not in parsed:
+            parsed.append(kind)
+    return parsed
+
+
+def trigrams(value: str) -> set[str]:
+    padded = f"  {value} "
+    return {padded[idx : idx + 3] for idx in range(len(padded) - 2)}
+
+
+def word_similarity(token: str, word: str) -> float:
+    if word.startswith(token):
+        return 1.0
+    if len(token) < 3:
+        return 0.0
+    token_grams, word_grams = trigrams(token), trigrams(word)
+    return len(token_grams & word_grams) / len(token_grams | word_grams)
+
+
+def fuzzy_similarity(query: str, lowered: str) -> float:
+    """Mean over query tokens of the best per-word similarity; 0 when any token has no match."""
+    words = lowered.split()
+    total = 0.0
+    for token in query.split():
+        best = max((word_similarity(token, word) for word in words), default=0.0)
+        if best < FUZZY_THRESHOLD:
+            return 0.0
+        total += best
+    return total / len(query.split())
+
+
+def word_starts(lowered: str):
+    """Positions after the first where a word begins, i.e. right after a separator."""
+    for position in range(1, len(lowered)):
+        if lowered[position - 1] in WORD_SEPARATORS and lowered[position] not in WORD_SEPARATORS:
+            yield position
+
+
+def score(query: str, name: str) -> tuple[float, str] | None:
+    """Rank ``name`` against a lower-cased, whitespace-normalized ``query``; None when it does not match."""
+    lowered = name.lower()
+    if lowered == query:
+        return 1.0, "exact"
+    if lowered.startswith(query):
+        return 0.9, "prefix"
+    # any word may start with the query, not only the one at its first occurrence
+    if any(lowered.startswith(query, position) for position in word_starts(lowered)):
+        return 0.8, "word_prefix"
+    if len(query) < 3:
+        return None
+    if query in lowered:
+        return 0.7, "substring"
+    similarity = fuzzy_similarity(query, lowered)
+    if similarity:
+        return round(0.6 * similarity, 4), "fuzzy"
+    return None
+
+
+@dataclass
+class Entry:
+    id: int
+    name: str
+    lowered: str
+    hourly_rate: float | None = None
+
+
+def _prefix_range(sorted_items: list, prefix: str):
+    start = bisect.bisect_left(sorted_items, (prefix,))
+    for item in sorted_items[start:]:
+        if not item[0].startswith(prefix):
+            break
+        yield item
+
+
+class NgramIndex:
+    """In-memory index answering ``score``-ranked queries without scanning every name.
+
+    Matches are gathered tier by tier and later tiers only run when the earlier
+    ones did not fill ``limit``: prefix matches come straight off a sorted name
+    list, word-prefix matches off a sorted list of each name's tails from every
+    word start, substring matches from the rarest trigram posting lists of the
+    full names, and fuzzy matches from a per-word vocabulary with its own
+    trigram postings, which stays small even when the name table is large.
+    """
+
+    def __init__(self, entries: list[Entry]):
+        self.entries = entries
+        self.sorted_names = sorted((entry.lowered, idx) for idx, entry in enumerate(entries))
+        self.word_tails = sorted(
+            (entry.lowered[position:], idx)
+            for idx, entry in enumerate(entries)
+            for position in word_starts(entry.lowered)
+        )
+        self.postings: dict[str, list[int]] = {}
+        self.words: dict[str, list[int]] = {}
+        for idx, entry in enumerate(entries):
+            for gram in trigrams(entry.lowered):
+                self.postings.setdefault(gram, []).append(idx)
+            for word in set(entry.lowered.split()):
+                self.words.setdefault(word, []).append(idx)
+        self.sorted_words = sorted((word,) for word in self.words)
+        self.word_postings: dict[str, list[str]] = {}
+        for word in self.words:
+            for gram in trigrams(word):
+                self.word_postings.setdefault(gram, []).append(word)
+        self.built_at = time.monotonic()
+
+    def _rarest(self, postings: dict, grams) -> list[str]:
+        return sorted(grams, key=lambda gram: len(postings.get(gram, ())))
+
+    def _substring_candidates(self, query: str) -> set[int]:
+        # every name containing the query contains each of its inner trigrams
+        inner = self._rarest(self.postings, {query[idx : idx + 3] for idx in range(len(query) - 2)})
+        found = set(self.postings.get(inner[0], ()))
+        if len(inner) > 1 and found:
+            found.intersection_update(self.postings.get(inner[1], ()))
+        return found
+
+    def _similar_words(self, token: str) -> dict[str, float]:
+        similar = {item[0]: 1.0 for item in _prefix_range(self.sorted_words, token)}
+        if len(token) < 3:
+            return similar
+        # a word at FUZZY_THRESHOLD shares ``needed`` trigrams, so it is listed under
+        # one of the ``len - needed + 1`` rarest grams of the token
+        grams = self._rarest(self.word_postings, trigrams(token))
+        needed = max(1, math.ceil(FUZZY_THRESHOLD * len(grams)))
+        for gram in grams[: len(grams) - needed + 1]:
+            for word in self.word_postings.get(gram, ()):
+                if word not in similar:
+                    similarity = word_similarity(token, word)
+                    if similarity >= FUZZY_THRESHOLD:
+                        similar[word] = similarity
+        return similar
+
+    def _fuzzy(self, query: str) -> dict[int, float]:
+        tokens = query.split()
+        matched: dict[int, float] | None = None
+        for token in tokens:
+            best: dict[int, float] = {}
+            for word, similarity in self._similar_words(token).items():
+                for idx in self.words[word]:
+                    if similarity > best.get(idx, 0.0):
+                        best[idx] = similarity
+            if matched is None:
+                matched = best
+            else:
+                matched = {idx: total + best[idx] for idx, total in matched.items() if idx in best}
+            if not matched:
+                return {}
+        return {idx: total / len(tokens) for idx, total in matched.items()}
+
+    def search(self, query: str, limit: int) -> list[tuple[float, str, Entry]]:
+        ranked: dict[int, tuple[float, str]] = {}
+        for lowered, idx in _prefix_range(self.sorted_names, query):
+            ranked[idx] = (1.0, "exact") if lowered == query else (0.9, "prefix")
+            if len(ranked) >= limit:
+                break
+        if len(ranked) < limit:
+            # every match scores the same here, so collect them all for the name tie-break
+            for _, idx in _prefix_range(self.word_tails, query):
+                ranked.setdefault(idx, (0.8, "word_prefix"))
+        if len(ranked) < limit and len(query) >= 3:
+            for idx in self._substring_candidates(query):
+                if idx not in ranked:
+                    result = score(query, self.entries[idx].name)
+                    if result:
+                        ranked[idx] = result
+            if len(ranked) < limit:
+                for idx, similarity in self._fuzzy(query).items():
+                    if idx not in ranked:
+                        ranked[idx] = (round(0.6 * similarity, 4), "fuzzy")
+        top = heapq.nsmallest(limit, ranked.items(), key=lambda item: (-item[1][0], self.entries[item[0]].lowered))
+        return [(value, match, self.entries[idx]) for idx, (value, match) in top]
+
+
+_indexes: dict[str, NgramIndex] = {}
+_index_lock = threading.Lock()
+_pg_trgm: bool | None = None
+
+
+def invalidate(kind: str | None = None) -> None:
+    """Drop cached in-memory indexes after names change (all kinds when ``kind`` is None)."""
+    with _index_lock:
+        if kind is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(kind, None)
+
+
+def _load_entries(db: Session, kind: str) -> list[Entry]:
+    model = KINDS[kind]
+    if kind == "employee":
+        rows = db.query(model.id, model.name, model.hourly_rate)
+        return [Entry(row_id, name, name.lower(), rate) for row_id, name, rate in rows]
+    return [Entry(row_id, name, name.lower()) for row_id, name in db.query(model.id, model.name)]
+
+
+def memory_index(db: Session, kind: str) -> NgramIndex:
+    with _index_lock:
+        index = _indexes.get(kind)
+        if index and time.monotonic() - index.built_at < settings.SEARCH_INDEX_TTL_SECONDS:
+            return index
+    index = NgramIndex(_load_entries(db, kind))
+    with _index_lock:
+        _indexes[kind] = index
+    return index
+
+
+def pg_trgm_available(db: Session) -> bool:
+    global _pg_trgm
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    if _pg_trgm is None:
+        _pg_trgm = bool(db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first())
+    return _pg_trgm
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgres_candidates(db: Session, kind: str, query: str, limit: int) -> list[Entry]:
+    model = KINDS[kind]
+    lowered = func.lower(model.name)
+    columns = [model.id, model.name]
+    if kind == "employee":
+        columns.append(model.hourly_rate)
+    escaped = _like_escape(query)
+    prefix = lowered.like(f"{escaped}%", escape="\\")
+    word_prefix = or_(
+        *(lowered.like(f"%{_like_escape(separator)}{escaped}%", escape="\\") for separator in WORD_SEPARATORS)
+    )
+    contains = lowered.like(f"%{escaped}%", escape="\\")
+    if len(query) < 3:
+        # too short for substring and fuzzy matches, like ``score``
+        condition = or_(prefix, word_prefix)
+    else:
+        # %> is pg_trgm word similarity, which the GIN index serves like LIKE
+        condition = or_(contains, lowered.op("%>")(query))
+    # candidates in ``score`` order (tier, then name) so the cut at the limit keeps the same names
+    tier = case((lowered == query, 0), (prefix, 1), (word_prefix, 2), (contains, 3), else_=4)
+    fuzzy_rank = case((contains, 0.0), else_=-func.word_similarity(query, lowered))  # tiers 0-3 all contain it
+    rows = db.query(*columns).filter(condition).order_by(tier, fuzzy_rank, lowered).limit(limit * 3)
+    return [Entry(row[0], row[1], row[1].lower(), row[2] if kind == "employee" else None) for row in rows]
+
+
+def search(db: Session, query: str, kinds: list[str], limit: int) -> list[dict]:
+    normalized = " ".join(query.lower().split())
+    if not normalized:
+        return []
+    results = []
+    use_postgres = pg_trgm_available(db)
+    for kind in kinds:
+        if use_postgres:
+            ranked = []
+            for entry in _postgres_candidates(db, kind, normalized, limit):
+                result = score(normalized, entry.name)
+                if result:
+                    ranked.append((result[0], result[1], entry))
+        else:
+            ranked = memory_index(db, kind).search(normalized, limit)
+        results.extend(
+            {
+                "kind": kind,
+                "id": entry.id,
+                "name": entry.name,
+                "score": value,
+                "match": match,
+                "hourly_rate": entry.hourly_rate,
+            }
+            for value, match, entry in ranked
+        )
+    results.sort(key=lambda item: (-item["score"], item["name"].lower()))
+    return results[:limit]
+
+
+def ensure_search_indexes(engine) -> None:
+    """Create pg_trgm and the trigram GIN indexes on Postgres; no-op elsewhere."""
+    global _pg_trgm
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for kind, model in KINDS.items():
+            table = model.__tablename__
+            conn.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_name_trgm "
+                    f"ON {table} USING gin (lower(name) gin_trgm_ops)"
+                )
+            )
+    _pg_trgm = True
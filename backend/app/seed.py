@@ -0,0 +1,172 @@
+"""Deterministic synthetic dataset for benchmarks and local load testing.
+
+The same ``SeedConfig`` (including ``seed``) always produces the same vendors,
+companies, employees, pair sheets, sheet rows and invoices, so benchmark
+baselines recorded on one machine can be compared against another.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+ROLES = ["Engineer", "Senior Engineer", "QA", "Designer", "Project Manager", "Analyst", None]
+NAME_PARTS = ["Alpha", "Bright", "Cedar", "Delta", "Ember", "Falcon", "Granite", "Harbor", "Iris", "Juniper"]
+
+
+@dataclass
+class SeedConfig:
+    seed: int = 42
+    vendors: int = 5
+    companies: int = 5
+    employees: int = 60
+    pair_sheets: int = 10
+    months: int = 12
+    start_month: str = "2024-01"
+    rows_per_sheet: int = 8
+    invoice_ratio: float = 0.9
+    sent_ratio: float = 0.7
+    paid_ratio: float = 0.5
+
+
+def month_keys(start_month: str, count: int) -> list[str]:
+    year, month = (int(part) for part in start_month.split("-"))
+    keys = []
+    for _ in range(count):
+        keys.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return keys
+
+
+def _name(rng: random.Random, prefix: str, idx: int) -> str:
+    return f"{rng.choice(NAME_PARTS)} {prefix} {idx:05d}"
+
+
+def generate_dataset(db: Session, config: SeedConfig | None = None) -> dict[str, int]:
+    """Insert a synthetic dataset and return the number of rows created per table."""
+    config = config or SeedConfig()
+    rng = random.Random(config.seed)
+    months = month_keys(config.start_month, config.months)
+    epoch = datetime(2020, 1, 1)
+
+    vendors = [
+        models.Vendor(name=_name(rng, "Vendor", idx), email=f"vendor{idx}@example.com", created_at=epoch)
+        for idx in range(config.vendors)
+    ]
+    companies = [
+        models.Company(name=_name(rng, "Company", idx), address=f"{idx} Main St, Springfield", created_at=epoch)
+        for idx in range(config.companies)
+    ]
+    employees = [
+        models.Employee(
+            name=_name(rng, "Employee", idx),
+            hourly_rate=float(rng.randrange(40, 160)),
+            email=f"employee{idx}@example.com",
+            created_at=epoch,
+        )
+        for idx in range(config.employees)
+    ]
+    db.add_all(vendors + companies + employees)
+    db.flush()
+
+    pairs = [(vendor, company) for vendor in vendors for company in companies]
+    rng.shuffle(pairs)
+    sheets = [
+        models.PairSheet(vendor_id=vendor.id, company_id=company.id, created_at=epoch)
+        for vendor, company in pairs[: config.pair_sheets]
+    ]
+    db.add_all(sheets)
+    db.flush()
+
+    row_values: list[dict] = []
+    invoice_values: list[dict] = []
+    line_values: list[list[dict]] = []
+    for sheet in sheets:
+        roster = rng.sample(employees, min(config.rows_per_sheet, len(employees)))
+        for month_key in months:
+            stamp = datetime.strptime(f"{month_key}-28", "%Y-%m-%d")
+            lines = []
+            for idx, employee in enumerate(roster):
+                hours = float(rng.randrange(0, 180))
+                rate = float(employee.hourly_rate)
+                values = {
+                    "pair_sheet_id": sheet.id,
+                    "month_key": month_key,
+                    "employee_id": employee.id,
+                    "role": rng.choice(ROLES),
+                    "notes": None,
+                    "hours": hours,
+                    "rate": rate,
+                    "comments": None,
+                    "sort_order": idx,
+                    "created_at": stamp,
+                    "updated_at": stamp,
+                }
+                row_values.append(values)
+                lines.append(
+                    {
+                        "employee_id": employee.id,
+                        "employee_name": employee.name,
+                        "role": values["role"],
+                        "notes": None,
+                        "hours": hours,
+                        "rate": rate,
+                        "amount": hours * rate,
+                        "comments": None,
+                        "sort_order": idx,
+                    }
+                )
+            if rng.random() >= config.invoice_ratio:
+                continue
+            sent = rng.random() < config.sent_ratio
+            paid = sent and rng.random() < config.paid_ratio
+            invoice_values.append(
+                {
+                    "pair_sheet_id": sheet.id,
+                    "month_key": month_key,
+                    "invoice_number": f"TX_SEED_{sheet.id}_{month_key.replace('-', '')}",
+                    "pdf_path": None,
+                    "total_amount": sum(line["amount"] for line in lines),
+                    "sent": sent,
+                    "paid": paid,
+                    "created_at": stamp,
+                    "updated_at": stamp,
+                    "sent_at": stamp if sent else None,
+                    "paid_at": stamp if paid else None,
+                }
+            )
+            line_values.append(lines)
+
+    if row_values:
+        db.execute(insert(models.SheetRow), row_values)
+
+    if invoice_values:
+        db.execute(insert(models.CombinedInvoice), invoice_values)
+    invoice_ids = {
+        (pair_sheet_id, month_key): invoice_id
+        for invoice_id, pair_sheet_id, month_key in db.query(
+            models.CombinedInvoice.id, models.CombinedInvoice.pair_sheet_id, models.CombinedInvoice.month_key
+        )
+    }
+    all_lines = []
+    for values, lines in zip(invoice_values, line_values):
+        invoice_id = invoice_ids[(values["pair_sheet_id"], values["month_key"])]
+        all_lines.extend({**line, "combined_invoice_id": invoice_id} for line in lines)
+    if all_lines:
+        db.execute(insert(models.CombinedInvoiceLine), all_lines)
+    db.commit()
+
+    return {
+        "vendors": len(vendors),
+        "companies": len(companies),
+        "employees": len(employees),
+        "pair_sheets": len(sheets),
+        "sheet_rows": len(row_values),
+        "combined_invoices": len(invoice_values),
+        "combined_invoice_lines": len(all_lines),
+    }
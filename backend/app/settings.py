@@ -22,6 +22,55 @@ class Settings(BaseSettings):
     INVOICE_TO_EMAIL: str = ""    # where invoices are sent
     CRON_SECRET: str = ""
 
+    # auth
+    AUTH_CACHE_SIZE: int = 1024              # verified tokens kept in memory; 0 disables the cache
+    AUTH_CACHE_TTL_SECONDS: int = 300        # re-verify at least this often (entries never outlive the token's exp)
+
+    # observability
+    SLOW_REQUEST_MS: int = 1000   # requests slower than this log their slowest SQL statements
+    METRICS_TOKEN: str = ""       # when set, /metrics requires "Authorization: Bearer <token>"
+    QUERY_GUARD: str = ""         # off | log | raise (defaults to log when DEBUG)
+    QUERY_GUARD_REPEAT_LIMIT: int = 3
+
+    # CPU-heavy work
+    PDF_WORKERS: int = 2                     # PDF render processes; 0 renders inline (always inline on Vercel)
+    PDF_STORAGE: str = ""                    # disk | memory (render per download/send, never write); default memory on Vercel
+    PDF_PROFILE: str = "compact"             # reportlab (canvas defaults) | compact (binary Flate) | minimal (compact + archival metadata)
+    ADMISSION_MAX_CONCURRENT: int = 4        # per-route concurrent requests for PDF-heavy routes
+    ADMISSION_MAX_QUEUED: int = 16           # per-route requests allowed to wait before 503
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 15.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    ARCHIVE_RENDER_CONCURRENCY: int = 4      # PDFs rendered in parallel while streaming a month archive
+    IDEMPOTENCY_TTL_HOURS: int = 24          # how long a completed Idempotency-Key replays its response
+    IDEMPOTENCY_LOCK_SECONDS: int = 120      # an unfinished claim older than this is taken over (crashed worker)
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0   # concurrent duplicates wait this long for the first request
+    IDEMPOTENCY_POLL_SECONDS: float = 0.25   # first pause between a waiting duplicate's polls; doubles each time
+    IDEMPOTENCY_POLL_MAX_SECONDS: float = 2.0  # longest pause between polls
+
+    # response encoding
+    COMPRESSION_MIN_BYTES: int = 1024        # smaller bodies are sent uncompressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4                  # dynamic responses: 4-5 beats gzip -6 on size at similar CPU
+
+    # cron
+    CRON_TIME_BUDGET_SECONDS: float = 8.0    # stop starting new items after this long (Vercel Hobby kills at 10s)
+    CRON_BATCH_SIZE: int = 50                # items loaded per checkpointed batch
+    CRON_JOBS: str = "reminders,invoice-pdfs"  # jobs run when /cron/run is called without ?jobs=
+    CRON_REMINDER_DAY: int = 25              # scheduled reminders go out from this day of the month
+
+    # change events (GET /events)
+    EVENTS_POLL_SECONDS: float = 1.0         # each process reads new change_events rows this often while streams are open
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0   # comment line on idle streams so proxies keep them open
+    EVENTS_STREAM_SECONDS: float = 25.0      # streams end after this long and the browser reconnects (serverless limits)
+    EVENTS_RETRY_MS: int = 1000              # reconnect delay sent to EventSource
+    EVENTS_REPLAY_LIMIT: int = 500           # missed events replayed on reconnect; more than this sends "reset"
+    EVENTS_GAP_SECONDS: float = 5.0          # how long a not-yet-committed lower id holds delivery back
+    EVENTS_QUEUE_SIZE: int = 1000            # undelivered events per stream before it gets "reset"
+    EVENTS_RETENTION_HOURS: int = 24
+
+    # search
+    SEARCH_INDEX_TTL_SECONDS: int = 60       # in-memory n-gram index rebuild interval (non-Postgres fallback)
+
     # business config
     COMPANY_NAME: str = "Your Company LLC"
     COMPANY_ADDRESS: str = "123 Main St, City, State"
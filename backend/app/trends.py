@@ -0,0 +1,179 @@
+"""Monthly invoice trends: rolling 3/12-month sums and year-over-year change.
+
+``trend_rows`` reads only the requested months plus the 12 before them (what
+the rolling 12-month sum and the year-ago value need), from hot and archived
+invoices. The database groups them into per-series monthly totals. Window
+functions then compute the rolling sums and the year-ago value over a month
+spine (``generate_series`` on PostgreSQL, a recursive CTE on SQLite),
+so months without invoices count as zero. The spine is crossed with every
+series that has invoices in that span. On SQLite builds without window
+functions (before 3.25), ``rolling_python`` does the same over the grouped
+totals and gives identical results.
+"""
+import sqlite3
+from dataclasses import dataclass
+
+from sqlalchemy import Date, and_, func, literal, literal_column, select, true, union_all
+from sqlalchemy.orm import Session
+
+from . import models, partitions
+from .reports import month_range
+
+SERIES = ("total", "company", "vendor")
+LOOKBACK_MONTHS = 12
+
+
+@dataclass
+class TrendRow:
+    series_id: int
+    series_name: str
+    month_key: str
+    amount: float
+    invoices: int
+    rolling_3: float
+    rolling_12: float
+    previous_year: float
+
+
+def shift_month(month_key: str, months: int) -> str:
+    year, month = (int(part) for part in month_key.split("-"))
+    index = year * 12 + month - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def supports_window_functions(db: Session) -> bool:
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 25, 0)
+    return True
+
+
+def _monthly_totals(by: str, start: str, end: str):
+    """Invoice amount and count per series and month, grouped in the database."""
+    invoices = partitions.union("invoices", start, end)
+    amount = func.sum(func.coalesce(invoices.c.total_amount, 0.0)).label("amount")
+    count = func.count().label("invoices")
+    if by == "total":
+        return (
+            select(literal(0).label("series_id"), literal("All").label("series_name"), invoices.c.month_key, amount, count)
+            .group_by(invoices.c.month_key)
+        )
+    owner = models.Company if by == "company" else models.Vendor
+    owner_id = models.PairSheet.company_id if by == "company" else models.PairSheet.vendor_id
+    return (
+        select(owner.id.label("series_id"), owner.name.label("series_name"), invoices.c.month_key, amount, count)
+        .select_from(invoices)
+        .join(models.PairSheet, models.PairSheet.id == invoices.c.pair_sheet_id)
+        .join(owner, owner.id == owner_id)
+        .group_by(owner.id, owner.name, invoices.c.month_key)
+    )
+
+
+def _month_spine(dialect: str, months: list[str]):
+    if dialect == "postgresql":
+        first, last = (literal(f"{key}-01").cast(Date) for key in (months[0], months[-1]))
+        month = func.generate_series(first, last, literal_column("interval '1 month'"))
+        return select(func.to_char(month, "YYYY-MM").label("month_key")).subquery("spine")
+    if dialect == "sqlite":
+        # a recursive CTE keeps the statement (and its compiled cache entry) the same size for any range
+        spine = select(literal(months[0]).label("month_key")).cte("spine", recursive=True)
+        following = func.strftime("%Y-%m", spine.c.month_key.concat("-01"), "+1 month")
+        return spine.union_all(select(following).where(spine.c.month_key < months[-1]))
+    return union_all(*(select(literal(key).label("month_key")) for key in months)).subquery("spine")
+
+
+def rolling_sql(db: Session, by: str, start: str, end: str) -> list[TrendRow]:
+    lookback = shift_month(start, -LOOKBACK_MONTHS)
+    totals = _monthly_totals(by, lookback, end).cte("totals")
+    series = select(totals.c.series_id, totals.c.series_name).distinct().subquery("series")
+    spine = _month_spine(db.get_bind().dialect.name, month_range(lookback, end))
+    amount = func.coalesce(totals.c.amount, 0.0)
+    window = {"partition_by": series.c.series_id, "order_by": spine.c.month_key}
+    grid = (
+        select(
+            series.c.series_id,
+            series.c.series_name,
+            spine.c.month_key,
+            amount.label("amount"),
+            func.coalesce(totals.c.invoices, 0).label("invoices"),
+            func.sum(amount).over(rows=(-2, 0), **window).label("rolling_3"),
+            func.sum(amount).over(rows=(-(LOOKBACK_MONTHS - 1), 0), **window).label("rolling_12"),
+            func.coalesce(func.lag(amount, LOOKBACK_MONTHS).over(**window), 0.0).label("previous_year"),
+        )
+        .select_from(series.join(spine, true()))
+        .outerjoin(
+            totals, and_(totals.c.series_id == series.c.series_id, totals.c.month_key == spine.c.month_key)
+        )
+        .subquery("grid")
+    )
+    statement = select(grid).where(grid.c.month_key >= start).order_by(grid.c.series_id, grid.c.month_key)
+    return [TrendRow(*row) for row in db.execute(statement)]
+
+
+def rolling_python(db: Session, by: str, start: str, end: str) -> list[TrendRow]:
+    lookback = shift_month(start, -LOOKBACK_MONTHS)
+    months = month_range(lookback, end)
+    series: dict[tuple[int, str], dict[str, tuple[float, int]]] = {}
+    for series_id, series_name, month_key, amount, invoices in db.execute(_monthly_totals(by, lookback, end)):
+        series.setdefault((series_id, series_name), {})[month_key] = (float(amount), invoices)
+
+    rows = []
+    for (series_id, series_name), by_month in sorted(series.items()):
+        amounts = [by_month.get(month_key, (0.0, 0))[0] for month_key in months]
+        for idx in range(LOOKBACK_MONTHS, len(months)):
+            rows.append(
+                TrendRow(
+                    series_id=series_id,
+                    series_name=series_name,
+                    month_key=months[idx],
+                    amount=amounts[idx],
+                    invoices=by_month.get(months[idx], (0.0, 0))[1],
+                    rolling_3=sum(amounts[idx - 2 : idx + 1]),
+                    rolling_12=sum(amounts[idx - LOOKBACK_MONTHS + 1 : idx + 1]),
+                    previous_year=amounts[idx - LOOKBACK_MONTHS],
+                )
+            )
+    return rows
+
+
+def trend_rows(db: Session, by: str, start: str, end: str, engine: str | None = None) -> tuple[list[TrendRow], str]:
+    engine = engine or ("sql" if supports_window_functions(db) else "python")
+    rolling = rolling_sql if engine == "sql" else rolling_python
+    return rolling(db, by, start, end), engine
+
+
+def trends_report(db: Session, by: str, start: str, end: str, engine: str | None = None) -> dict:
+    rows, engine = trend_rows(db, by, start, end, engine)
+    months = month_range(start, end)
+    series: dict[int, dict] = {}
+    for row in rows:
+        current = series.get(row.series_id)
+        if current is None:
+            current = series[row.series_id] = {
+                "key": "all" if by == "total" else str(row.series_id),
+                "label": row.series_name,
+                "amount": [],
+                "invoice_count": [],
+                "rolling_3": [],
+                "rolling_12": [],
+                "previous_year": [],
+                "yoy_change": [],
+                "yoy_change_pct": [],
+            }
+        amount, previous_year = float(row.amount), float(row.previous_year or 0)
+        current["amount"].append(round(amount, 2))
+        current["invoice_count"].append(int(row.invoices))
+        current["rolling_3"].append(round(float(row.rolling_3), 2))
+        current["rolling_12"].append(round(float(row.rolling_12), 2))
+        current["previous_year"].append(round(previous_year, 2))
+        current["yoy_change"].append(round(amount - previous_year, 2))
+        current["yoy_change_pct"].append(
+            round((amount - previous_year) / previous_year * 100, 1) if previous_year else None
+        )
+    return {
+        "by": by,
+        "start": start,
+        "end": end,
+        "engine": engine,
+        "months": months,
+        "series": sorted(series.values(), key=lambda item: item["label"].lower()),
+    }
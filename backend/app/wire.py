@@ -0,0 +1,223 @@
+"""Response wire formats and compression.
+
+``NegotiatedResponse`` picks the body encoding from the request's ``Accept``
+header:
+
+* ``application/json`` (default) - the regular row-of-objects JSON;
+* ``application/vnd.invoiceflow.columnar+json`` - lists of same-shaped objects
+  become ``{"$length": n, "$columns": {field: [values...]}}`` so keys such as
+  ``invoice_status`` or ``employee_name`` are sent once instead of per row;
+* ``application/msgpack`` and ``application/vnd.invoiceflow.columnar+msgpack`` -
+  the same two shapes encoded with MessagePack (only offered when ``msgpack``
+  is installed).
+
+``CompressionMiddleware`` compresses complete responses above
+``COMPRESSION_MIN_BYTES`` with brotli (when installed) or gzip, whichever the
+``Accept-Encoding`` q-values prefer; ``q=0`` refuses an encoding. Every
+compressible response carries ``Vary: Accept-Encoding``, compressed or not.
+Streaming bodies such as the invoice ZIP archive pass through untouched.
+
+``msgpack`` and ``brotli`` are imported on first use to keep the serverless
+cold start lean.
+"""
+import gzip
+import json
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from .settings import settings
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.invoiceflow.columnar+json"
+MSGPACK = "application/msgpack"
+COLUMNAR_MSGPACK = "application/vnd.invoiceflow.columnar+msgpack"
+MEDIA_ALIASES = {"application/x-msgpack": MSGPACK}
+
+COMPRESSIBLE_TYPES = ("application/json", "application/vnd.invoiceflow", "application/msgpack", "text/")
+
+_accept: ContextVar[str] = ContextVar("accept", default="")
+_msgpack: Any = None
+_brotli: Any = None
+
+
+def msgpack_module():
+    """MessagePack when installed (imported on first use), else None."""
+    global _msgpack
+    if _msgpack is None:
+        try:
+            import msgpack
+        except ImportError:
+            msgpack = False
+        _msgpack = msgpack
+    return _msgpack or None
+
+
+def brotli_module():
+    """Brotli when installed (imported on first use), else None; gzip is used without it."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def available_media_types() -> tuple[str, ...]:
+    if msgpack_module() is None:
+        return (JSON, COLUMNAR_JSON)
+    return (JSON, COLUMNAR_JSON, MSGPACK, COLUMNAR_MSGPACK)
+
+
+def weighted(header: str) -> dict[str, float]:
+    """``{token: q}`` for an ``Accept`` style header; a missing ``q`` is 1, an unparsable one 0."""
+    weights = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    return weights
+
+
+def negotiate(accept: str) -> str:
+    """Best supported media type for an ``Accept`` header; JSON unless something else is preferred."""
+    best, best_q = JSON, 0.0
+    # only look for msgpack when the client could want it
+    available = available_media_types() if "msgpack" in accept else (JSON, COLUMNAR_JSON)
+    for media, q in weighted(accept).items():
+        media = MEDIA_ALIASES.get(media, media)
+        if media in available and q > best_q:
+            best, best_q = media, q
+    return best
+
+
+def to_columnar(value: Any) -> Any:
+    """Turn every list of objects sharing the same keys into per-field arrays, recursively."""
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            keys = list(value[0])
+            if all(len(item) == len(keys) and all(key in item for key in keys) for item in value):
+                return {
+                    "$length": len(value),
+                    "$columns": {key: [to_columnar(item[key]) for item in value] for key in keys},
+                }
+        return [to_columnar(item) for item in value]
+    return value
+
+
+class NegotiatedResponse(Response):
+    """JSON response that switches to columnar JSON or MessagePack when the client asks for it."""
+
+    media_type = JSON
+
+    def __init__(self, content: Any = None, *args, **kwargs):
+        self.negotiated = self.media_type = negotiate(_accept.get())
+        super().__init__(content, *args, **kwargs)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        if self.negotiated in (COLUMNAR_JSON, COLUMNAR_MSGPACK):
+            content = to_columnar(content)
+        if self.negotiated in (MSGPACK, COLUMNAR_MSGPACK):
+            return msgpack_module().packb(content, use_bin_type=True)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class NegotiatedRoute(APIRoute):
+    """Expose the request's ``Accept`` header to ``NegotiatedResponse`` while the route runs."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            token = _accept.set(request.headers.get("accept", ""))
+            try:
+                return await handler(request)
+            finally:
+                _accept.reset(token)
+
+        return route_handler
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """``br`` or ``gzip``, whichever the client weights higher (``br`` on a tie), or None."""
+    weights = weighted(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in ("br", "gzip"):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q and (encoding != "br" or brotli_module() is not None):
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli_module().compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Pure ASGI gzip/brotli for complete responses; streamed and small bodies pass through."""
+
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            compressible = "content-encoding" not in headers and headers.get("content-type", "").startswith(
+                COMPRESSIBLE_TYPES
+            )
+            if compressible:
+                # caches must key on Accept-Encoding even when this body went out uncompressed
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                encoding is None
+                or not compressible
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            compressed = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
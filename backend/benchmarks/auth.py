@@ -0,0 +1,54 @@
+"""Per-request JWT verification cost with and without the verified-token cache.
+
+Times ``auth.decode_token`` for a burst of requests carrying the same token
+(what a page load sends) with the cache disabled - a full ``jwt.decode`` with
+HMAC verification per call - and enabled.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.auth --calls 20000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def run(calls: int, token: str) -> float:
+    from app import auth
+
+    auth.decode_token(token)  # warm-up (and the one miss when caching)
+    started = time.perf_counter()
+    for _ in range(calls):
+        auth.decode_token(token)
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JWT verification per request")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args(argv)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import auth
+
+    token = auth.create_access_token({"sub": "admin"})
+    cache_size = auth.token_cache.max_size
+
+    auth.token_cache.max_size = 0
+    auth.token_cache.clear()
+    uncached = run(args.calls, token)
+
+    auth.token_cache.max_size = cache_size or 1024
+    auth.token_cache.clear()
+    cached = run(args.calls, token)
+
+    print(f"jwt.decode per request   {uncached:8.2f} us")
+    print(f"cached per request       {cached:8.2f} us  ({uncached / cached:.0f}x faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
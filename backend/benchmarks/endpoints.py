@@ -0,0 +1,307 @@
+"""In-process latency/query/memory benchmark for every API endpoint.
+
+Seeds a deterministic dataset (``app.seed``), drives the FastAPI app through
+``TestClient`` and records latency percentiles, SQL statement counts and peak
+Python memory per endpoint. Results are written as a JSON baseline; pass
+``--compare`` with a previous baseline to fail on regressions.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.endpoints --output baseline.json
+    python -m benchmarks.endpoints --database-url postgresql+psycopg2://.../bench --reset-database \
+        --compare baseline.json
+
+Requires ``httpx`` (see ``requirements-dev.txt``).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(call, iterations: int, counter: QueryCounter) -> dict:
+    call()  # warm-up: first render, caches, lazy imports
+    latencies: list[float] = []
+    queries: list[int] = []
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(iterations):
+        before = counter.count
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count - before)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def build_cases(client, headers: dict, db_factory, month_key: str, range_months: list[str]) -> dict:
+    from app import models
+
+    with db_factory() as db:
+        sheet = db.query(models.PairSheet).order_by(models.PairSheet.id.asc()).first()
+        invoice = (
+            db.query(models.CombinedInvoice)
+            .filter(models.CombinedInvoice.month_key == month_key)
+            .order_by(models.CombinedInvoice.id.asc())
+            .first()
+        )
+        sheet_id = sheet.id
+        invoice_id = invoice.id if invoice else None
+
+    def get(path: str):
+        def call():
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code, response.text[:200])
+
+        return call
+
+    sheet_path = f"/workbook/sheets/{sheet_id}?month_key={month_key}"
+    save_payload = {"rows": client.get(sheet_path, headers=headers).json()["rows"]}
+
+    def save_sheet():
+        response = client.put(sheet_path, json=save_payload, headers=headers)
+        assert response.status_code == 200, response.text[:200]
+
+    def generate_invoice():
+        response = client.post(f"/workbook/sheets/{sheet_id}/invoice/generate?month_key={month_key}", headers=headers)
+        assert response.status_code == 200, response.text[:200]
+
+    page_load_paths = [
+        "/vendors",
+        "/companies",
+        "/employees",
+        f"/workbook/sheets?month_key={month_key}",
+        f"/analytics/summary?month_key={month_key}",
+    ]
+
+    def page_load_five_calls():
+        # the workbook page's pre-bootstrap month switch, issued back to back
+        for path in page_load_paths:
+            get(path)()
+
+    def sheet_per_month():
+        for key in range_months:
+            get(f"/workbook/sheets/{sheet_id}?month_key={key}")()
+
+    cases = {
+        "GET /health": get("/health"),
+        "GET /vendors": get("/vendors"),
+        "GET /companies": get("/companies"),
+        "GET /employees": get("/employees"),
+        "GET /workbook/sheets": get(f"/workbook/sheets?month_key={month_key}"),
+        "GET /workbook/sheets/{id}": get(sheet_path),
+        "PUT /workbook/sheets/{id}": save_sheet,
+        "POST /workbook/sheets/{id}/invoice/generate": generate_invoice,
+        "GET /workbook/bootstrap": get(f"/workbook/bootstrap?month_key={month_key}&include_employees=true"),
+        "page load: 5 calls (baseline for bootstrap)": page_load_five_calls,
+        "GET /workbook/sheets/{id}/range": get(
+            f"/workbook/sheets/{sheet_id}/range?from={range_months[0]}&to={range_months[-1]}"
+        ),
+        f"{len(range_months)} x GET /workbook/sheets/{{id}} (baseline for range)": sheet_per_month,
+        "GET /search": get("/search?q=emp&limit=10"),
+        "GET /analytics/summary": get(f"/analytics/summary?month_key={month_key}"),
+        "GET /analytics/company-balances": get("/analytics/company-balances"),
+        "GET /analytics/vendor-balances": get("/analytics/vendor-balances"),
+        "GET /analytics/pair-balances": get("/analytics/pair-balances"),
+        "GET /analytics/earnings": get("/analytics/earnings"),
+        "GET /analytics/trends (by company)": get(
+            f"/analytics/trends?by=company&start={range_months[0]}&end={range_months[-1]}"
+        ),
+        "GET /analytics/aging": get("/analytics/aging"),
+        "GET /reports/pivot (employee x month)": get("/reports/pivot?rows=employee&columns=month"),
+        "GET /reports/pivot (employee x company)": get("/reports/pivot?source=invoices&rows=employee&columns=company"),
+    }
+    if invoice_id:
+        cases["GET /combined-invoices/{id}/pdf"] = get(f"/combined-invoices/{invoice_id}/pdf")
+    # POST /combined-invoices/{id}/send is excluded: it talks to a real SMTP server.
+    return cases
+
+
+def pdf_case(db_factory, out_dir: Path):
+    from app import models
+    from app.invoice_pdf import generate_combined_invoice_pdf
+
+    with db_factory() as db:
+        invoice = (
+            db.query(models.CombinedInvoice)
+            .join(models.CombinedInvoiceLine)
+            .order_by(models.CombinedInvoice.id.asc())
+            .first()
+        )
+        lines = [
+            {
+                "employee_name": line.employee_name,
+                "hours": line.hours,
+                "rate": line.rate,
+                "amount": line.amount,
+            }
+            for line in sorted(invoice.lines, key=lambda item: item.sort_order)
+        ]
+        kwargs = {
+            "out_dir": out_dir,
+            "invoice_number": invoice.invoice_number,
+            "vendor_name": invoice.pair_sheet.vendor.name,
+            "company_name": invoice.pair_sheet.company.name,
+            "company_address": invoice.pair_sheet.company.address,
+            "month_key": invoice.month_key,
+            "lines": lines,
+            "total_amount": float(invoice.total_amount or 0),
+        }
+    return lambda: generate_combined_invoice_pdf(**kwargs)
+
+
+def compare(results: dict, baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms")
+        if current["peak_kib"] > previous["peak_kib"] * (1 + tolerance):
+            regressions.append(f"{name}: peak {previous['peak_kib']:.0f} KiB -> {current['peak_kib']:.0f} KiB")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints in-process")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument(
+        "--reset-database",
+        action="store_true",
+        help="required with --database-url: all tables are dropped and re-seeded",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--vendors", type=int, default=5)
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=60)
+    parser.add_argument("--pair-sheets", type=int, default=10)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--rows-per-sheet", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--guard",
+        choices=["off", "log", "raise"],
+        default="off",
+        help="QUERY_GUARD mode; 'raise' fails on N+1 lazy loads and exceeded route query budgets",
+    )
+    parser.add_argument("--only", action="append", default=[], help="substring filter on endpoint names")
+    parser.add_argument("--output", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="fail when results regress against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative latency/memory growth")
+    args = parser.parse_args(argv)
+    if args.database_url and not args.reset_database:
+        parser.error("--database-url wipes the target database; pass --reset-database to confirm")
+    output = args.output.resolve() if args.output else None
+    baseline = args.compare.resolve() if args.compare else None
+
+    workdir = Path(tempfile.mkdtemp(prefix="invoice-bench-"))
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["QUERY_GUARD"] = args.guard
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(workdir)  # generated PDFs land in the scratch directory
+
+    from fastapi.testclient import TestClient
+
+    from app.db import Base, SessionLocal, engine
+    from app.main import app
+    from app.seed import SeedConfig, generate_dataset, month_keys
+
+    config = SeedConfig(
+        seed=args.seed,
+        vendors=args.vendors,
+        companies=args.companies,
+        employees=args.employees,
+        pair_sheets=args.pair_sheets,
+        months=args.months,
+        rows_per_sheet=args.rows_per_sheet,
+    )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        counts = generate_dataset(db, config)
+    months = month_keys(config.start_month, config.months)
+    month_key = months[-1]
+
+    counter = QueryCounter(engine)
+    results: dict[str, dict] = {}
+    with TestClient(app) as client:
+        token = client.post("/auth/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        cases = build_cases(client, headers, SessionLocal, month_key, months[-12:])
+        cases["generate_combined_invoice_pdf"] = pdf_case(SessionLocal, workdir / "pdf")
+        for name, call in cases.items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = measure(call, args.iterations, counter)
+            row = results[name]
+            print(
+                f"{name:48s} p50 {row['p50_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  "
+                f"queries {row['queries']:4d}  peak {row['peak_kib']:8.0f} KiB"
+            )
+
+    report = {
+        "meta": {
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "month_key": month_key,
+            "config": asdict(config),
+            "counts": counts,
+        },
+        "results": results,
+    }
+    if args.database_url:
+        Base.metadata.drop_all(bind=engine)
+    if output:
+        output.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"Wrote baseline to {output}")
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
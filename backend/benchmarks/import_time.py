@@ -0,0 +1,93 @@
+"""Cold-start budget for the serverless entry point.
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters and
+fails when the cumulative import time of ``app.main`` exceeds the budget or when
+a lazily loaded dependency (PDF rendering, SMTP, MessagePack, brotli, NumPy)
+sneaks back into the import graph.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# modules that must only be imported on first use
+LAZY_MODULES = ("reportlab", "smtplib", "msgpack", "brotli", "numpy")
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Map module name -> cumulative import time in microseconds."""
+    timings: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue
+        timings[parts[2].strip()] = cumulative
+    return timings
+
+
+def measure_once(module: str) -> dict[str, int]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./benchmark_import.db")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def eager_imports(timings: dict[str, int]) -> list[str]:
+    """Modules of ``LAZY_MODULES`` that were imported along with the measured module."""
+    return sorted(name for name in timings if name.split(".")[0] in LAZY_MODULES)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--top", type=int, default=10, help="show the slowest N modules of the last run")
+    args = parser.parse_args(argv)
+
+    samples: list[float] = []
+    timings: dict[str, int] = {}
+    for _ in range(args.runs):
+        timings = measure_once(args.module)
+        samples.append(timings.get(args.module, 0) / 1000)
+
+    median_ms = statistics.median(samples)
+    print(f"{args.module}: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for name, micros in sorted(timings.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    failed = False
+    leaked = eager_imports(timings)
+    if leaked:
+        print(f"FAIL: lazily loaded modules imported eagerly: {', '.join(leaked)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
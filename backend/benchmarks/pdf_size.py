@@ -0,0 +1,120 @@
+"""Invoice PDF size per ``PDF_PROFILES`` entry, as bytes per page and per line item.
+
+Renders the same invoices (1 to 400 lines, so one to many pages) with every
+profile in memory and reports file size, pages, bytes per page, bytes per
+line item and render time. Sizes are deterministic for a given reportlab
+version, so ``--compare`` with a previous ``--output`` fails on any growth
+beyond ``--tolerance``, which catches layout or dependency changes that bloat
+the email attachments and month archives.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.pdf_size --output pdf_size.json
+    python -m benchmarks.pdf_size --compare pdf_size.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LINE_COUNTS = (1, 8, 30, 120, 400)
+PAGE_OBJECT = re.compile(rb"/Type /Page\b(?!s)")
+
+
+def invoice_fields(line_count: int) -> dict:
+    lines = [
+        {
+            "employee_name": f"Employee {idx:04d} Example",
+            "hours": 120 + idx % 45 + 0.25 * (idx % 4),
+            "rate": 40 + idx % 35,
+            "amount": (120 + idx % 45 + 0.25 * (idx % 4)) * (40 + idx % 35),
+        }
+        for idx in range(line_count)
+    ]
+    return {
+        "invoice_number": "INV-2024-01-0001",
+        "vendor_name": "Acme Staffing",
+        "company_name": "Cedar Company",
+        "company_address": "1 Main St, Springfield",
+        "month_key": "2024-01",
+        "lines": lines,
+        "total_amount": round(sum(line["amount"] for line in lines), 2),
+    }
+
+
+def measure(profile: str, line_count: int, iterations: int) -> dict:
+    from app.invoice_pdf import combined_invoice_pdf_bytes
+
+    fields = invoice_fields(line_count)
+    timings = []
+    # resolve_company_address prints its lookups; keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            started = time.perf_counter()
+            _, pdf = combined_invoice_pdf_bytes(profile=profile, **fields)
+            timings.append((time.perf_counter() - started) * 1000)
+    pages = len(PAGE_OBJECT.findall(pdf))
+    return {
+        "bytes": len(pdf),
+        "pages": pages,
+        "bytes_per_page": round(len(pdf) / pages, 1),
+        "bytes_per_line": round(len(pdf) / line_count, 1),
+        "render_ms": round(sorted(timings)[len(timings) // 2], 3),
+    }
+
+
+def compare(results: dict, baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and current["bytes"] > previous["bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: {previous['bytes']} B -> {current['bytes']} B")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure invoice PDF size per output profile")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="fail when a PDF grows against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed relative size growth")
+    args = parser.parse_args(argv)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import reportlab
+
+    from app.invoice_pdf import PDF_PROFILES
+
+    results: dict[str, dict] = {}
+    for line_count in LINE_COUNTS:
+        baseline_bytes = None
+        for profile in PDF_PROFILES:
+            name = f"{profile} / {line_count} lines"
+            row = results[name] = measure(profile, line_count, args.iterations)
+            baseline_bytes = baseline_bytes or row["bytes"]
+            print(
+                f"{name:24s} {row['bytes']:8d} B  {row['bytes'] / baseline_bytes:6.1%}  {row['pages']:3d} pages  "
+                f"{row['bytes_per_page']:8.1f} B/page  {row['bytes_per_line']:8.1f} B/line  "
+                f"render {row['render_ms']:7.2f} ms"
+            )
+
+    if args.output:
+        report = {"meta": {"reportlab": reportlab.Version, "line_counts": LINE_COUNTS}, "results": results}
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"Wrote baseline to {args.output}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""Invoice PDF latency and local disk use with ``PDF_STORAGE=disk`` vs ``memory``.
+
+Seeds a throwaway SQLite dataset, then for each storage mode downloads every
+invoice of one month twice (the first download renders, the second shows what
+a repeat costs) and the month's ZIP archive, and reports latency plus the
+files and bytes left in ``INVOICE_DIR`` (``/tmp`` on Vercel). ``pdf_path`` is
+cleared and the directory emptied before each mode, so both start cold.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.pdf_storage --pair-sheets 20 --workers 0
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def disk_usage(directory: Path) -> tuple[int, int]:
+    files = [path for path in directory.rglob("*") if path.is_file()] if directory.exists() else []
+    return len(files), sum(path.stat().st_size for path in files)
+
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    return f"p50 {ordered[len(ordered) // 2]:7.2f} ms  max {ordered[-1]:7.2f} ms"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare disk and in-memory invoice PDF storage")
+    parser.add_argument("--pair-sheets", type=int, default=20)
+    parser.add_argument("--rows-per-sheet", type=int, default=12)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="PDF_WORKERS (0 renders inline, as on Vercel)")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="invoice-pdf-storage-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["PDF_WORKERS"] = str(args.workers)
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import update
+
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.main import INVOICE_DIR, app
+    from app.seed import SeedConfig, generate_dataset, month_keys
+    from app.settings import settings
+
+    config = SeedConfig(
+        pair_sheets=args.pair_sheets, rows_per_sheet=args.rows_per_sheet, months=args.months, invoice_ratio=1.0
+    )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    month_key = month_keys(config.start_month, config.months)[-1]
+    with SessionLocal() as db:
+        generate_dataset(db, config)
+        invoice_ids = [
+            row[0]
+            for row in db.query(models.CombinedInvoice.id)
+            .filter(models.CombinedInvoice.month_key == month_key)
+            .order_by(models.CombinedInvoice.id)
+        ]
+    print(f"{len(invoice_ids)} invoices in {month_key}, PDF_WORKERS={args.workers}")
+
+    with TestClient(app) as client:
+        token = client.post("/auth/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def download(invoice_id: int) -> None:
+            response = client.get(f"/combined-invoices/{invoice_id}/pdf", headers=headers)
+            assert response.status_code == 200 and response.content.startswith(b"%PDF"), response.status_code
+
+        def download_archive() -> None:
+            response = client.get(f"/combined-invoices/archive?month_key={month_key}", headers=headers)
+            assert response.status_code == 200, response.status_code
+
+        for storage in ("disk", "memory"):
+            settings.PDF_STORAGE = storage
+            shutil.rmtree(INVOICE_DIR, ignore_errors=True)
+            with SessionLocal() as db:
+                db.execute(update(models.CombinedInvoice).values(pdf_path=None))
+                db.commit()
+
+            first = [timed(lambda: download(invoice_id)) for invoice_id in invoice_ids]
+            repeat = [timed(lambda: download(invoice_id)) for invoice_id in invoice_ids]
+            archive_ms = timed(download_archive)
+            files, size = disk_usage(INVOICE_DIR)
+            print(f"\n{storage}")
+            print(f"  first download   {summary(first)}")
+            print(f"  repeat download  {summary(repeat)}")
+            print(f"  month archive    {archive_ms:7.2f} ms")
+            print(f"  {INVOICE_DIR}: {files} files, {size / 1024:.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
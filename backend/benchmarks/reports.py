@@ -0,0 +1,128 @@
+"""Pivot report grouping: NumPy vectorized vs the pure-Python dict version.
+
+Part one times ``reports.pivot_numpy`` and ``reports.pivot_python`` on
+synthetic column arrays shaped like sheet rows (employee x month and
+employee x company) and checks that both give the same matrices. Part two
+(``--rows-per-sheet`` > 0) seeds a throwaway SQLite database and times the
+whole ``GET /reports/pivot`` request, so the load and serialization cost
+sits next to the grouping cost.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.reports --rows 2000000 --employees 5000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def synthetic_columns(rows: int, employees: int, companies: int, months: int, seed: int = 7):
+    from app.reports import month_range
+
+    rng = random.Random(seed)
+    keys = month_range("2020-01", "2100-12")[:months]
+    employee_ids = [rng.randrange(1, employees + 1) for _ in range(rows)]
+    company_ids = [rng.randrange(1, companies + 1) for _ in range(rows)]
+    month_keys = [keys[rng.randrange(months)] for _ in range(rows)]
+    hours = [float(rng.randrange(0, 180)) for _ in range(rows)]
+    amount = [value * rng.randrange(40, 160) for value in hours]
+    return employee_ids, company_ids, month_keys, hours, amount
+
+
+def timed(func, repeat: int) -> tuple[float, object]:
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def same(left, right) -> bool:
+    return left.row_keys == right.row_keys and left.col_keys == right.col_keys and all(
+        math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+        for left_row, right_row in zip(left.amount, right.amount)
+        for a, b in zip(left_row, right_row)
+    )
+
+
+def endpoint_timings(args) -> None:
+    from fastapi.testclient import TestClient
+
+    from app.db import Base, SessionLocal, engine
+    from app.main import app
+    from app.seed import SeedConfig, generate_dataset, month_keys
+
+    config = SeedConfig(
+        employees=args.employees,
+        vendors=10,
+        companies=10,
+        pair_sheets=args.pair_sheets,
+        rows_per_sheet=args.rows_per_sheet,
+        months=args.months,
+    )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        counts = generate_dataset(db, config)
+    months = month_keys(config.start_month, config.months)
+    print(f"\nGET /reports/pivot over {counts['sheet_rows']} sheet rows, {counts['combined_invoice_lines']} invoice lines")
+    with TestClient(app) as client:
+        token = client.post("/auth/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for query in (
+            f"rows=employee&columns=month&start={months[0]}&end={months[-1]}",
+            "rows=employee&columns=company",
+            "source=invoices&rows=company&columns=month",
+        ):
+            elapsed, response = timed(lambda: client.get(f"/reports/pivot?{query}", headers=headers), args.repeat)
+            body = response.json()
+            print(f"  {query:60s} {elapsed:9.1f} ms  {len(body['rows'])} x {len(body['columns'])} ({body['engine']})")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pivot report grouping")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pair-sheets", type=int, default=40)
+    parser.add_argument("--rows-per-sheet", type=int, default=200, help="0 skips the endpoint timings")
+    args = parser.parse_args(argv)
+    workdir = Path(tempfile.mkdtemp(prefix="invoice-reports-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.chdir(workdir)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import reports
+
+    if reports.numpy_module() is None:
+        print("numpy is not installed; only the pure-Python version is available")
+        return 1
+    employee_ids, company_ids, month_keys, hours, amount = synthetic_columns(
+        args.rows, args.employees, args.companies, args.months
+    )
+    print(f"{args.rows} rows, {args.employees} employees, {args.companies} companies, {args.months} months")
+    for label, columns in (("employee x month", month_keys), ("employee x company", company_ids)):
+        numpy_ms, numpy_result = timed(lambda: reports.pivot_numpy(employee_ids, columns, hours, amount), args.repeat)
+        python_ms, python_result = timed(lambda: reports.pivot_python(employee_ids, columns, hours, amount), args.repeat)
+        assert same(numpy_result, python_result), label
+        print(f"  {label:20s} numpy {numpy_ms:9.1f} ms   python {python_ms:9.1f} ms   ({python_ms / numpy_ms:.1f}x)")
+
+    if args.rows_per_sheet > 0:
+        endpoint_timings(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""Bytes on the wire and client decode time per response format and encoding.
+
+Seeds a throwaway SQLite dataset, requests the large workbook and analytics
+payloads in every format ``app.wire`` negotiates (row JSON, columnar JSON,
+MessagePack, columnar MessagePack) and every content encoding, and reports the
+transferred size plus the time to decompress and decode the body back into
+row objects.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.wire_formats --employees 400 --rows-per-sheet 60
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+FORMATS = {
+    "json": "application/json",
+    "columnar+json": "application/vnd.invoiceflow.columnar+json",
+    "msgpack": "application/msgpack",
+    "columnar+msgpack": "application/vnd.invoiceflow.columnar+msgpack",
+}
+
+
+def from_columnar(value):
+    if isinstance(value, list):
+        return [from_columnar(item) for item in value]
+    if isinstance(value, dict):
+        if "$columns" in value:
+            columns = value["$columns"]
+            return [
+                {key: from_columnar(values[idx]) for key, values in columns.items()} for idx in range(value["$length"])
+            ]
+        return {key: from_columnar(item) for key, item in value.items()}
+    return value
+
+
+def decode(raw: bytes, encoding: str | None, media_type: str):
+    import brotli
+    import msgpack
+
+    if encoding == "gzip":
+        raw = gzip.decompress(raw)
+    elif encoding == "br":
+        raw = brotli.decompress(raw)
+    body = msgpack.unpackb(raw) if "msgpack" in media_type else json.loads(raw)
+    return from_columnar(body) if "columnar" in media_type else body
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare response formats and encodings")
+    parser.add_argument("--employees", type=int, default=400)
+    parser.add_argument("--pair-sheets", type=int, default=20)
+    parser.add_argument("--rows-per-sheet", type=int, default=60)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="invoice-wire-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.main import app
+    from app.seed import SeedConfig, generate_dataset, month_keys
+
+    config = SeedConfig(
+        employees=args.employees,
+        pair_sheets=args.pair_sheets,
+        rows_per_sheet=args.rows_per_sheet,
+        months=args.months,
+    )
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        generate_dataset(db, config)
+        sheet_id = db.query(models.PairSheet.id).order_by(models.PairSheet.id.asc()).first()[0]
+    month_key = month_keys(config.start_month, config.months)[-1]
+    paths = {
+        "sheet detail": f"/workbook/sheets/{sheet_id}?month_key={month_key}",
+        "pair balances": "/analytics/pair-balances",
+        "bootstrap": f"/workbook/bootstrap?month_key={month_key}&include_employees=true",
+    }
+
+    with TestClient(app) as client:
+        token = client.post("/auth/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+        for label, path in paths.items():
+            print(f"\n{label}: {path}")
+            baseline = None
+            for name, media_type in FORMATS.items():
+                for encoding in ("identity", "gzip", "br"):
+                    headers = {"Authorization": f"Bearer {token}", "Accept": media_type, "Accept-Encoding": encoding}
+                    with client.stream("GET", path, headers=headers) as response:
+                        raw = b"".join(response.iter_raw())
+                    content_encoding = response.headers.get("content-encoding")
+                    started = time.perf_counter()
+                    for _ in range(args.iterations):
+                        body = decode(raw, content_encoding, media_type)
+                    decode_ms = (time.perf_counter() - started) * 1000 / args.iterations
+                    if baseline is None:
+                        baseline = (len(raw), body)
+                    assert body == baseline[1], (label, name, encoding)
+                    print(
+                        f"  {name:17s} {encoding:8s} {len(raw):9d} B  {len(raw) / baseline[0]:6.1%}  "
+                        f"decode {decode_ms:7.3f} ms"
+                    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+"""Shared fixtures: a throwaway SQLite database, seeding and an authenticated client.
+
+Settings and the engine are read when ``app`` is first imported, so the
+environment is set here before any test module imports it. The suite runs with
+``QUERY_GUARD=raise``: every request a test makes also fails on N+1 lazy loads
+and on exceeding its route's ``@query_budget``.
+
+Run from ``backend/`` with ``python -m pytest``.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+WORKDIR = Path(tempfile.mkdtemp(prefix="invoice-tests-"))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR / 'test.db'}"
+os.environ["QUERY_GUARD"] = "raise"
+os.environ["PDF_WORKERS"] = "0"
+os.environ.pop("VERCEL", None)
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(WORKDIR)  # generated PDFs land in the scratch directory
+
+
+@pytest.fixture(scope="session")
+def seed_dataset():
+    """Replace the database contents with a ``SeedConfig(**overrides)`` dataset; returns the config."""
+    from app.db import Base, SessionLocal, engine
+    from app.seed import SeedConfig, generate_dataset
+
+    def seed(**overrides):
+        config = SeedConfig(**overrides)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            generate_dataset(db, config)
+        return config
+
+    return seed
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        token = test_client.post("/auth/login", json={"username": "admin", "password": "admin"}).json()
+        test_client.headers["Authorization"] = f"Bearer {token['access_token']}"
+        yield test_client
+
+
+@pytest.fixture
+def sql_counts():
+    """Records ``(path, SQL statements)`` for every request made during the test."""
+    from app import metrics
+
+    recorded: list[tuple[str, int]] = []
+
+    def record(stats, endpoint):
+        recorded.append((stats.path, stats.sql_count))
+
+    metrics.after_request_hooks.append(record)
+    yield recorded
+    metrics.after_request_hooks.remove(record)
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import models
+from app.db import SessionLocal
+
+
+def test_invoice_with_null_paid_counts_as_outstanding(client, seed_dataset):
+    seed_dataset(pair_sheets=4, months=2, invoice_ratio=1.0, sent_ratio=0.0)
+    sent_at = datetime.utcnow() - timedelta(days=45)
+    with SessionLocal() as db:
+        invoice = db.query(models.CombinedInvoice).order_by(models.CombinedInvoice.id).first()
+        # rows written before paid had a default, or by hand, can hold NULL
+        db.execute(
+            update(models.CombinedInvoice)
+            .where(models.CombinedInvoice.id == invoice.id)
+            .values(sent=True, sent_at=sent_at, paid=None)
+        )
+        db.commit()
+        amount = float(invoice.total_amount)
+
+    report = client.get("/analytics/aging").json()
+
+    assert report["invoice_count"] == 1
+    assert report["total_amount"] == amount
+    assert report["amounts"][1] == amount  # 31-60 days
+    assert [row["invoice_count"] for row in report["companies"]] == [1]
@@ -0,0 +1,36 @@
+import pytest
+
+from app import models
+from app.db import SessionLocal
+from app.seed import month_keys
+from app.settings import settings
+
+
+@pytest.fixture
+def cron_headers(monkeypatch):
+    monkeypatch.setattr(settings, "CRON_SECRET", "test-cron-secret")
+    return {"Authorization": "Bearer test-cron-secret"}
+
+
+@pytest.fixture
+def month_key(seed_dataset):
+    config = seed_dataset(pair_sheets=4, months=2, invoice_ratio=1.0)
+    return month_keys(config.start_month, config.months)[-1]
+
+
+def test_invoice_pdf_sweep_renders_every_missing_pdf(client, cron_headers, month_key, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_STORAGE", "disk")
+    response = client.get(f"/cron/run?jobs=invoice-pdfs&month_key={month_key}", headers=cron_headers)
+
+    assert response.status_code == 200
+    [job] = response.json()["jobs"]
+    # QUERY_GUARD=raise turns a lazy load repeated per invoice into a failed item
+    assert job["status"] == "done" and job["failed"] == 0 and job["processed"] == 4
+    with SessionLocal() as db:
+        missing = db.query(models.CombinedInvoice).filter_by(month_key=month_key, pdf_path=None).count()
+    assert missing == 0
+
+
+def test_month_key_must_be_a_month(client, cron_headers):
+    response = client.get("/cron/run?jobs=invoice-pdfs&month_key=2024-5", headers=cron_headers)
+    assert response.status_code == 422
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import delete, func, select
+
+from app import models, partitions
+from app.db import SessionLocal
+from app.seed import month_keys
+
+
+@pytest.fixture
+def archived_month(client, seed_dataset):
+    """A dataset with its first month archived, so deletes have hot and archived rows to remove."""
+    config = seed_dataset(vendors=3, companies=3, pair_sheets=6, months=3, invoice_ratio=1.0)
+    month_key = month_keys(config.start_month, config.months)[0]
+    assert client.post(f"/workbook/months/{month_key}/archive", json={"force": True}).status_code == 200
+    return month_key
+
+
+def sheet_counts(db, sheet_criterion) -> dict[str, int]:
+    """Rows that belong to the matching pair sheets, hot and archived months together."""
+    sheet_ids = select(models.PairSheet.id).where(sheet_criterion)
+    counts = {
+        "pair_sheets": db.scalar(select(func.count()).select_from(models.PairSheet).where(sheet_criterion)),
+        "sheet_rows": 0,
+        "invoices": 0,
+        "invoice_lines": 0,
+    }
+    for tables in (partitions.OPEN, partitions.CLOSED):
+        invoice_ids = select(tables.invoice.id).where(tables.invoice.pair_sheet_id.in_(sheet_ids))
+        counts["sheet_rows"] += db.scalar(
+            select(func.count()).select_from(tables.sheet_row).where(tables.sheet_row.pair_sheet_id.in_(sheet_ids))
+        )
+        counts["invoices"] += db.scalar(
+            select(func.count()).select_from(tables.invoice).where(tables.invoice.pair_sheet_id.in_(sheet_ids))
+        )
+        counts["invoice_lines"] += db.scalar(
+            select(func.count())
+            .select_from(tables.invoice_line)
+            .where(tables.invoice_line.combined_invoice_id.in_(invoice_ids))
+        )
+    return counts
+
+
+@pytest.mark.parametrize(
+    ("path", "model", "column"),
+    [
+        ("/vendors", models.Vendor, models.PairSheet.vendor_id),
+        ("/companies", models.Company, models.PairSheet.company_id),
+    ],
+)
+def test_delete_removes_pair_sheets_with_their_archived_months(client, archived_month, path, model, column):
+    with SessionLocal() as db:
+        owner_id = db.scalar(
+            select(column).join(models.SheetRowArchive, models.SheetRowArchive.pair_sheet_id == models.PairSheet.id)
+        )
+        expected = sheet_counts(db, column == owner_id)
+    assert expected["pair_sheets"] and expected["invoice_lines"]
+
+    response = client.delete(f"{path}/{owner_id}")
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": owner_id, **expected}
+    with SessionLocal() as db:
+        assert db.get(model, owner_id) is None
+        assert sheet_counts(db, column == owner_id) == dict.fromkeys(expected, 0)
+        # the archived rows went too, not only the hot ones
+        for tables in (partitions.OPEN, partitions.CLOSED):
+            orphans = select(func.count()).select_from(tables.sheet_row).where(
+                tables.sheet_row.pair_sheet_id.not_in(select(models.PairSheet.id))
+            )
+            assert db.scalar(orphans) == 0
+
+
+def test_delete_unknown_vendor_is_404(client, archived_month):
+    assert client.delete("/vendors/999999").status_code == 404
+
+
+def test_employee_on_hot_or_archived_rows_cannot_be_deleted(client, archived_month):
+    with SessionLocal() as db:
+        archived_employee = db.scalar(select(models.SheetRowArchive.employee_id))
+        hot_employee = db.scalar(select(models.SheetRow.employee_id).where(models.SheetRow.employee_id != archived_employee))
+        # leave the second employee on archived rows only
+        db.execute(delete(models.SheetRow).where(models.SheetRow.employee_id == archived_employee))
+        db.commit()
+
+    for employee_id in (hot_employee, archived_employee):
+        response = client.delete(f"/employees/{employee_id}")
+        assert response.status_code == 409, employee_id
+        with SessionLocal() as db:
+            assert db.get(models.Employee, employee_id) is not None
+
+
+def test_employee_without_sheet_rows_is_deleted(client, archived_month):
+    employee = client.post("/employees", json={"name": "Nobody On A Sheet", "hourly_rate": 50}).json()
+    response = client.delete(f"/employees/{employee['id']}")
+    assert response.status_code == 200
+    assert response.json()["deleted"] == employee["id"]
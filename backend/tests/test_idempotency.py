@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import models  # noqa: F401  (registers idempotency_keys on Base)
+from app.auth import create_access_token
+from app.db import Base, engine
+from app.idempotency import IdempotentRoute, idempotent
+from app.settings import settings
+
+calls: list[str] = []
+
+
+@pytest.fixture(scope="module")
+def app():
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.router.route_class = IdempotentRoute
+
+    @app.post("/charge")
+    @idempotent("test-charge")
+    async def charge(payload: dict):
+        calls.append("charge")
+        await asyncio.sleep(payload.get("seconds", 0))
+        return {"charge": len(calls)}
+
+    @app.post("/flaky")
+    @idempotent("test-flaky")
+    async def flaky():
+        calls.append("flaky")
+        if len(calls) == 1:
+            raise HTTPException(status_code=503, detail="try again")
+        return {"attempt": len(calls)}
+
+    return app
+
+
+@pytest.fixture
+def headers():
+    calls.clear()
+    token = create_access_token({"sub": "admin"})
+    return {"Authorization": f"Bearer {token}", "Idempotency-Key": uuid.uuid4().hex}
+
+
+def test_same_key_and_body_replays(app, headers):
+    client = TestClient(app)
+    first = client.post("/charge", json={"amount": 10}, headers=headers)
+    second = client.post("/charge", json={"amount": 10}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert calls == ["charge"]
+
+
+def test_same_key_with_another_request_is_rejected(app, headers):
+    client = TestClient(app)
+    assert client.post("/charge", json={"amount": 10}, headers=headers).status_code == 200
+    assert client.post("/charge", json={"amount": 99}, headers=headers).status_code == 422
+    # the stored body is JSON, so a replay cannot answer a client that asked for another representation
+    other_accept = {**headers, "Accept": "application/msgpack"}
+    assert client.post("/charge", json={"amount": 10}, headers=other_accept).status_code == 422
+    assert calls == ["charge"]
+
+
+def test_concurrent_duplicate_waits_then_replays(app, headers, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_POLL_SECONDS", 0.02)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as http:
+            return await asyncio.gather(
+                http.post("/charge", json={"seconds": 0.3}),
+                http.post("/charge", json={"seconds": 0.3}),
+            )
+
+    responses = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert sorted(response.headers.get("Idempotent-Replayed", "false") for response in responses) == ["false", "true"]
+    assert calls == ["charge"]
+
+
+def test_failed_handler_releases_the_key(app, headers):
+    client = TestClient(app)
+    assert client.post("/flaky", headers=headers).status_code == 503
+    retry = client.post("/flaky", headers=headers)
+
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert calls == ["flaky", "flaky"]
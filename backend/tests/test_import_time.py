@@ -0,0 +1,16 @@
+"""Cold-start budget of the serverless entry point (see ``benchmarks.import_time``)."""
+import os
+import statistics
+
+from benchmarks.import_time import eager_imports, measure_once
+
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+RUNS = 3
+
+
+def test_app_import_stays_within_budget_and_lazy():
+    runs = [measure_once("app.main") for _ in range(RUNS)]
+    for timings in runs:
+        assert not eager_imports(timings), f"imported eagerly: {', '.join(eager_imports(timings))}"
+    median_ms = statistics.median(timings.get("app.main", 0) / 1000 for timings in runs)
+    assert 0 < median_ms <= BUDGET_MS, f"import app.main took {median_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)"
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app import execution, main
+from app.main import app
+from app.seed import month_keys
+from app.settings import settings
+
+
+@pytest.fixture(scope="module")
+def month_key(seed_dataset):
+    config = seed_dataset(pair_sheets=4, months=2, invoice_ratio=1.0)
+    return month_keys(config.start_month, config.months)[-1]
+
+
+@pytest.fixture
+def slow_renders(monkeypatch):
+    """In-memory renders that take a while, so an archive is still streaming when the next one arrives."""
+
+    def render(**kwargs):
+        time.sleep(0.2)
+        return f"{kwargs['invoice_number']}.pdf", b"%PDF-1.4 test"
+
+    monkeypatch.setattr(settings, "PDF_STORAGE", "memory")
+    monkeypatch.setattr(execution, "render_pdf_bytes", render)
+
+
+@pytest.fixture
+def one_archive_at_a_time(monkeypatch):
+    limiter = execution.limiters["invoice-archive"]
+    monkeypatch.setattr(limiter, "max_concurrent", 1)
+    monkeypatch.setattr(limiter, "max_queued", 0)
+    monkeypatch.setattr(limiter, "_semaphore", None)
+    return limiter
+
+
+def test_streaming_archive_holds_its_admission_slot(client, month_key, slow_renders, one_archive_at_a_time):
+    headers = {"Authorization": client.headers["Authorization"]}
+    path = f"/combined-invoices/archive?month_key={month_key}"
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as http:
+            first = asyncio.create_task(http.get(path))
+            await asyncio.sleep(0.1)  # the first archive is rendering its PDFs by now
+            second = await http.get(path)
+            assert one_archive_at_a_time.active == 1
+            first_response = await first
+            assert one_archive_at_a_time.active == 0
+            third = await http.get(path)
+        return first_response, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first.status_code == 200 and first.content.startswith(b"PK")
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+    assert third.status_code == 200
+
+
+def test_slot_is_released_when_the_route_fails(client, one_archive_at_a_time):
+    response = client.get("/combined-invoices/archive?month_key=1999-01")
+    assert response.status_code == 404
+    assert one_archive_at_a_time.active == 0
+
+
+def test_closed_archive_stops_rendering(monkeypatch):
+    rendered = []
+
+    def render(**kwargs):
+        time.sleep(0.05)
+        rendered.append(kwargs["invoice_number"])
+        return f"{kwargs['invoice_number']}.pdf", b"%PDF-1.4 test"
+
+    monkeypatch.setattr(settings, "PDF_STORAGE", "memory")
+    monkeypatch.setattr(settings, "ARCHIVE_RENDER_CONCURRENCY", 2)
+    monkeypatch.setattr(execution, "render_pdf_bytes", render)
+    pending = [(invoice_id, {"invoice_number": f"INV-{invoice_id}", "month_key": "2024-01"}) for invoice_id in range(20)]
+
+    stream = main.stream_invoice_archive([], pending)
+    next(stream)  # the first PDF is going into the archive
+    stream.close()  # the client disconnected
+
+    # two renders in flight plus the one submitted when the first was archived; the rest never start
+    assert len(rendered) <= 3
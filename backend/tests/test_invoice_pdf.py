@@ -0,0 +1,33 @@
+import pytest
+from reportlab import rl_config
+
+from app.invoice_pdf import combined_invoice_pdf_bytes
+from benchmarks.pdf_size import invoice_fields
+
+
+def render(profile: str, line_count: int = 30) -> bytes:
+    return combined_invoice_pdf_bytes(profile=profile, **invoice_fields(line_count))[1]
+
+
+@pytest.mark.parametrize("line_count", [1, 30, 400])
+def test_compact_profile_is_smaller_than_reportlab_defaults(line_count):
+    default, compact = render("reportlab", line_count), render("compact", line_count)
+
+    assert b"/ASCII85Decode" in default
+    assert b"/ASCII85Decode" not in compact and b"/FlateDecode" in compact
+    assert len(compact) < len(default)
+    if line_count >= 30:  # once the page content outweighs the fixed objects, the saving is real
+        assert len(compact) < len(default) * 0.9
+
+
+def test_compact_profile_leaves_reportlab_globals_alone():
+    use_a85 = rl_config.useA85
+    render("compact")
+    assert rl_config.useA85 == use_a85
+    assert b"/ASCII85Decode" in render("reportlab")
+
+
+def test_minimal_profile_is_reproducible():
+    first = render("minimal")
+    assert render("minimal") == first
+    assert b"/Lang" in first and b"Invoice INV-2024-01-0001" in first
@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine, inspect
+
+from app import migrations, models
+
+# the tables a database created before month archiving, change events and idempotency keys has
+ORIGINAL_TABLES = [
+    models.Vendor.__table__,
+    models.Company.__table__,
+    models.Employee.__table__,
+    models.PairSheet.__table__,
+    models.SheetRow.__table__,
+    models.CombinedInvoice.__table__,
+    models.CombinedInvoiceLine.__table__,
+]
+
+
+def test_migrate_upgrades_an_existing_database_and_is_repeatable(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    models.Base.metadata.create_all(bind=engine, tables=ORIGINAL_TABLES)
+
+    applied = migrations.migrate(engine)
+
+    created = {change.removeprefix("created table ") for change in applied}
+    assert {"closed_months", "sheet_rows_archive", "change_events", "idempotency_keys"} <= created
+    inspector = inspect(engine)
+    assert {"sheet_rows_all", "combined_invoices_all", "combined_invoice_lines_all"} <= set(inspector.get_view_names())
+    indexes = {index["name"] for index in inspector.get_indexes("combined_invoices")}
+    assert "ix_combined_invoices_paid_sent_at" in indexes
+    assert migrations.migrate(engine) == []
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.db import SessionLocal
+from app.seed import month_keys
+from app.settings import settings
+
+
+@pytest.fixture
+def month_key(seed_dataset, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_STORAGE", "memory")  # archive ZIPs render without touching the invoices
+    config = seed_dataset(pair_sheets=4, months=2, invoice_ratio=1.0)
+    return month_keys(config.start_month, config.months)[0]
+
+
+# archived invoice lines carry an extra month_key; compare the columns the hot tables have
+HOT_TABLES = {
+    models.SheetRowArchive: models.SheetRow,
+    models.CombinedInvoiceArchive: models.CombinedInvoice,
+    models.CombinedInvoiceLineArchive: models.CombinedInvoiceLine,
+}
+
+
+def month_rows(month_key: str, sheet_row, invoice, invoice_line) -> dict[str, list[dict]]:
+    """Every row of ``month_key`` in the given tables, as plain dicts ordered by id."""
+
+    def rows(db, model, where):
+        table = model.__table__
+        names = [column.name for column in HOT_TABLES.get(model, model).__table__.columns]
+        result = db.execute(select(*(table.c[name] for name in names)).where(where).order_by(table.c.id))
+        return [row._asdict() for row in result]
+
+    invoice_ids = select(invoice.id).where(invoice.month_key == month_key)
+    with SessionLocal() as db:
+        return {
+            "sheet_rows": rows(db, sheet_row, sheet_row.month_key == month_key),
+            "invoices": rows(db, invoice, invoice.month_key == month_key),
+            "invoice_lines": rows(db, invoice_line, invoice_line.combined_invoice_id.in_(invoice_ids)),
+        }
+
+
+def hot_rows(month_key):
+    return month_rows(month_key, models.SheetRow, models.CombinedInvoice, models.CombinedInvoiceLine)
+
+
+def archived_rows(month_key):
+    return month_rows(
+        month_key, models.SheetRowArchive, models.CombinedInvoiceArchive, models.CombinedInvoiceLineArchive
+    )
+
+
+def test_archive_and_reopen_round_trip(client, month_key):
+    original = hot_rows(month_key)
+    assert all(original.values())
+    sheet_id = original["sheet_rows"][0]["pair_sheet_id"]
+    sheet_before = client.get(f"/workbook/sheets/{sheet_id}?month_key={month_key}").json()
+    listing_before = client.get(f"/workbook/sheets?month_key={month_key}").json()
+
+    archived = client.post(f"/workbook/months/{month_key}/archive", json={"force": True}).json()
+    assert archived == {
+        "month_key": month_key,
+        "archived": True,
+        **{kind: len(rows) for kind, rows in original.items()},
+    }
+    assert not any(hot_rows(month_key).values())
+    assert archived_rows(month_key) == original
+
+    # reads still see the month
+    assert client.get(f"/workbook/sheets/{sheet_id}?month_key={month_key}").json() == sheet_before
+    assert client.get(f"/workbook/sheets?month_key={month_key}").json() == listing_before
+    zipped = client.get(f"/combined-invoices/archive?month_key={month_key}")
+    assert zipped.status_code == 200 and zipped.content.startswith(b"PK")
+
+    # writes are refused until the month is reopened
+    assert client.put(f"/workbook/sheets/{sheet_id}?month_key={month_key}", json={"rows": []}).status_code == 409
+    assert client.post(f"/workbook/sheets/{sheet_id}/invoice/generate?month_key={month_key}").status_code == 409
+
+    again = client.post(f"/workbook/months/{month_key}/archive", json={"force": True}).json()
+    assert (again["sheet_rows"], again["invoices"], again["invoice_lines"]) == (0, 0, 0)
+
+    reopened = client.post(f"/workbook/months/{month_key}/reopen").json()
+    assert reopened == {"month_key": month_key, "archived": False, **{kind: len(rows) for kind, rows in original.items()}}
+    assert hot_rows(month_key) == original  # ids included
+    assert not any(archived_rows(month_key).values())
+
+    again = client.post(f"/workbook/months/{month_key}/reopen").json()
+    assert (again["sheet_rows"], again["invoices"], again["invoice_lines"]) == (0, 0, 0)
+    assert hot_rows(month_key) == original
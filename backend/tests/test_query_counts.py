@@ -0,0 +1,53 @@
+"""Read endpoints issue the same number of SQL statements whatever the data size."""
+from app import models
+from app.db import SessionLocal
+from app.seed import month_keys
+
+SMALL = {"employees": 20, "pair_sheets": 4, "rows_per_sheet": 3, "months": 4}
+LARGE = {"employees": 120, "pair_sheets": 24, "rows_per_sheet": 15, "months": 14}
+
+
+def endpoint_paths(config) -> dict[str, str]:
+    months = month_keys(config.start_month, config.months)
+    month_key = months[-1]
+    with SessionLocal() as db:
+        sheet_id = db.query(models.PairSheet.id).order_by(models.PairSheet.id).first()[0]
+    return {
+        "vendors": "/vendors",
+        "companies": "/companies",
+        "employees": "/employees",
+        "sheet list": f"/workbook/sheets?month_key={month_key}",
+        # no rows in that month yet: row counts come from each sheet's history
+        "sheet list, unopened month": "/workbook/sheets?month_key=2099-01",
+        "sheet detail": f"/workbook/sheets/{sheet_id}?month_key={month_key}",
+        "sheet invoices by month": f"/workbook/sheets/{sheet_id}/range?from={months[0]}&to={month_key}",
+        "bootstrap": f"/workbook/bootstrap?month_key={month_key}&include_employees=true",
+        "summary": f"/analytics/summary?month_key={month_key}",
+        "company balances": "/analytics/company-balances",
+        "vendor balances": "/analytics/vendor-balances",
+        "pair balances": "/analytics/pair-balances",
+        "earnings": "/analytics/earnings",
+        "aging": "/analytics/aging",
+        "trends": f"/analytics/trends?by=company&start={months[0]}&end={month_key}",
+        "pivot sheets": "/reports/pivot?rows=employee&columns=month",
+        "pivot invoices": "/reports/pivot?source=invoices&rows=employee&columns=company",
+    }
+
+
+def statement_counts(client, sql_counts, seed_dataset, overrides) -> dict[str, int]:
+    config = seed_dataset(**overrides)
+    counts = {}
+    for label, path in endpoint_paths(config).items():
+        sql_counts.clear()
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.text[:200])
+        counts[label] = sql_counts[-1][1]
+    return counts
+
+
+def test_statement_counts_do_not_grow_with_data(client, sql_counts, seed_dataset):
+    small = statement_counts(client, sql_counts, seed_dataset, SMALL)
+    large = statement_counts(client, sql_counts, seed_dataset, LARGE)
+    assert small.keys() == large.keys()
+    grown = {label: (small[label], large[label]) for label in small if small[label] != large[label]}
+    assert not grown, f"statement count depends on data size (small, large): {grown}"
@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import main, metrics, models  # noqa: F401  (importing main installs the guard and SQL hooks)
+from app.db import SessionLocal
+from app.query_guard import QueryGuardError, query_budget
+from app.settings import settings
+
+
+@pytest.fixture(scope="module", autouse=True)
+def dataset(seed_dataset):
+    return seed_dataset(companies=5, pair_sheets=10, months=2)
+
+
+@pytest.fixture(scope="module")
+def guarded_client():
+    """A bare app with the metrics middleware, so routes run under the installed guard."""
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/fan-out")
+    @query_budget(None)
+    def fan_out():
+        with SessionLocal() as db:
+            # one lazy load of Company.pair_sheets per company
+            return {company.name: len(company.pair_sheets) for company in db.query(models.Company)}
+
+    @app.get("/over-budget")
+    @query_budget(1)
+    def over_budget():
+        with SessionLocal() as db:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 1"))
+        return {}
+
+    return TestClient(app)
+
+
+def test_repeated_lazy_load_raises(guarded_client):
+    with pytest.raises(QueryGuardError, match=r"N\+1 query pattern .* Company.pair_sheets -> PairSheet"):
+        guarded_client.get("/fan-out")
+
+
+def test_route_over_its_budget_fails(guarded_client):
+    with pytest.raises(QueryGuardError, match="issued 2 SQL statements, over its budget of 1"):
+        guarded_client.get("/over-budget")
+
+
+def test_off_mode_is_inert(guarded_client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD", "off")
+    monkeypatch.setattr(settings, "DEBUG", False)
+    assert guarded_client.get("/fan-out").status_code == 200
+    assert guarded_client.get("/over-budget").status_code == 200
+
+
+def test_suite_runs_in_raise_mode():
+    # conftest sets QUERY_GUARD=raise so every endpoint test also enforces the route budgets
+    assert settings.QUERY_GUARD == "raise"
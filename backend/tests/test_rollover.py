@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.db import SessionLocal
+from app.seed import month_keys
+
+ROSTER = (
+    models.SheetRow.pair_sheet_id,
+    models.SheetRow.employee_id,
+    models.SheetRow.role,
+    models.SheetRow.notes,
+    models.SheetRow.rate,
+    models.SheetRow.sort_order,
+)
+
+
+@pytest.fixture
+def months(seed_dataset):
+    config = seed_dataset(pair_sheets=4, months=2)
+    return month_keys(config.start_month, config.months)
+
+
+def month_rows(month_key: str, *columns) -> list[tuple]:
+    with SessionLocal() as db:
+        rows = db.execute(select(*ROSTER, *columns).where(models.SheetRow.month_key == month_key))
+        return sorted(tuple(row) for row in rows)
+
+
+def test_rollover_copies_each_sheets_latest_roster_once(client, months):
+    latest, new_month = months[-1], "2024-03"
+    roster = month_rows(latest)
+
+    opened = client.post(f"/workbook/months/{new_month}/rollover").json()
+
+    assert opened == {
+        "month_key": new_month,
+        "from_month_key": None,
+        "source_month_keys": [latest],
+        "sheets": len({row[0] for row in roster}),
+        "rows": len(roster),
+    }
+    assert month_rows(new_month, models.SheetRow.hours) == [(*row, 0.0) for row in roster]
+
+    again = client.post(f"/workbook/months/{new_month}/rollover").json()
+    assert (again["sheets"], again["rows"], again["source_month_keys"]) == (0, 0, [])
+    assert month_rows(new_month, models.SheetRow.hours) == [(*row, 0.0) for row in roster]
+
+
+def test_rollover_from_an_explicit_month_keeping_hours(client, months):
+    source, new_month = months[0], "2024-04"
+    with_hours = month_rows(source, models.SheetRow.hours)
+
+    opened = client.post(
+        f"/workbook/months/{new_month}/rollover", json={"from_month_key": source, "zero_hours": False}
+    ).json()
+
+    assert (opened["from_month_key"], opened["source_month_keys"], opened["rows"]) == (source, [source], len(with_hours))
+    assert month_rows(new_month, models.SheetRow.hours) == with_hours
+
+
+def test_rollover_source_must_be_earlier(client, months):
+    response = client.post(f"/workbook/months/{months[0]}/rollover", json={"from_month_key": months[-1]})
+    assert response.status_code == 400
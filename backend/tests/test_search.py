@@ -0,0 +1,122 @@
+import os
+import random
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app import models, search
+
+NAMES = [
+    "Hanna Anderson",
+    "Anna Smith",
+    "Ann",
+    "Andersen-Hale Staffing",
+    "Dan Anand",
+    "Joanna_Banks",
+    "Brandon Lee",
+    "Annette O'Neil",
+    "Susan Anders",
+    "Nathan Andrews",
+    "Smith & Anderson Co.",
+    "Anderzon Holdings",
+]
+QUERIES = ["an", "a", "ann", "anna", "and", "anders", "anderson", "son", "smith", "hanna anderson", "andersn", "x"]
+
+
+def generated_names(count: int) -> list[str]:
+    rng = random.Random(7)
+    first = ["Anna", "Hannah", "Dana", "Sean", "Joan", "Stan", "Leander", "Nan", "Iris", "Ryan"]
+    last = ["Anderson", "Sandoval", "Nguyen", "Hanson", "Evans", "Grant", "Ansel", "Dean", "Brandt", "Ivanova"]
+    names = []
+    for _ in range(count):
+        name = f"{rng.choice(first)} {rng.choice(last)}"
+        names.append(f"{name}-{rng.choice(last)}" if rng.random() < 0.2 else name)
+    return names
+
+
+def reference(names: list[str], query: str, limit: int) -> list[tuple[float, str, str]]:
+    """Every name scored one by one: the ranking both search backends must reproduce."""
+    ranked = [(*result, name) for name in names if (result := search.score(query, name))]
+    return sorted(ranked, key=lambda item: (-item[0], item[2].lower()))[:limit]
+
+
+@pytest.mark.parametrize(
+    ("query", "name", "expected"),
+    [
+        ("hanna anderson", "Hanna Anderson", "exact"),
+        ("han", "Hanna Anderson", "prefix"),
+        # the first "an" is inside "Hanna"; the word start comes later
+        ("an", "Hanna Anderson", "word_prefix"),
+        ("anderson", "Smith & Anderson Co.", "word_prefix"),
+        ("hale", "Andersen-Hale Staffing", "word_prefix"),
+        ("banks", "Joanna_Banks", "word_prefix"),
+        ("nna", "Hanna Anderson", "substring"),
+        ("andersn", "Hanna Anderson", "fuzzy"),
+        ("an", "Dana Grant", None),  # too short for a substring match
+        ("zzz", "Hanna Anderson", None),
+    ],
+)
+def test_score_match_kinds(query, name, expected):
+    result = search.score(query, name)
+    assert (result[1] if result else None) == expected
+
+
+def test_ranking_prefers_exact_then_prefix_then_word_start():
+    ranked = [name for _, _, name in reference(NAMES, "ann", 10)]
+    assert ranked[:3] == ["Ann", "Anna Smith", "Annette O'Neil"]
+    assert [name for _, match, name in reference(NAMES, "an", 10) if match == "word_prefix"] == [
+        "Dan Anand",
+        "Hanna Anderson",
+        "Nathan Andrews",
+        "Smith & Anderson Co.",
+        "Susan Anders",
+    ]
+
+
+@pytest.mark.parametrize("names", [NAMES, generated_names(400)], ids=["handpicked", "generated"])
+@pytest.mark.parametrize("limit", [3, 10, 50])
+def test_memory_index_matches_scoring_every_name(names, limit):
+    index = search.NgramIndex([search.Entry(idx, name, name.lower()) for idx, name in enumerate(names)])
+    for query in QUERIES:
+        found = [(value, match, entry.name) for value, match, entry in index.search(query, limit)]
+        assert found == reference(names, query, limit), query
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"), reason="set TEST_POSTGRES_URL to a PostgreSQL database with pg_trgm available"
+)
+def test_pg_trgm_search_matches_the_memory_index():
+    names = list(dict.fromkeys(NAMES + generated_names(400)))  # employee names are unique
+    engine = create_engine(
+        os.environ["TEST_POSTGRES_URL"], connect_args={"options": "-csearch_path=search_test,public"}
+    )
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS search_test CASCADE"))
+        conn.execute(text("CREATE SCHEMA search_test"))
+    try:
+        models.Base.metadata.create_all(bind=engine, tables=[models.Employee.__table__])
+        with engine.begin() as conn:
+            conn.execute(insert(models.Employee), [{"name": name, "hourly_rate": 50} for name in names])
+        search.ensure_search_indexes(engine)
+        index = search.NgramIndex([search.Entry(idx, name, name.lower()) for idx, name in enumerate(names)])
+        with Session(engine) as db:
+            for query in QUERIES:
+                for limit in (3, 10):
+                    # fuzzy candidates come from pg_trgm's own similarity threshold; every other
+                    # tier ranks above them and must agree exactly
+                    from_pg = [
+                        (row["score"], row["match"], row["name"])
+                        for row in search.search(db, query, ["employee"], limit)
+                        if row["match"] != "fuzzy"
+                    ]
+                    from_memory = [
+                        (value, match, entry.name)
+                        for value, match, entry in index.search(query, limit)
+                        if match != "fuzzy"
+                    ]
+                    assert from_pg == from_memory, (query, limit)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA search_test CASCADE"))
+        search._pg_trgm = None
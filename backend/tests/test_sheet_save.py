@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event, update
+
+from app import models
+from app.db import SessionLocal, engine
+from app.seed import month_keys
+from app.settings import settings
+
+
+@pytest.fixture
+def writes():
+    """INSERT, UPDATE and DELETE statements sent to the database during the test."""
+    recorded: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(" ", 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            recorded.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def touching(statements: list[str], table: str) -> list[str]:
+    return [statement.split(" ", 1)[0] for statement in statements if f" {table} " in f"{statement} "]
+
+
+@pytest.fixture
+def sheet(client, seed_dataset, monkeypatch):
+    """A sheet path and its rows, saved once so the stored rows match what the page sends back."""
+    monkeypatch.setattr(settings, "PDF_STORAGE", "memory")
+    config = seed_dataset(pair_sheets=2, months=1, rows_per_sheet=4, invoice_ratio=1.0)
+    month_key = month_keys(config.start_month, config.months)[0]
+    with SessionLocal() as db:
+        sheet_id = db.query(models.PairSheet.id).order_by(models.PairSheet.id).first()[0]
+    path = f"/workbook/sheets/{sheet_id}?month_key={month_key}"
+    rows = client.get(path).json()["rows"]
+    assert len(rows) >= 3
+    return path, client.put(path, json={"rows": rows}).json()["rows"]
+
+
+def test_saving_an_unchanged_sheet_writes_nothing(client, sheet, writes):
+    path, rows = sheet
+    response = client.put(path, json={"rows": rows})
+
+    assert response.status_code == 200
+    assert response.json()["rows"] == rows
+    assert writes == []
+
+
+def test_save_writes_only_the_changed_rows(client, sheet, writes):
+    path, rows = sheet
+    edited = [dict(row) for row in rows[:-1]]
+    edited[1]["hours"] += 1
+    edited.append({"employee_id": rows[0]["employee_id"], "role": "Reviewer", "hours": 2, "rate": 10})
+
+    saved = client.put(path, json={"rows": edited}).json()["rows"]
+
+    assert sorted(touching(writes, "sheet_rows")) == ["DELETE", "INSERT", "UPDATE"]
+    assert [row["id"] for row in saved[:-1]] == [row["id"] for row in rows[:-1]]
+    assert saved[1]["hours"] == rows[1]["hours"] + 1
+    assert saved[-1]["id"] not in {row["id"] for row in rows}
+
+
+def invoice_lines(invoice_id: int) -> list[tuple[int, float]]:
+    line = models.CombinedInvoiceLine
+    with SessionLocal() as db:
+        rows = db.query(line.id, line.hours).filter(line.combined_invoice_id == invoice_id).order_by(line.sort_order)
+        return [tuple(row) for row in rows]
+
+
+def test_invoice_lines_are_synced_by_diff(client, sheet, writes):
+    path, rows = sheet
+    generate = path.replace("?", "/invoice/generate?")
+    invoice_id = client.post(generate).json()["id"]
+    lines = invoice_lines(invoice_id)
+    writes.clear()
+
+    client.post(generate)
+    assert writes == []  # nothing changed: no line writes, no new PDF
+    assert invoice_lines(invoice_id) == lines
+
+    with SessionLocal() as db:
+        db.execute(update(models.SheetRow).where(models.SheetRow.id == rows[1]["id"]).values(hours=99))
+        db.commit()
+    writes.clear()
+    client.post(generate)
+
+    assert touching(writes, "combined_invoice_lines") == ["UPDATE"]
+    regenerated = invoice_lines(invoice_id)
+    assert [line_id for line_id, _ in regenerated] == [line_id for line_id, _ in lines]
+    assert regenerated[1][1] == 99
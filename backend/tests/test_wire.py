@@ -0,0 +1,44 @@
+import pytest
+
+from app import wire
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("br;q=0, gzip;q=0", None),
+        ("*;q=0.5, gzip;q=0", "br"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_choose_encoding_honours_q_values(accept_encoding, expected):
+    assert wire.choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        ("", wire.JSON),
+        ("application/msgpack", wire.MSGPACK),
+        ("application/msgpack;q=0, application/json", wire.JSON),
+        ("application/json;q=0.5, application/vnd.invoiceflow.columnar+json", wire.COLUMNAR_JSON),
+    ],
+)
+def test_negotiate_honours_q_values(accept, expected):
+    assert wire.negotiate(accept) == expected
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity", "br;q=0, gzip;q=0"])
+def test_negotiated_responses_vary_on_accept_encoding(client, seed_dataset, accept_encoding):
+    seed_dataset(employees=200)
+    response = client.get("/employees", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    vary = {value.strip().lower() for value in response.headers.get("vary", "").split(",")}
+    assert {"accept", "accept-encoding"} <= vary
+    assert response.headers.get("content-encoding") == ("gzip" if accept_encoding == "gzip" else None)
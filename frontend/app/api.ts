@@ -16,20 +16,54 @@ async function readError(res: Response) {
   return text || `Request failed with status ${res.status}`;
 }
 
+// Large list endpoints can answer in columnar JSON (one array per field instead of one
+// object per row); the browser handles gzip/brotli itself.
+const COLUMNAR_JSON = "application/vnd.invoiceflow.columnar+json";
+const ACCEPT = `${COLUMNAR_JSON}, application/json;q=0.9`;
+
+function fromColumnar(value: any): any {
+  if (Array.isArray(value)) return value.map(fromColumnar);
+  if (value && typeof value === "object") {
+    if ("$columns" in value && "$length" in value) {
+      const columns: Record<string, any[]> = value.$columns;
+      const keys = Object.keys(columns);
+      return Array.from({ length: value.$length }, (_, index) => {
+        const row: Record<string, any> = {};
+        keys.forEach((key) => {
+          row[key] = fromColumnar(columns[key][index]);
+        });
+        return row;
+      });
+    }
+    const decoded: Record<string, any> = {};
+    Object.keys(value).forEach((key) => {
+      decoded[key] = fromColumnar(value[key]);
+    });
+    return decoded;
+  }
+  return value;
+}
+
+async function readBody(res: Response) {
+  const body = await res.json();
+  return (res.headers.get("content-type") || "").startsWith(COLUMNAR_JSON) ? fromColumnar(body) : body;
+}
+
 export async function apiGet<T>(path: string): Promise<T> {
   const res = await fetch(`${API}${path}`, { 
     cache: "no-store",
-    headers: getAuthHeaders()
+    headers: { Accept: ACCEPT, ...getAuthHeaders() }
   });
   if (!res.ok) throw new Error(await readError(res));
-  return res.json();
+  return readBody(res);
 }
 
-export async function apiPost<T>(path: string, body?: any): Promise<T> {
+export async function apiPost<T>(path: string, body?: any, options?: { idempotencyKey?: string }): Promise<T> {
   const res = await fetch(`${API}${path}`, {
     method: "POST",
     headers: { 
       "Content-Type": "application/json",
+      ...(options?.idempotencyKey ? { "Idempotency-Key": options.idempotencyKey } : {}),
       ...getAuthHeaders()
     },
     body: body ? JSON.stringify(body) : undefined,
@@ -43,12 +77,13 @@ export async function apiPut<T>(path: string, body?: any): Promise<T> {
     method: "PUT",
     headers: {
       "Content-Type": "application/json",
+      Accept: ACCEPT,
       ...getAuthHeaders()
     },
     body: body ? JSON.stringify(body) : undefined,
   });
   if (!res.ok) throw new Error(await readError(res));
-  return res.json();
+  return readBody(res);
 }
 
 export async function apiDelete<T>(path: string): Promise<T> {
@@ -59,3 +94,22 @@ export async function apiDelete<T>(path: string): Promise<T> {
   if (!res.ok) throw new Error(await readError(res));
   return res.json();
 }
+
+export type ChangeEvent = {
+  kind: string;
+  pair_sheet_id?: number;
+  month_key?: string;
+  invoice_id?: number;
+};
+
+// Server-sent change events from other users and tabs. EventSource reconnects on its own
+// (resuming from the last event id); `onReset` means events were missed and everything
+// should be re-fetched.
+export function subscribeChanges(onChange: (event: ChangeEvent) => void, onReset: () => void) {
+  const token = typeof window !== "undefined" ? localStorage.getItem("token") : null;
+  if (!token || typeof EventSource === "undefined") return () => undefined;
+  const source = new EventSource(`${API}/events?token=${encodeURIComponent(token)}`);
+  source.onmessage = (message) => onChange(JSON.parse(message.data));
+  source.addEventListener("reset", onReset);
+  return () => source.close();
+}
@@ -1,12 +1,13 @@
 "use client";
 
-import { ClipboardEvent, KeyboardEvent, useEffect, useMemo, useState } from "react";
+import { ClipboardEvent, KeyboardEvent, useEffect, useMemo, useRef, useState } from "react";
 import Shell from "@/components/Shell";
-import { apiGet, apiPost, apiPut } from "@/app/api";
+import { ChangeEvent, apiGet, apiPost, apiPut, subscribeChanges } from "@/app/api";
 
 type Vendor = { id: number; name: string; email: string };
 type Company = { id: number; name: string; address?: string | null };
 type Employee = { id: number; name: string; hourly_rate: number };
+type SearchResult = { kind: string; id: number; name: string; score: number; match: string; hourly_rate?: number | null };
 type PairSheet = {
   id: number;
   vendor_id: number;
@@ -54,6 +55,14 @@ type WorkbookDetail = {
   invoice?: CombinedInvoice | null;
 };
 type SummaryCard = { label: string; value: number };
+type WorkbookBootstrap = {
+  month_key: string;
+  vendors: Vendor[];
+  companies: Company[];
+  employees?: Employee[] | null;
+  sheets: PairSheet[];
+  summary: SummaryCard[];
+};
 
 const editableColumns = ["employee_name", "hours", "rate"] as const;
 type EditableColumn = (typeof editableColumns)[number];
@@ -104,6 +113,8 @@ export default function WorkbookPage() {
   const [vendors, setVendors] = useState<Vendor[]>([]);
   const [companies, setCompanies] = useState<Company[]>([]);
   const [employees, setEmployees] = useState<Employee[]>([]);
+  const [employeeQuery, setEmployeeQuery] = useState("");
+  const inFlightKeys = useRef(new Map<string, string>());
   const [sheets, setSheets] = useState<PairSheet[]>([]);
   const [summary, setSummary] = useState<SummaryCard[]>([]);
   const [selectedSheetId, setSelectedSheetId] = useState<number | null>(null);
@@ -147,22 +158,16 @@ export default function WorkbookPage() {
     };
   }, [selectionEnd, selectionStart]);
 
-  async function loadWorkspace() {
+  async function loadWorkspace(background = false) {
     setError(null);
-    setLoading(true);
+    if (!background) setLoading(true);
     try {
-      const [vendorsData, companiesData, employeesData, sheetsData, summaryData] = await Promise.all([
-        apiGet<Vendor[]>("/vendors"),
-        apiGet<Company[]>("/companies"),
-        apiGet<Employee[]>("/employees"),
-        apiGet<PairSheet[]>(`/workbook/sheets?month_key=${encodeURIComponent(monthKey)}`),
-        apiGet<SummaryCard[]>(`/analytics/summary?month_key=${encodeURIComponent(monthKey)}`),
-      ]);
-      setVendors(vendorsData);
-      setCompanies(companiesData);
-      setEmployees(employeesData);
+      const bootstrap = await apiGet<WorkbookBootstrap>(`/workbook/bootstrap?month_key=${encodeURIComponent(monthKey)}`);
+      const sheetsData = bootstrap.sheets;
+      setVendors(bootstrap.vendors);
+      setCompanies(bootstrap.companies);
       setSheets(sheetsData);
-      setSummary(summaryData);
+      setSummary(bootstrap.summary);
       if (!selectedSheetId && sheetsData.length > 0) {
         setSelectedSheetId(sheetsData[0].id);
       } else if (selectedSheetId && !sheetsData.some((sheet) => sheet.id === selectedSheetId)) {
@@ -217,6 +222,45 @@ export default function WorkbookPage() {
     }
   }, [selectedSheetId, monthKey]);
 
+  // Changes made elsewhere (other users, tabs, cron) arrive as server-sent events. Bursts are
+  // coalesced into one re-fetch of what they touched; a sheet with unsaved edits is left alone.
+  const pendingReload = useRef({ workspace: false, sheet: false, timer: 0 });
+  const flushReload = useRef(() => {});
+  flushReload.current = () => {
+    const pending = pendingReload.current;
+    if (pending.workspace) loadWorkspace(true);
+    if (pending.sheet && selectedSheetId && !dirty) loadSheet(selectedSheetId);
+    pending.workspace = false;
+    pending.sheet = false;
+  };
+  const onChange = useRef((event: ChangeEvent | null) => {});
+  onChange.current = (event) => {
+    const pending = pendingReload.current;
+    if (event === null) {
+      pending.workspace = true;
+      pending.sheet = true;
+    } else {
+      if (event.month_key && event.month_key !== monthKey) return;
+      pending.workspace = pending.workspace || event.kind !== "invoice.rendered";
+      pending.sheet =
+        pending.sheet ||
+        event.pair_sheet_id === selectedSheetId ||
+        (!!event.invoice_id && event.invoice_id === sheetDetail?.invoice?.id) ||
+        event.kind.startsWith("month.");
+    }
+    window.clearTimeout(pending.timer);
+    pending.timer = window.setTimeout(() => flushReload.current(), 300);
+  };
+
+  useEffect(
+    () =>
+      subscribeChanges(
+        (event) => onChange.current(event),
+        () => onChange.current(null)
+      ),
+    []
+  );
+
   useEffect(() => {
     function stopSelecting() {
       setIsSelecting(false);
@@ -225,11 +269,81 @@ export default function WorkbookPage() {
     return () => window.removeEventListener("mouseup", stopSelecting);
   }, []);
 
+  useEffect(() => {
+    if (!employeeQuery.trim()) return;
+    const timer = window.setTimeout(() => {
+      lookupEmployees([employeeQuery]).catch(() => undefined);
+    }, 150);
+    return () => window.clearTimeout(timer);
+  }, [employeeQuery]);
+
+  // Employee names come from /search as the user types instead of the full /employees list.
+  // Matches are merged into `employees` for the datalist, and rows whose typed name now
+  // matches exactly pick up the employee id and default rate.
+  async function lookupEmployees(queries: string[], limit = 20) {
+    const unique = Array.from(new Set(queries.map((query) => query.trim()).filter(Boolean)));
+    if (unique.length === 0) return;
+    const batches = await Promise.all(
+      unique.map((query) =>
+        apiGet<SearchResult[]>(`/search?q=${encodeURIComponent(query)}&kinds=employee&limit=${limit}`)
+      )
+    );
+    const found: Employee[] = batches
+      .flat()
+      .map((result) => ({ id: result.id, name: result.name, hourly_rate: result.hourly_rate ?? 0 }));
+    if (found.length === 0) return;
+    setEmployees((current) => {
+      const byId = new Map(current.map((employee) => [employee.id, employee]));
+      found.forEach((employee) => byId.set(employee.id, employee));
+      return Array.from(byId.values());
+    });
+    const byName = new Map(found.map((employee) => [employee.name.trim().toLowerCase(), employee]));
+    setRows((current) =>
+      current.map((row) => {
+        if (row.employee_id || !row.employee_name.trim()) return row;
+        const employee = byName.get(row.employee_name.trim().toLowerCase());
+        if (!employee) return row;
+        return {
+          ...row,
+          employee_id: employee.id,
+          rate: !row.rate || row.rate === 0 ? employee.hourly_rate : row.rate,
+        };
+      })
+    );
+  }
+
+  // Generate/send carry an Idempotency-Key; a second click while the first request is
+  // still in flight reuses its key, so the server replays it instead of rendering or
+  // emailing twice.
+  async function withIdempotencyKey<T>(action: string, run: (key: string) => Promise<T>) {
+    const existing = inFlightKeys.current.get(action);
+    const key = existing ?? crypto.randomUUID();
+    inFlightKeys.current.set(action, key);
+    try {
+      return await run(key);
+    } finally {
+      if (!existing) inFlightKeys.current.delete(action);
+    }
+  }
+
+  function generateSheetInvoice(sheetId: number) {
+    return withIdempotencyKey(`generate:${sheetId}:${monthKey}`, (idempotencyKey) =>
+      apiPost<CombinedInvoice>(
+        `/workbook/sheets/${sheetId}/invoice/generate?month_key=${encodeURIComponent(monthKey)}`,
+        undefined,
+        { idempotencyKey }
+      )
+    );
+  }
+
   function matchEmployee(name: string) {
     return employees.find((employee) => employee.name.trim().toLowerCase() === name.trim().toLowerCase());
   }
 
   function patchRow(rowIndex: number, key: EditableColumn, value: string) {
+    if (key === "employee_name") {
+      setEmployeeQuery(value);
+    }
     setRows((current) =>
       withSpreadsheetPadding(
         current.map((row, idx) => {
@@ -349,7 +463,7 @@ export default function WorkbookPage() {
       if (!saved) return;
     }
     try {
-      await apiPost<CombinedInvoice>(`/workbook/sheets/${selectedSheetId}/invoice/generate?month_key=${encodeURIComponent(monthKey)}`);
+      await generateSheetInvoice(selectedSheetId);
       await loadSheet(selectedSheetId);
       await loadWorkspace();
       setMessage("Combined invoice generated");
@@ -367,7 +481,7 @@ export default function WorkbookPage() {
     }
     if (!invoice) {
       try {
-        invoice = await apiPost<CombinedInvoice>(`/workbook/sheets/${selectedSheetId}/invoice/generate?month_key=${encodeURIComponent(monthKey)}`);
+        invoice = await generateSheetInvoice(selectedSheetId);
       } catch (err: any) {
         setError(err.message);
         return;
@@ -382,7 +496,10 @@ export default function WorkbookPage() {
       return;
     }
     try {
-      await apiPost<CombinedInvoice>(`/combined-invoices/${invoice.id}/send`, { recipients: recipientsList });
+      const invoiceId = invoice.id;
+      await withIdempotencyKey(`send:${invoiceId}`, (idempotencyKey) =>
+        apiPost<CombinedInvoice>(`/combined-invoices/${invoiceId}/send`, { recipients: recipientsList }, { idempotencyKey })
+      );
       await loadSheet(selectedSheetId);
       await loadWorkspace();
       setMessage("Combined invoice sent");
@@ -502,6 +619,9 @@ export default function WorkbookPage() {
     });
     setRows(withSpreadsheetPadding(nextRows));
     setDirty(true);
+    if (column === "employee_name") {
+      lookupEmployees(pastedRows.map((cells) => cells[0] ?? ""), 1).catch(() => undefined);
+    }
   }
 
   return (